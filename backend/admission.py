@@ -0,0 +1,209 @@
+"""
+MindMate Admission Control
+Token buckets and a priority queue in front of the LLM providers, so one
+chatty user (or a client retry loop) cannot use up the provider's rate limit
+for everyone.
+
+Every request that misses the response cache is charged its estimated prompt
+tokens plus max_tokens (what provider rate limiters count) against the
+user's bucket and the global bucket, both in tokens per minute. Waiting
+requests are admitted interactive first (support messages, breathing
+exercises, ...), then background work (journal analysis, weekly reflections);
+background work also leaves LLM_ADMISSION_INTERACTIVE_RESERVE of the global
+bucket to interactive requests. A request that cannot be admitted within
+its wait is rejected with AdmissionRejected, and the walkers answer with
+their canned responses instead.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import config
+from llm_client import LLMError
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class AdmissionRejected(LLMError):
+    """The request was not admitted within its wait (treated like a provider 429)"""
+
+    def __init__(self, message, reason):
+        super().__init__(message, status_code=429)
+        self.reason = reason  # "user_quota" or "global_quota"
+
+
+class TokenBucket:
+    """`per_minute` tokens refilled continuously, holding at most one minute's worth.
+
+    take() may leave the bucket in debt; the caller then waits until the
+    debt would have been refilled (a reservation).
+    """
+
+    def __init__(self, per_minute, now=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def level(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def wait_time(self, n, now, floor=0.0):
+        """Seconds until n tokens can be taken leaving at least `floor` behind"""
+        missing = n + floor - self.level(now)
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, n, now):
+        """Take n tokens; returns the seconds until the bucket is out of debt"""
+        self.tokens = self.level(now) - n
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def give_back(self, n, now):
+        self.tokens = min(self.capacity, self.level(now) + n)
+
+
+class AdmissionController:
+    """Per-user and global token buckets plus a priority queue for the global one"""
+
+    def __init__(self, global_per_minute, user_per_minute, interactive_tasks=(),
+                 interactive_reserve=0.25, interactive_wait=2.0, background_wait=60.0, max_users=10000):
+        self.bucket = TokenBucket(global_per_minute) if global_per_minute > 0 else None
+        self.user_per_minute = user_per_minute
+        self.interactive_tasks = set(interactive_tasks)
+        self.reserve = interactive_reserve * global_per_minute
+        self.waits = {INTERACTIVE: interactive_wait, BACKGROUND: background_wait}
+        self.max_users = max_users
+        self.users = OrderedDict()  # user_id -> TokenBucket, least recently used first
+        self._users_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence) tickets
+        self._sequence = itertools.count()
+        self.counters = {
+            f"{name}_{outcome}": 0
+            for name in PRIORITY_NAMES.values() for outcome in ("admitted", "rejected", "waited_ms")
+        }
+
+    def priority(self, task):
+        return INTERACTIVE if task in self.interactive_tasks else BACKGROUND
+
+    def admit(self, task, tokens, user_id="", priority=None):
+        """Block until the request may be sent, or raise AdmissionRejected.
+
+        priority overrides the task's class, e.g. BACKGROUND for queued work
+        that shares a task name with interactive requests.
+        """
+        priority = self.priority(task) if priority is None else priority
+        started = time.monotonic()
+        deadline = started + self.waits[priority]
+        user_bucket = self._user_bucket(user_id) if user_id and self.user_per_minute > 0 else None
+        try:
+            if user_bucket is not None:
+                self._reserve_user(user_bucket, tokens, deadline, user_id)
+            try:
+                if self.bucket is not None:
+                    self._acquire_global(priority, tokens, deadline)
+            except AdmissionRejected:
+                if user_bucket is not None:
+                    with self._users_lock:
+                        user_bucket.give_back(min(tokens, user_bucket.capacity), time.monotonic())
+                raise
+        except AdmissionRejected:
+            self._count(priority, "rejected")
+            raise
+        self._count(priority, "admitted", (time.monotonic() - started) * 1000)
+
+    def stats(self):
+        with self._cond:
+            counters = dict(self.counters)
+            waiting = len(self._waiting)
+            available = self.bucket.level(time.monotonic()) if self.bucket is not None else None
+        with self._users_lock:
+            users = len(self.users)
+        return dict(
+            counters,
+            waiting=waiting,
+            global_tokens_available=round(available) if available is not None else None,
+            global_tokens_per_minute=int(self.bucket.capacity) if self.bucket is not None else 0,
+            user_tokens_per_minute=self.user_per_minute,
+            tracked_users=users
+        )
+
+    def _user_bucket(self, user_id):
+        with self._users_lock:
+            bucket = self.users.get(user_id)
+            if bucket is None:
+                bucket = self.users[user_id] = TokenBucket(self.user_per_minute)
+                while len(self.users) > self.max_users:
+                    self.users.popitem(last=False)
+            else:
+                self.users.move_to_end(user_id)
+            return bucket
+
+    def _reserve_user(self, bucket, tokens, deadline, user_id):
+        # A reservation: the user's concurrent requests queue up behind each other's debt
+        tokens = min(tokens, bucket.capacity)
+        with self._users_lock:
+            now = time.monotonic()
+            delay = bucket.take(tokens, now)
+            if now + delay > deadline:
+                bucket.give_back(tokens, now)
+                raise AdmissionRejected(f"LLM token quota exceeded for user {user_id}", "user_quota")
+        if delay:
+            time.sleep(delay)
+
+    def _acquire_global(self, priority, tokens, deadline):
+        tokens = min(tokens, self.bucket.capacity - self.reserve if priority == BACKGROUND else self.bucket.capacity)
+        floor = self.reserve if priority == BACKGROUND else 0.0
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    # Only the head of the queue may take tokens, so a later
+                    # interactive request overtakes waiting background work
+                    wait = self.bucket.wait_time(tokens, now, floor) if self._waiting[0] == ticket else None
+                    if wait == 0.0:
+                        self.bucket.take(tokens, now)
+                        return
+                    if wait is not None and now + wait > deadline or now >= deadline:
+                        raise AdmissionRejected("LLM token quota exceeded, try again shortly", "global_quota")
+                    self._cond.wait(deadline - now if wait is None else wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def _count(self, priority, outcome, waited_ms=None):
+        name = PRIORITY_NAMES[priority]
+        with self._cond:
+            self.counters[f"{name}_{outcome}"] += 1
+            if waited_ms is not None:
+                self.counters[f"{name}_waited_ms"] += round(waited_ms)
+
+
+def estimate_request_tokens(prompt, max_tokens):
+    """Tokens a request is charged: prompt (~4 characters per token) plus its output budget"""
+    return len(prompt) // 4 + 1 + max_tokens
+
+
+def build_admission():
+    """Controller from config, or None when admission control is off"""
+    if not config.LLM_ADMISSION_ENABLED:
+        return None
+    return AdmissionController(
+        config.LLM_GLOBAL_TOKENS_PER_MINUTE,
+        config.LLM_USER_TOKENS_PER_MINUTE,
+        [task.strip() for task in config.LLM_INTERACTIVE_TASKS.split(",") if task.strip()],
+        interactive_reserve=config.LLM_ADMISSION_INTERACTIVE_RESERVE,
+        interactive_wait=config.LLM_ADMISSION_INTERACTIVE_WAIT,
+        background_wait=config.LLM_ADMISSION_BACKGROUND_WAIT,
+        max_users=config.LLM_ADMISSION_MAX_USERS
+    )
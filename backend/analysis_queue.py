@@ -0,0 +1,352 @@
+"""
+MindMate Analysis Queue
+Background enrichment of journal entries. log_mood queues the journal and
+returns at once; a small worker pool analyzes queued journals in batches
+(emotions, triggers, sentiment; the local classifier first, the LLM only for
+journals it is unsure about) and writes the result back onto the stored
+entry as its "analysis" field, where get_journal_analysis can poll it. With
+a SQLite store, job states are also written to the app database so any
+process sharing it can report them.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import config
+from lexicon import NEGATIVE_MOODS, POSITIVE_MOODS, detect_emotions, detect_triggers
+from metrics import registry, stats_collector
+from mind_functions import analyze_journals
+from mood_db import app_db_path
+from trigger_index import annotate_analysis
+
+SENTIMENT_POLARITY = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+def sentiment_score(analysis, default_intensity=5.0):
+    """Sentiment in [-1, 1] (journal_entry.sentiment_score): polarity scaled by intensity.
+
+    Polarity comes from the analysis' sentiment label, or from its positive
+    and negative emotions when there is no usable label.
+    """
+    polarity = SENTIMENT_POLARITY.get(str(analysis.get("sentiment", "")).lower())
+    if polarity is None:
+        emotions = [str(emotion).lower() for emotion in analysis.get("emotions") or []]
+        positive = sum(1 for emotion in emotions if emotion in POSITIVE_MOODS)
+        negative = sum(1 for emotion in emotions if emotion in NEGATIVE_MOODS)
+        polarity = (positive - negative) / max(positive + negative, 1)
+    try:
+        intensity = float(analysis.get("intensity") or default_intensity)
+    except (TypeError, ValueError):
+        intensity = default_intensity
+    return round(polarity * max(0.0, min(intensity, 10.0)) / 10, 3)
+
+
+def build_analysis(text, result=None):
+    """Stored analysis for a journal: the classifier or LLM result when there is
+    one, keyword matches otherwise, with lexicon triggers merged in and a sentiment_score"""
+    if result and "error" not in result:
+        analysis = dict(result, source=result.get("source", "llm"))
+    else:
+        detected = detect_emotions(text)
+        analysis = {
+            "emotions": detected["emotions"] or ["neutral"],
+            "intensity": detected["intensity"] or 5.0,
+            "source": "keywords"
+        }
+
+    triggers = analysis.get("triggers")
+    triggers = list(triggers) if isinstance(triggers, list) else []
+    for trigger in detect_triggers(text):
+        if trigger not in triggers:
+            triggers.append(trigger)
+    analysis["triggers"] = triggers
+
+    analysis["sentiment_score"] = sentiment_score(analysis)
+    if analysis.get("sentiment") not in SENTIMENT_POLARITY:
+        score = analysis["sentiment_score"]
+        analysis["sentiment"] = "positive" if score > 0 else ("negative" if score < 0 else "neutral")
+    return analysis
+
+
+class AnalysisJob:
+    """One journal waiting for analysis"""
+
+    __slots__ = ("store", "user_id", "entry_id", "text", "attempts")
+
+    def __init__(self, store, user_id, entry_id, text):
+        self.store = store
+        self.user_id = user_id
+        self.entry_id = entry_id
+        self.text = text
+        self.attempts = 0
+
+
+class JobStates:
+    """Latest job state per entry in SQLite, shared by every process using the
+    database; the most recently updated max_entries are kept"""
+
+    def __init__(self, path, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_jobs ("
+            "user_id TEXT NOT NULL, entry_id INTEGER NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL, error TEXT, PRIMARY KEY (user_id, entry_id))"
+        )
+        self._db.commit()
+
+    def put(self, user_id, entry_id, state):
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analysis_jobs (user_id, entry_id, status, attempts, error) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (user_id, entry_id, state["status"], state["attempts"], state["error"])
+                )
+                # A replaced row gets the highest rowid, so the oldest states go first
+                self._db.execute(
+                    "DELETE FROM analysis_jobs WHERE rowid <= (SELECT MAX(rowid) FROM analysis_jobs) - ?",
+                    (self.max_entries,)
+                )
+
+    def get(self, user_id, entry_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, attempts, error FROM analysis_jobs WHERE user_id = ? AND entry_id = ?",
+                (user_id, entry_id)
+            ).fetchone()
+        return {"status": row[0], "attempts": row[1], "error": row[2]} if row else None
+
+
+_job_states = None
+_job_states_lock = threading.Lock()
+
+
+def get_job_states():
+    """Job states in the app database, opened on first use"""
+    global _job_states
+    with _job_states_lock:
+        if _job_states is None:
+            _job_states = JobStates(app_db_path(), config.ANALYSIS_STATUS_ENTRIES)
+        return _job_states
+
+
+class AnalysisQueue:
+    """Bounded queue of journals drained in batches by a pool of daemon workers"""
+
+    def __init__(self, analyze, workers=2, max_pending=1000, enqueue_timeout=0.0,
+                 max_attempts=3, retry_delay=2.0, batch_size=10, status_entries=10000):
+        self.analyze = analyze  # ([text, ...], [user_id, ...]) -> [result or {"error": ...}, ...]
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        self.status_entries = status_entries
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0  # queued, running or waiting to retry
+        self._status = OrderedDict()  # (user_id, entry_id) -> job state
+        self._threads = []
+        self.counters = {"queued": 0, "analyzed": 0, "fallbacks": 0, "retries": 0, "rejected": 0}
+
+    def submit(self, store, entry):
+        """Queue a stored entry's journal; returns "queued", "rejected" or "skipped" """
+        if not entry.journal_text:
+            return "skipped"
+        self._start_workers()
+        job = AnalysisJob(store, entry.user_id, entry.entry_id, entry.journal_text)
+        with self._lock:
+            self._in_flight += 1
+        self._set_status(job, "queued")
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put(job, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(job)
+        except queue.Full:
+            # Backpressure: the entry is stored, only its enrichment is deferred
+            self._done(job, "rejected", error="Analysis queue is full")
+            self._count("rejected")
+            return "rejected"
+        self._count("queued")
+        return "queued"
+
+    def status(self, user_id, entry_id):
+        """Latest job state for an entry, or None if it was never queued here"""
+        with self._lock:
+            state = self._status.get((user_id, entry_id))
+            return dict(state) if state else None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, pending=self._queue.qsize(), in_flight=self._in_flight)
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted journal is analyzed (or rejected); False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _start_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"journal-analysis-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            # Whatever else is already waiting joins this job's LLM request
+            jobs = [self._queue.get()]
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            unsettled = list(jobs)
+            try:
+                self._process(jobs, unsettled)
+            except Exception as e:
+                # Never let one batch kill the worker: settle its remaining jobs and carry on
+                print(f"⚠ Journal analysis batch failed: {e}")
+                for job in unsettled:
+                    try:
+                        self._done(job, "failed", error=str(e))
+                    except Exception:
+                        pass
+
+    def _process(self, jobs, unsettled):
+        """Analyze one batch; each job leaves `unsettled` once it is retried or finished"""
+        for job in jobs:
+            job.attempts += 1
+            self._set_status(job, "processing")
+
+        try:
+            results = self.analyze([job.text for job in jobs], [job.user_id for job in jobs])
+        except Exception as e:
+            results = [{"error": str(e)}] * len(jobs)
+        if not isinstance(results, list) or len(results) != len(jobs):
+            results = [{"error": "Malformed analysis"}] * len(jobs)
+        for job, result in zip(jobs, results):
+            if not isinstance(result, dict):
+                result = {"error": "Malformed analysis"}
+            if "error" in result and job.attempts < self.max_attempts:
+                self._retry(job, result["error"])
+            else:
+                self._finish(job, result)
+            unsettled.remove(job)
+
+    def _retry(self, job, error):
+        self._set_status(job, "retrying", error=error)
+        self._count("retries")
+        delay = self.retry_delay * (2 ** (job.attempts - 1))
+        timer = threading.Timer(delay, self._requeue, (job, error))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, job, error):
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._finish(job, {"error": error})
+
+    def _finish(self, job, result):
+        error = result.get("error")
+        try:
+            annotate_analysis(job.store, job.user_id, job.entry_id, build_analysis(job.text, result))
+        except Exception as e:
+            self._done(job, "failed", error=str(e))
+            return
+        self._count("fallbacks" if error else "analyzed")
+        self._done(job, "done", error=error)
+
+    def _set_status(self, job, status, error=None):
+        state = {"status": status, "attempts": job.attempts, "error": error}
+        with self._lock:
+            self._status[(job.user_id, job.entry_id)] = state
+            self._status.move_to_end((job.user_id, job.entry_id))
+            while len(self._status) > self.status_entries:
+                self._status.popitem(last=False)
+        # Other processes sharing the store poll these too; "processing" is too short-lived to share
+        if getattr(job.store, "shared", False) and status != "processing":
+            try:
+                get_job_states().put(job.user_id, job.entry_id, dict(state))
+            except sqlite3.Error as e:
+                print(f"⚠ Could not save analysis job state: {e}")
+
+    def _done(self, job, status, error=None):
+        self._set_status(job, status, error)
+        with self._idle:
+            self._in_flight -= 1
+            self._idle.notify_all()
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+
+# Shared by every walker; workers start with the first queued journal
+analysis_queue = AnalysisQueue(
+    analyze_journals,
+    workers=config.ANALYSIS_WORKERS,
+    max_pending=config.ANALYSIS_QUEUE_SIZE,
+    enqueue_timeout=config.ANALYSIS_ENQUEUE_TIMEOUT,
+    max_attempts=config.ANALYSIS_MAX_ATTEMPTS,
+    retry_delay=config.ANALYSIS_RETRY_DELAY,
+    batch_size=config.BATCH_ANALYSIS_MAX_ENTRIES,
+    status_entries=config.ANALYSIS_STATUS_ENTRIES
+)
+registry.add_collector(stats_collector(
+    "mindmate_analysis_queue", "Journal analysis queue", analysis_queue.stats,
+    counters=("queued", "analyzed", "fallbacks", "retries", "rejected")
+))
+
+
+def enqueue_analysis(store, entry):
+    """Queue a freshly logged entry for background analysis; returns its analysis status"""
+    if not config.ANALYSIS_QUEUE_ENABLED:
+        return "disabled"
+    return analysis_queue.submit(store, entry)
+
+
+def journal_analysis(store, user_id, entry_id):
+    """get_journal_analysis report"""
+    entry = store.entry(user_id, entry_id)
+    if entry is None:
+        return {"status": "error", "message": f"No entry {entry_id} for user {user_id}"}
+
+    analysis = entry.get("analysis")
+    # This process's own jobs first, then jobs run by any process sharing the store
+    state = analysis_queue.status(user_id, entry_id)
+    if state is None and getattr(store, "shared", False):
+        state = get_job_states().get(user_id, entry_id)
+    state = state or {}
+    if state:
+        status = state["status"]
+    elif analysis is not None:
+        status = "done"
+    else:
+        status = "not_queued" if entry.journal_text else "skipped"
+    return {
+        "status": "success",
+        "user_id": user_id,
+        "entry_id": entry_id,
+        "analysis_status": status,
+        "attempts": state.get("attempts", 0),
+        "error": state.get("error"),
+        "analysis": analysis
+    }
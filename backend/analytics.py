@@ -0,0 +1,204 @@
+"""
+MindMate Cohort Analytics
+NumPy batch versions of the per-user trend metrics in mind_functions.
+Many users' timelines are packed end to end into flat arrays (CSR layout)
+and every metric is computed for the whole cohort in a few vector passes.
+"""
+
+import bisect
+import statistics
+
+import numpy as np
+
+from lexicon import NEGATIVE_MOODS, POSITIVE_MOODS
+from mood_store import MoodStore, window_start
+
+# Relative distance from the +/-1 trend threshold below which a user's
+# half-split trend is recomputed exactly, so rounding can never flip a label
+TREND_RECHECK_TOLERANCE = 1e-9
+
+
+def mood_polarity(mood_name):
+    """+1 for positive moods, -1 for negative, 0 otherwise"""
+    mood = mood_name.lower()
+    if mood in POSITIVE_MOODS:
+        return 1
+    if mood in NEGATIVE_MOODS:
+        return -1
+    return 0
+
+
+class Cohort:
+    """Intensities and mood polarity for many users, packed end to end.
+
+    User i's entries occupy [offsets[i], offsets[i + 1]) of the flat arrays,
+    oldest first.
+    """
+
+    def __init__(self, user_ids, offsets, intensities, polarity):
+        self.user_ids = list(user_ids)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.intensities = np.asarray(intensities, dtype=np.float64)
+        self.polarity = np.asarray(polarity, dtype=np.int8)
+        self.sizes = np.diff(self.offsets)
+        # Owning user of each flat position
+        self.owner = np.repeat(np.arange(len(self.user_ids)), self.sizes)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def from_timelines(cls, timelines):
+        """Pack {user_id: [entry, ...]} (entries with intensity and mood_name)"""
+        offsets = [0]
+        intensities = []
+        polarity = []
+        for entries in timelines.values():
+            for entry in entries:
+                intensities.append(entry["intensity"])
+                polarity.append(mood_polarity(entry["mood_name"]))
+            offsets.append(len(intensities))
+        return cls(timelines.keys(), offsets, intensities, polarity)
+
+    @classmethod
+    def from_store(cls, store, days=7, now=None):
+        """Pack every user's last N days from a mood store"""
+        if not isinstance(store, MoodStore):
+            return cls.from_timelines({
+                user_id: store.window(user_id, days, now) for user_id in store.user_ids()
+            })
+
+        # In-memory store: slice the timeline columns directly
+        start = window_start(days, now)
+        lookup = np.array([mood_polarity(name) for name in store.emotions.names] or [0], dtype=np.int8)
+        user_ids = []
+        offsets = [0]
+        intensity_parts = []
+        polarity_parts = []
+        for user_id, timeline in store.users.items():
+            lo = 0 if start is None else bisect.bisect_left(timeline.times, start * 1_000_000)
+            user_ids.append(user_id)
+            intensity_parts.append(np.frombuffer(timeline.intensities, dtype=np.float64)[lo:])
+            polarity_parts.append(lookup[np.frombuffer(timeline.emotion_ids, dtype=np.uint32)[lo:]])
+            offsets.append(offsets[-1] + len(timeline) - lo)
+        if not user_ids:
+            return cls([], [0], [], [])
+        return cls(user_ids, offsets, np.concatenate(intensity_parts), np.concatenate(polarity_parts))
+
+
+def _exact_trend(intensities):
+    """calculate_intensity_trend on one user's intensities, using exact means"""
+    mid = len(intensities) // 2
+    first_avg = statistics.mean(intensities[:mid])
+    second_avg = statistics.mean(intensities[mid:])
+    if second_avg > first_avg + 1:
+        return "improving"
+    elif second_avg < first_avg - 1:
+        return "declining"
+    return "stable"
+
+
+def intensity_trends(cohort):
+    """Half-split intensity trend per user (matches calculate_intensity_trend)"""
+    n = len(cohort)
+    sizes = cohort.sizes
+    mid = sizes // 2
+    position = np.arange(len(cohort.intensities)) - cohort.offsets[:-1][cohort.owner]
+    half = cohort.owner * 2 + (position >= mid[cohort.owner])
+    sums = np.bincount(half, weights=cohort.intensities, minlength=2 * n).reshape(n, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_avg = sums[:, 0] / mid
+        second_avg = sums[:, 1] / (sizes - mid)
+    diff = second_avg - first_avg
+
+    trends = np.full(n, "stable", dtype=object)
+    trends[diff > 1] = "improving"
+    trends[diff < -1] = "declining"
+    trends[sizes < 2] = "insufficient_data"
+
+    # Users sitting on a threshold are settled with exact arithmetic
+    scale = np.maximum(1.0, np.abs(first_avg) + np.abs(second_avg))
+    near = (sizes >= 2) & (np.minimum(np.abs(diff - 1), np.abs(diff + 1)) <= TREND_RECHECK_TOLERANCE * scale)
+    for i in np.flatnonzero(near):
+        trends[i] = _exact_trend(cohort.intensities[cohort.offsets[i]:cohort.offsets[i + 1]].tolist())
+    return trends
+
+
+def volatilities(cohort):
+    """Sample-stdev volatility per user, capped at 100 (matches calculate_volatility)"""
+    n = len(cohort)
+    sizes = cohort.sizes
+    sums = np.bincount(cohort.owner, weights=cohort.intensities, minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / sizes
+        deviations = cohort.intensities - means[cohort.owner]
+        m2 = np.bincount(cohort.owner, weights=deviations * deviations, minlength=n)
+        stdev = np.sqrt(m2 / (sizes - 1))
+    return np.where(sizes < 2, 0.0, np.minimum(stdev * 10, 100))
+
+
+def positive_ratios(cohort):
+    """Share of positive among polar moods per user (NaN when there are none)"""
+    n = len(cohort)
+    positive = np.bincount(cohort.owner, weights=cohort.polarity == 1, minlength=n)
+    negative = np.bincount(cohort.owner, weights=cohort.polarity == -1, minlength=n)
+    total = positive + negative
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, positive / total, np.nan)
+
+
+def mood_trends(cohort, ratios=None):
+    """Positive/negative mood trend per user (matches analyze_trends)"""
+    ratios = positive_ratios(cohort) if ratios is None else ratios
+    trends = np.full(len(cohort), "stable", dtype=object)
+    trends[ratios >= 0.6] = "improving"
+    trends[ratios <= 0.4] = "declining"
+    return trends
+
+
+def rolling_means(cohort, window=3):
+    """Trailing mean of each entry and up to window - 1 entries before it (same user only)"""
+    values = cohort.intensities
+    totals = values.copy()
+    counts = np.ones(len(values))
+    for lag in range(1, window):
+        same_user = np.zeros(len(values), dtype=bool)
+        same_user[lag:] = cohort.owner[lag:] == cohort.owner[:-lag]
+        totals[lag:] += np.where(same_user[lag:], values[:-lag], 0.0)
+        counts += same_user
+    return totals / counts
+
+
+def positive_streaks(cohort):
+    """(longest, current) run of consecutive positive entries per user"""
+    n = len(cohort)
+    index = np.arange(len(cohort.polarity))
+    # Runs restart after every non-positive entry and at each user's first entry
+    barrier = np.where(cohort.polarity == 1, -1, index)
+    barrier = np.maximum(barrier, cohort.offsets[:-1][cohort.owner] - 1)
+    run = np.where(cohort.polarity == 1, index - np.maximum.accumulate(barrier), 0)
+
+    longest = np.zeros(n, dtype=np.int64)
+    current = np.zeros(n, dtype=np.int64)
+    nonempty = cohort.sizes > 0
+    if nonempty.any():
+        longest[nonempty] = np.maximum.reduceat(run, cohort.offsets[:-1][nonempty])
+        current[nonempty] = run[cohort.offsets[1:][nonempty] - 1]
+    return longest, current
+
+
+def score_cohort(cohort, rolling_window=3):
+    """Every metric for every user, as arrays aligned with cohort.user_ids"""
+    ratios = positive_ratios(cohort)
+    longest, current = positive_streaks(cohort)
+    return {
+        "entries": cohort.sizes,
+        "intensity_trend": intensity_trends(cohort),
+        "volatility": volatilities(cohort),
+        "positive_ratio": ratios,
+        "mood_trend": mood_trends(cohort, ratios),
+        "rolling_mean": rolling_means(cohort, rolling_window),
+        "longest_positive_streak": longest,
+        "current_positive_streak": current
+    }
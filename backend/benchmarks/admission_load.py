@@ -0,0 +1,120 @@
+"""
+MindMate Admission Load Benchmark
+Background threads flood a rate-limited fake provider with weekly reflections
+while interactive support messages arrive at a steady pace from many users.
+Runs once without admission control and once with it, and reports the
+interactive latency percentiles, how many interactive requests fell back to a
+canned response, the background work completed and the provider's 429s.
+
+Usage:
+    python benchmarks/admission_load.py --seconds 20 --background-threads 8 --tokens-per-minute 60000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from admission import AdmissionController
+from fake_llm_server import FakeLLMServer
+from llm_client import LLMClient, LLMError
+from llm_providers import LLMRouter
+
+BACKGROUND_PROMPT = "Write a weekly reflection for this mood history: " + "calm, tired, anxious. " * 40
+INTERACTIVE_PROMPT = "Write a short supportive message for someone who feels anxious about work."
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(args, admission):
+    server = FakeLLMServer(latency_ms=args.latency_ms, tokens_per_minute=args.tokens_per_minute)
+    url = server.start()
+    client = LLMClient(url, "benchmark", "fake", max_retries=args.retries, backoff_max=args.backoff_max,
+                       pool_size=args.background_threads + 8)
+    router = LLMRouter({"openai": client}, {"default": ["openai"]}, admission=admission)
+    stop = time.monotonic() + args.seconds
+    background = {"done": 0, "rejected": 0}
+    interactive = {"latencies": [], "fallbacks": 0}
+    lock = threading.Lock()
+
+    def flood(worker):
+        while time.monotonic() < stop:
+            try:
+                router.complete(BACKGROUND_PROMPT, 0.5, 400, task="weekly_reflection",
+                                use_cache=False, user_id=f"batch-{worker}")
+                outcome = "done"
+            except LLMError:
+                outcome = "rejected"
+                time.sleep(0.05)
+            with lock:
+                background[outcome] += 1
+
+    def ask(i):
+        started = time.perf_counter()
+        try:
+            router.complete(INTERACTIVE_PROMPT, 0.7, 150, task="support_message",
+                            use_cache=False, user_id=f"user-{i % args.users}")
+            fell_back = False
+        except LLMError:
+            fell_back = True
+        with lock:
+            interactive["latencies"].append((time.perf_counter() - started) * 1000)
+            interactive["fallbacks"] += fell_back
+
+    threads = [threading.Thread(target=flood, args=(w,)) for w in range(args.background_threads)]
+    for thread in threads:
+        thread.start()
+    i = 0
+    while time.monotonic() < stop:
+        thread = threading.Thread(target=ask, args=(i,))
+        thread.start()
+        threads.append(thread)
+        i += 1
+        time.sleep(1 / args.interactive_rate)
+    for thread in threads:
+        thread.join()
+    router.close()
+    server.stop()
+    latencies = interactive["latencies"]
+    return {
+        "interactive": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+        "fallbacks": interactive["fallbacks"],
+        "background_done": background["done"],
+        "provider_429": server.rate_limited
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interactive LLM latency under a background spike, with and without admission control")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--background-threads", type=int, default=8)
+    parser.add_argument("--interactive-rate", type=float, default=5, help="Interactive requests per second")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tokens-per-minute", type=int, default=60000, help="The fake provider's rate limit")
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--backoff-max", type=float, default=8)
+    args = parser.parse_args()
+
+    print(f"{'admission':>9} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'fallbacks':>10} {'background':>11} {'429s':>6}")
+    for label in ("off", "on"):
+        # Admit slightly under the provider's limit so its 429s are not the throttle
+        admission = AdmissionController(
+            int(args.tokens_per_minute * 0.9), 8000, ["support_message"]
+        ) if label == "on" else None
+        result = run(args, admission)
+        print(f"{label:>9} {result['interactive']:>9} {result['p50_ms']:>8.0f} {result['p99_ms']:>8.0f} "
+              f"{result['max_ms']:>8.0f} {result['fallbacks']:>10} {result['background_done']:>11} "
+              f"{result['provider_429']:>6}")
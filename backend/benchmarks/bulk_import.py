@@ -0,0 +1,71 @@
+"""
+MindMate Bulk Import Benchmark
+Streams a synthetic history through ndjson_io: writes it as NDJSON, then
+imports it into a fresh SQLite mood store once per batch size. Reports
+entries per second next to the bare cost of reading and parsing the file,
+and the peak resident memory, which should stay flat as --entries grows.
+
+Usage:
+    python benchmarks/bulk_import.py --entries 1000000 --batch-sizes 1000 10000 50000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from synthetic import iter_entries
+
+from mood_db import SQLiteMoodStore
+from ndjson_io import import_entries, open_ndjson
+
+
+def write_history(path, count, users, seed):
+    """Synthetic history as NDJSON, in the format export_entries writes"""
+    with open_ndjson(path, "w") as f:
+        for entry_id, entry in enumerate(iter_entries(count, users, seed=seed), 1):
+            f.write(json.dumps({"entry_id": entry_id, **entry}, separators=(",", ":")))
+            f.write("\n")
+    return os.path.getsize(path)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_only(path):
+    began = time.perf_counter()
+    with open_ndjson(path, "r") as f:
+        for line in f:
+            json.loads(line)
+    return time.perf_counter() - began
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NDJSON import throughput and memory by batch size")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--gzip", action="store_true", help="Compress the NDJSON file")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="mindmate-import-") as directory:
+        path = os.path.join(directory, "history.ndjson" + (".gz" if args.gzip else ""))
+        size = write_history(path, args.entries, args.users, args.seed)
+        parse_seconds = read_only(path)
+        print(f"{args.entries:,} entries, {size / 2 ** 20:,.1f} MiB; "
+              f"read + parse only: {args.entries / parse_seconds:,.0f} entries/s")
+        print(f"{'batch size':>10} {'entries/s':>12} {'seconds':>9} {'peak RSS MiB':>13}")
+        for batch_size in args.batch_sizes:
+            store = SQLiteMoodStore(os.path.join(directory, f"b{batch_size}.db"), flush_interval_ms=0)
+            report = import_entries(store, path, batch_size, resume=False)
+            store.close()
+            if report["imported"] != args.entries:
+                raise SystemExit(f"batch size {batch_size}: imported {report['imported']} of {args.entries}")
+            print(f"{batch_size:>10} {report['entries_per_second']:>12,} {report['seconds']:>9.2f} {peak_rss_mb():>13.1f}")
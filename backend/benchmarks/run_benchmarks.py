@@ -0,0 +1,640 @@
+"""
+MindMate Benchmark Suite
+Loads a synthetic mood history (see synthetic.py) into a mood store, then
+times the logic behind each walker, the mind_functions helpers and the LLM
+helpers - the latter against an in-process fake chat-completions server with
+configurable latency and error rate, so nothing leaves the machine.
+
+Every benchmark records throughput, p50/p99 latency and peak traced memory;
+results are written as JSON and two result files can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py --entries 100000 --output base.json
+    python benchmarks/run_benchmarks.py --entries 1000000 --store sqlite --only walkers
+    python benchmarks/run_benchmarks.py --entries 1000000 --store sharded --shards 8 --only store walkers
+    python benchmarks/run_benchmarks.py --llm-latency-ms 300 --llm-error-rate 0.1 --only llm
+    python benchmarks/run_benchmarks.py --entries 100000 --baseline base.json --output new.json
+    python benchmarks/run_benchmarks.py --compare base.json new.json --threshold 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_llm_server import FakeLLMServer
+
+# The fake server binds its port here so every provider can point at it before
+# config is imported; latency and error rate are set once arguments are parsed
+fake_llm = FakeLLMServer()
+os.environ["LLM_PROVIDER"] = "openai"
+os.environ["LLM_ROUTES"] = ""
+os.environ["OPENAI_ENDPOINT"] = fake_llm.url
+os.environ["OPENAI_API_KEY"] = "benchmark"
+# Measure real calls, keep module-level indexes in memory, no daily thread
+os.environ.setdefault("LLM_CACHE_ENABLED", "False")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SUMMARY_SCHEDULER_ENABLED", "False")
+os.environ.setdefault("METRICS_PORT", "0")
+
+from synthetic import iter_entries, journal_samples, populate
+
+import mind_functions
+from analysis_queue import analysis_queue, build_analysis, enqueue_analysis, journal_analysis
+from classifier import EmotionClassifier
+from dashboard import build_dashboard, common_emotions, daily_summary, emotional_trends
+from lexicon import detect_emotions
+from metrics import registry, track_store, walker_finished, walker_started
+from mood_db import ShardedMoodStore, SQLiteMoodStore
+from mood_store import MoodStore, window_start_day
+from recommendations import activity_feedback, activity_recommendations
+from scheduler import (
+    get_summary_scheduler,
+    habit_suggestions,
+    mark_summary_dirty,
+    week_context,
+    weekly_reflection
+)
+from seed_data import SEED_EMOTIONS, SEED_HELPS_WITH, get_affirmation
+from trigger_index import record_triggers, repeating_triggers, trigger_graph
+
+GROUPS = ("store", "walkers", "helpers", "metrics", "llm")
+MEMORY_ITERATIONS = 100
+
+BENCHMARKS = []  # (name, group, setup) in run order
+
+
+def benchmark(name, group):
+    """Register a benchmark; setup(ctx) returns op(i), timed once per iteration"""
+    def register(setup):
+        BENCHMARKS.append((name, group, setup))
+        return setup
+    return register
+
+
+class Context:
+    """Shared state for one run: the loaded store and inputs the benchmarks cycle through"""
+
+    def __init__(self, args, store, user_ids):
+        self.args = args
+        self.store = store
+        self.rng = random.Random(args.seed)
+        self.users = [self.rng.choice(user_ids) for _ in range(max(args.iterations, 1))]
+        # Users with entries this week, so summaries have something to materialize
+        active = [user_id for user_id in dict.fromkeys(self.users) if store.window_version(user_id, 7)[0]]
+        self.llm_users = (active or self.users)[:max(args.llm_iterations, 1)]
+        self.emotions = [emotion["name"] for emotion in SEED_EMOTIONS]
+        self.journals = journal_samples(max(args.iterations, 1), args.seed)
+        self.timelines = [store.window(user_id, 14) for user_id in self.users[:100]]
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def emotion(self, i):
+        return self.emotions[i % len(self.emotions)]
+
+    def journal(self, i):
+        return self.journals[i % len(self.journals)]
+
+
+def open_store(kind, directory, shards=4):
+    if kind == "sqlite":
+        return SQLiteMoodStore(os.path.join(directory, f"bench-{time.time_ns()}.db"))
+    if kind == "sharded":
+        return ShardedMoodStore(os.path.join(directory, f"bench-{time.time_ns()}"), shards)
+    return MoodStore()
+
+
+def train_classifier(ctx):
+    """Emotion classifier trained on a separate synthetic history"""
+    examples = [
+        (entry["journal_text"], entry["mood_name"], entry["intensity"])
+        for entry in iter_entries(5000, ctx.args.users, ctx.args.days, ctx.args.seed + 2, journal_rate=1.0)
+    ]
+    return EmotionClassifier(sorted({emotion for _, emotion, _ in examples})).fit(examples, epochs=3)
+
+
+def is_error(result):
+    return isinstance(result, dict) and (bool(result.get("error")) or result.get("status") == "error")
+
+
+# ============================================================================
+# Mood store
+# ============================================================================
+
+@benchmark("store.add", "store")
+def bench_store_add(ctx):
+    store = open_store(ctx.args.store, ctx.args.tmpdir, ctx.args.shards)
+    entries = iter_entries(10 ** 9, ctx.args.users, ctx.args.days, ctx.args.seed + 1)
+    return lambda i: store.add_entry(next(entries))
+
+
+@benchmark("store.latest", "store")
+def bench_store_latest(ctx):
+    return lambda i: ctx.store.latest(ctx.user(i), 5)
+
+
+@benchmark("store.window_7d", "store")
+def bench_store_window(ctx):
+    return lambda i: ctx.store.window(ctx.user(i), 7)
+
+
+@benchmark("store.stats_30d", "store")
+def bench_store_stats(ctx):
+    return lambda i: ctx.store.stats(ctx.user(i), 30)
+
+
+@benchmark("store.page_7d", "store")
+def bench_store_page(ctx):
+    return lambda i: ctx.store.page(ctx.user(i), 7, limit=20)
+
+
+# ============================================================================
+# Walker logic (what each walker in walkers.jac does once it has the store)
+# ============================================================================
+
+@benchmark("log_mood", "walkers")
+def bench_log_mood(ctx):
+    def op(i):
+        user_id = ctx.user(i)
+        entry = ctx.store.add(user_id, ctx.emotion(i), 5.0, ctx.journal(i))
+        record_triggers(ctx.store, entry)
+        status = enqueue_analysis(ctx.store, entry)
+        mark_summary_dirty(ctx.store, user_id)
+        return {"data": entry.to_dict(), "analysis_status": status}
+    return op
+
+
+@benchmark("get_journal_analysis", "walkers")
+def bench_get_journal_analysis(ctx):
+    # Background analysis from log_mood finishes before the polls are timed
+    analysis_queue.wait_idle(timeout=60)
+    targets = [(user_id, ctx.store.latest(user_id, 1)[0].entry_id) for user_id in ctx.users[:100]]
+    return lambda i: journal_analysis(ctx.store, *targets[i % len(targets)])
+
+
+@benchmark("get_daily_summary", "walkers")
+def bench_get_daily_summary(ctx):
+    def op(i):
+        user_id = ctx.user(i)
+        return daily_summary(ctx.store.latest(user_id, 5), ctx.store.count(user_id))
+    return op
+
+
+@benchmark("get_weekly_summary", "walkers")
+def bench_get_weekly_summary(ctx):
+    def op(i):
+        user_id = ctx.user(i)
+        count, last_seq = ctx.store.window_version(user_id, 7)
+        page = ctx.store.page(user_id, 7)
+        return {
+            "total_entries": count,
+            "weekly_moods": [entry.to_dict() for entry in page],
+            "emotion_distribution": ctx.store.stats(user_id, 7).emotion_counts,
+            "etag": f"{window_start_day(7)}:{count}:{last_seq}"
+        }
+    return op
+
+
+@benchmark("calculate_emotional_trends", "walkers")
+def bench_calculate_emotional_trends(ctx):
+    return lambda i: emotional_trends(ctx.store.stats(ctx.user(i), 14))
+
+
+@benchmark("find_common_emotions", "walkers")
+def bench_find_common_emotions(ctx):
+    return lambda i: common_emotions(ctx.store.stats(ctx.user(i), 7), 7)
+
+
+@benchmark("get_dashboard", "walkers")
+def bench_get_dashboard(ctx):
+    return lambda i: build_dashboard(ctx.store, ctx.user(i))
+
+
+@benchmark("recommend_activities", "walkers")
+def bench_recommend_activities(ctx):
+    return lambda i: activity_recommendations(ctx.emotion(i), (i % 10) + 1)
+
+
+@benchmark("record_activity_feedback", "walkers")
+def bench_record_activity_feedback(ctx):
+    pairs = [(emotion, row[0]) for emotion, rows in SEED_HELPS_WITH.items() for row in rows]
+    return lambda i: activity_feedback(*pairs[i % len(pairs)], helped=i % 3 != 0)
+
+
+@benchmark("get_daily_affirmation", "walkers")
+def bench_get_daily_affirmation(ctx):
+    return lambda i: get_affirmation(ctx.emotion(i))
+
+
+@benchmark("analyze_journal.keywords", "walkers")
+def bench_analyze_journal_keywords(ctx):
+    return lambda i: build_analysis(ctx.journal(i))
+
+
+@benchmark("find_repeating_triggers", "walkers")
+def bench_find_repeating_triggers(ctx):
+    # Index the sampled users first (one scan each) so the timings are the
+    # steady state: a window query over the per-day trigger series
+    for user_id in ctx.users:
+        repeating_triggers(ctx.store, user_id, 30)
+    return lambda i: repeating_triggers(ctx.store, ctx.user(i), 30)
+
+
+@benchmark("get_trigger_graph", "walkers")
+def bench_get_trigger_graph(ctx):
+    return lambda i: trigger_graph(ctx.store, ctx.user(i), 30)
+
+
+# ============================================================================
+# mind_functions helpers
+# ============================================================================
+
+@benchmark("estimate_tokens", "helpers")
+def bench_estimate_tokens(ctx):
+    return lambda i: mind_functions.estimate_tokens(ctx.journal(i))
+
+
+@benchmark("chunk_texts_for_analysis", "helpers")
+def bench_chunk_texts(ctx):
+    texts = ctx.journals[:100]
+    return lambda i: mind_functions.chunk_texts_for_analysis(texts)
+
+
+@benchmark("extract_keywords", "helpers")
+def bench_extract_keywords(ctx):
+    return lambda i: mind_functions.extract_keywords(ctx.journal(i))
+
+
+@benchmark("detect_emotions", "helpers")
+def bench_detect_emotions(ctx):
+    return lambda i: detect_emotions(ctx.journal(i))
+
+
+@benchmark("classifier.predict", "helpers")
+def bench_classifier_predict(ctx):
+    model = train_classifier(ctx)
+    return lambda i: model.predict(ctx.journal(i))
+
+
+@benchmark("count_emotion_frequencies", "helpers")
+def bench_count_emotion_frequencies(ctx):
+    return lambda i: mind_functions.count_emotion_frequencies(
+        [entry.mood_name for entry in ctx.timelines[i % len(ctx.timelines)]]
+    )
+
+
+@benchmark("analyze_trends", "helpers")
+def bench_analyze_trends(ctx):
+    counts = [
+        mind_functions.count_emotion_frequencies([entry.mood_name for entry in timeline])
+        for timeline in ctx.timelines
+    ]
+    return lambda i: mind_functions.analyze_trends(counts[i % len(counts)])
+
+
+@benchmark("sort_by_frequency", "helpers")
+def bench_sort_by_frequency(ctx):
+    counts = [
+        mind_functions.count_emotion_frequencies([entry.mood_name for entry in timeline])
+        for timeline in ctx.timelines
+    ]
+    return lambda i: mind_functions.sort_by_frequency(counts[i % len(counts)])
+
+
+@benchmark("calculate_intensity_trend", "helpers")
+def bench_calculate_intensity_trend(ctx):
+    return lambda i: mind_functions.calculate_intensity_trend(ctx.timelines[i % len(ctx.timelines)])
+
+
+@benchmark("calculate_volatility", "helpers")
+def bench_calculate_volatility(ctx):
+    return lambda i: mind_functions.calculate_volatility(ctx.timelines[i % len(ctx.timelines)])
+
+
+@benchmark("rank_activities_by_effectiveness", "helpers")
+def bench_rank_activities(ctx):
+    activities = [
+        {"name": name, "duration_minutes": minutes, "effectiveness_score": score}
+        for rows in SEED_HELPS_WITH.values() for name, minutes, score in rows
+    ]
+    return lambda i: mind_functions.rank_activities_by_effectiveness(activities, (i % 10) + 1)
+
+
+@benchmark("week_context", "helpers")
+def bench_week_context(ctx):
+    weeks = [ctx.store.window(user_id, 7) for user_id in ctx.users[:100]]
+    return lambda i: week_context(weeks[i % len(weeks)])
+
+
+# ============================================================================
+# Instrumentation overhead
+# ============================================================================
+
+class get_dashboard:
+    """Stand-in walker object for the timing hooks"""
+
+
+@benchmark("metrics.walker_timer", "metrics")
+def bench_walker_timer(ctx):
+    def op(i):
+        walker = get_dashboard()
+        walker_started(walker)
+        walker_finished(walker)
+    return op
+
+
+@benchmark("metrics.render", "metrics")
+def bench_metrics_render(ctx):
+    # A scrape, storage sizes included
+    track_store(ctx.store)
+    return lambda i: registry.render()
+
+
+# ============================================================================
+# LLM helpers (against the fake server)
+# ============================================================================
+
+@benchmark("analyze_emotion_by_llm", "llm")
+def bench_analyze_emotion(ctx):
+    return lambda i: mind_functions.analyze_emotion_by_llm(ctx.journal(i))
+
+
+@benchmark("analyze_emotions_batch", "llm")
+def bench_analyze_emotions_batch(ctx):
+    return lambda i: mind_functions.analyze_emotions_batch(ctx.journals[(i * 10) % 90:(i * 10) % 90 + 10])
+
+
+@benchmark("analyze_journals.tiered", "llm")
+def bench_analyze_journals_tiered(ctx):
+    # Same journals as analyze_emotion_by_llm; confident ones never reach the LLM
+    tiered = mind_functions.TieredAnalyzer(
+        train_classifier(ctx), mind_functions.analyze_emotions_batch, mind_functions.config.CLASSIFIER_CONFIDENCE_THRESHOLD
+    )
+    return lambda i: tiered.analyze_batch([ctx.journal(i)])[0]
+
+
+@benchmark("generate_message_by_llm", "llm")
+def bench_generate_message(ctx):
+    return lambda i: mind_functions.generate_message_by_llm(ctx.emotion(i), 6, ["work"], ctx.journal(i))
+
+
+@benchmark("stream_message_by_llm", "llm")
+def bench_stream_message(ctx):
+    return lambda i: "".join(mind_functions.stream_message_by_llm(ctx.emotion(i), 6, ["work"], ctx.journal(i)))
+
+
+@benchmark("generate_breathing_by_llm", "llm")
+def bench_generate_breathing(ctx):
+    return lambda i: mind_functions.generate_breathing_by_llm(ctx.emotion(i), 6, 120)
+
+
+@benchmark("generate_affirmation_by_llm", "llm")
+def bench_generate_affirmation(ctx):
+    return lambda i: mind_functions.generate_affirmation_by_llm(ctx.emotion(i), 6, "Friend", ["work"])
+
+
+@benchmark("generate_support_bundle_by_llm", "llm")
+def bench_generate_support_bundle(ctx):
+    def op(i):
+        bundle = mind_functions.generate_support_bundle_by_llm(
+            ctx.emotion(i), 6, ["work"], ctx.journal(i), 120, "Friend"
+        )
+        return {"error": bundle["errors"]} if bundle["errors"] else bundle
+    return op
+
+
+@benchmark("run_summary_materialization", "llm")
+def bench_materialize(ctx):
+    scheduler = get_summary_scheduler()
+    scheduler.attach(ctx.store)
+
+    def op(i):
+        outcome = scheduler.materialize(ctx.llm_users[i % len(ctx.llm_users)], force=True)
+        return {"error": outcome} if outcome == "failed" else outcome
+    return op
+
+
+@benchmark("generate_weekly_reflection", "llm")
+def bench_weekly_reflection(ctx):
+    # Reads what run_summary_materialization stored for the same users
+    return lambda i: weekly_reflection(ctx.store, ctx.llm_users[i % len(ctx.llm_users)])
+
+
+@benchmark("suggest_habit_improvements", "llm")
+def bench_habit_suggestions(ctx):
+    return lambda i: habit_suggestions(ctx.store, ctx.llm_users[i % len(ctx.llm_users)])
+
+
+# ============================================================================
+# Measurement, results and comparison
+# ============================================================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(op, iterations, memory=True):
+    """Time op(i) for each iteration, then trace a short extra run for peak memory"""
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        try:
+            failed = is_error(op(i))
+        except Exception:
+            failed = True
+        latencies.append(time.perf_counter() - call_started)
+        errors += failed
+    elapsed = time.perf_counter() - started
+
+    peak_kb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            for i in range(min(iterations, MEMORY_ITERATIONS)):
+                try:
+                    op(iterations + i)
+                except Exception:
+                    pass
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "seconds": round(elapsed, 6),
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        "peak_memory_kb": round(peak_kb, 1) if peak_kb is not None else None
+    }
+
+
+def selected(name, group, only):
+    return not only or any(pattern in (group, name) or pattern in name for pattern in only)
+
+
+def run(args):
+    fake_llm.latency_ms = args.llm_latency_ms
+    fake_llm.token_delay_ms = args.llm_token_delay_ms
+    fake_llm.error_rate = args.llm_error_rate
+    fake_llm.start()
+
+    store = open_store(args.store, args.tmpdir, args.shards)
+    print(f"Loading {args.entries} synthetic entries for {args.users} users into the {args.store} store...")
+    started = time.perf_counter()
+    user_ids = populate(store, args.entries, args.users, args.days, args.seed)
+    load_s = time.perf_counter() - started
+    print(f"Loaded in {load_s:.1f}s ({args.entries / load_s:,.0f} entries/s), {len(user_ids)} active users\n")
+    ctx = Context(args, store, user_ids)
+
+    results = {}
+    print(f"{'benchmark':34} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak KB':>10} {'errors':>7}")
+    for name, group, setup in BENCHMARKS:
+        if not selected(name, group, args.only):
+            continue
+        iterations = args.llm_iterations if group == "llm" else args.iterations
+        requests_before = fake_llm.request_count
+        result = dict(measure(setup(ctx), iterations, memory=not args.no_memory), group=group)
+        if group == "llm":
+            result["llm_requests"] = fake_llm.request_count - requests_before
+        results[name] = result
+        peak = "-" if result["peak_memory_kb"] is None else f"{result['peak_memory_kb']:.1f}"
+        print(f"{name:34} {result['throughput_per_s'] or 0:>12,.1f} {result['p50_ms']:>10.3f} "
+              f"{result['p99_ms']:>10.3f} {peak:>10} {result['errors']:>7}")
+
+    fake_llm.stop()
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "store": args.store,
+            "shards": args.shards if args.store == "sharded" else None,
+            "entries": args.entries,
+            "users": args.users,
+            "active_users": len(user_ids),
+            "days": args.days,
+            "seed": args.seed,
+            "load_seconds": round(load_s, 3),
+            "load_entries_per_s": round(args.entries / load_s, 1) if load_s else None,
+            "iterations": args.iterations,
+            "llm_iterations": args.llm_iterations,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_token_delay_ms": args.llm_token_delay_ms,
+            "llm_error_rate": args.llm_error_rate
+        },
+        "results": results
+    }
+
+
+def change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(base, new, threshold):
+    """Print per-benchmark changes; returns the names that regressed past the threshold"""
+    print(f"Baseline: {base['meta'].get('entries')} entries, {base['meta'].get('store')} store, "
+          f"{base['meta'].get('created_at')}")
+    print(f"Current:  {new['meta'].get('entries')} entries, {new['meta'].get('store')} store, "
+          f"{new['meta'].get('created_at')}")
+    differing = [key for key in ("store", "shards", "entries", "users", "iterations", "llm_latency_ms", "llm_error_rate")
+                 if base["meta"].get(key) != new["meta"].get(key)]
+    if differing:
+        print(f"Warning: runs differ in {', '.join(differing)}; changes are not like for like")
+    print()
+    print(f"{'benchmark':34} {'p50':>9} {'p99':>9} {'ops/s':>9} {'memory':>9}")
+
+    def fmt(value):
+        return "-" if value is None else f"{value:+.1f}%"
+
+    regressions = []
+    for name, result in new["results"].items():
+        old = base["results"].get(name)
+        if old is None:
+            print(f"{name:34} {'(new)':>9}")
+            continue
+        p50 = change(old["p50_ms"], result["p50_ms"])
+        p99 = change(old["p99_ms"], result["p99_ms"])
+        throughput = change(old["throughput_per_s"], result["throughput_per_s"])
+        memory = change(old.get("peak_memory_kb"), result.get("peak_memory_kb"))
+        regressed = (p50 or 0) > threshold or (throughput or 0) < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:34} {fmt(p50):>9} {fmt(p99):>9} {fmt(throughput):>9} {fmt(memory):>9}"
+              f"{'  REGRESSION' if regressed else ''}")
+    for name in base["results"]:
+        if name not in new["results"]:
+            print(f"{name:34} {'(missing)':>9}")
+
+    print(f"\n{len(regressions)} regression(s) beyond {threshold:g}%")
+    return regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MindMate synthetic-load benchmarks")
+    parser.add_argument("--entries", type=int, default=10000, help="Synthetic history size (1k to 1M+)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90, help="Days the history spans, ending now")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--store", choices=("memory", "sqlite", "sharded"), default="memory")
+    parser.add_argument("--shards", type=int, default=4, help="Shard count for --store sharded")
+    parser.add_argument("--iterations", type=int, default=1000, help="Calls per store/walker/helper benchmark")
+    parser.add_argument("--llm-iterations", type=int, default=20, help="Calls per LLM benchmark")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="Fake server delay before the first byte")
+    parser.add_argument("--llm-token-delay-ms", type=float, default=2, help="Fake server delay between streamed deltas")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of fake LLM requests that fail")
+    parser.add_argument("--only", nargs="*", default=[], help=f"Groups ({', '.join(GROUPS)}) or benchmark names")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Results JSON to compare this run against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two results files and exit")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when anything regressed")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(load_results(args.compare[0]), load_results(args.compare[1]), args.threshold)
+        sys.exit(1 if regressions and args.fail_on_regression else 0)
+
+    with tempfile.TemporaryDirectory(prefix="mindmate-bench-") as tmpdir:
+        args.tmpdir = tmpdir
+        results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        print()
+        regressions = compare(load_results(args.baseline), results, args.threshold)
+        sys.exit(1 if regressions and args.fail_on_regression else 0)
+
+
+if __name__ == "__main__":
+    main()
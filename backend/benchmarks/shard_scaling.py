@@ -0,0 +1,83 @@
+"""
+MindMate Shard Scaling Benchmark
+Aggregate throughput of P worker processes sharing one mood database, each
+doing what log_mood followed by get_daily_summary does (one write, one read)
+for its share of a synthetic history: a single SQLite file against N shards.
+Entry ids are checked for uniqueness across processes afterwards.
+
+Usage:
+    python benchmarks/shard_scaling.py --processes 1 2 4 8 --shards 8 --entries 20000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from synthetic import iter_entries
+
+from mood_db import ShardedMoodStore, SQLiteMoodStore
+
+
+def open_store(path, shards):
+    if shards > 1:
+        return ShardedMoodStore(path, shards, flush_interval_ms=5)
+    return SQLiteMoodStore(path, flush_interval_ms=5)
+
+
+def worker(path, shards, entries, start):
+    store = open_store(path, shards)
+    start.wait()
+    for entry in entries:
+        store.add_entry(entry)
+        store.latest(entry["user_id"], 5)
+    store.close()
+
+
+def run(directory, processes, shards, count, users, seed):
+    path = os.path.join(directory, f"p{processes}-s{shards}" + ("" if shards > 1 else ".db"))
+    open_store(path, shards).close()  # schema (and shard manifest) created once, up front
+    entries = list(iter_entries(count, users, seed=seed))
+    start = multiprocessing.Barrier(processes + 1)
+    workers = [
+        multiprocessing.Process(target=worker, args=(path, shards, entries[i::processes], start))
+        for i in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    start.wait()
+    began = time.perf_counter()
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - began
+
+    store = open_store(path, shards)
+    ids = [entry.entry_id for entry in store.all_entries()]
+    store.close()
+    if len(ids) != count or len(set(ids)) != count:
+        raise SystemExit(f"{processes} processes, {shards} shards: {len(ids)} entries, {len(set(ids))} distinct ids")
+    return count / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process throughput: one SQLite file vs N shards")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs; {args.entries} write+read pairs per run")
+    print(f"{'processes':>9} {'single ops/s':>14} {'sharded ops/s':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory(prefix="mindmate-shards-") as directory:
+        base = None
+        for processes in args.processes:
+            single = run(directory, processes, 1, args.entries, args.users, args.seed)
+            sharded = run(directory, processes, args.shards, args.entries, args.users, args.seed)
+            base = base or sharded
+            print(f"{processes:>9} {single:>14,.0f} {sharded:>14,.0f} {sharded / base:>7.2f}x")
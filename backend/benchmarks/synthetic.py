@@ -0,0 +1,118 @@
+"""
+MindMate Synthetic Mood Histories
+Realistic mood histories at any scale (1k to 1M+ entries) for the benchmarks,
+modelled on seed_data: moods and typical intensities from SEED_EMOTIONS,
+journal sentences recombined from SEED_JOURNAL_ENTRIES. Entries are yielded
+lazily in timestamp order so a million of them never sit in memory at once.
+"""
+
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexicon import NEGATIVE_MOODS, POSITIVE_MOODS
+from seed_data import SEED_EMOTIONS, SEED_JOURNAL_ENTRIES
+
+# Share of entries that come with a journal, and sentences per journal
+JOURNAL_RATE = 0.6
+JOURNAL_SENTENCES = (1, 3)
+# Chance the next mood keeps the previous one's polarity (moods run in streaks)
+MOOD_PERSISTENCE = 0.7
+
+
+def _sentences(text):
+    return [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", text) if sentence.strip()]
+
+
+def journal_pools():
+    """{mood: [sentence, ...]} from the seed journals, plus "" for every sentence"""
+    pools = {"": []}
+    for entry in SEED_JOURNAL_ENTRIES:
+        sentences = _sentences(entry["text"])
+        pools[""].extend(sentences)
+        for mood in (entry["mood_before"], entry["mood_after"]):
+            pools.setdefault(mood, []).extend(sentences)
+    return pools
+
+
+def polarity(mood_name):
+    if mood_name in POSITIVE_MOODS:
+        return "positive"
+    if mood_name in NEGATIVE_MOODS:
+        return "negative"
+    return "neutral"
+
+
+def user_weights(users, skew=0.8):
+    """Cumulative Zipf-like weights: a few heavy loggers, a long tail of light ones"""
+    weights = []
+    total = 0.0
+    for rank in range(1, users + 1):
+        total += 1 / rank ** skew
+        weights.append(total)
+    return weights
+
+
+def iter_entries(count, users=1000, days=90, seed=7, journal_rate=JOURNAL_RATE, now=None):
+    """Yield `count` entry dicts (user_id, mood_name, intensity, journal_text,
+    timestamp) spread over the last `days` days, oldest first"""
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    start = now - timedelta(days=days)
+    span = (now - start).total_seconds()
+    step = span / max(count, 1)
+
+    emotions = [emotion["name"] for emotion in SEED_EMOTIONS]
+    typical = {emotion["name"]: emotion["intensity"] for emotion in SEED_EMOTIONS}
+    by_polarity = {}
+    for name in emotions:
+        by_polarity.setdefault(polarity(name), []).append(name)
+    pools = journal_pools()
+    weights = user_weights(users)
+    user_ids = [f"user-{u}" for u in range(users)]
+    last_mood = {}
+
+    for i in range(count):
+        user_id = rng.choices(user_ids, cum_weights=weights)[0]
+        previous = last_mood.get(user_id)
+        if previous and rng.random() < MOOD_PERSISTENCE:
+            mood = rng.choice(by_polarity[polarity(previous)])
+        else:
+            mood = rng.choice(emotions)
+        last_mood[user_id] = mood
+
+        intensity = min(10.0, max(1.0, round(rng.gauss(typical[mood], 1.5) * 2) / 2))
+        journal_text = ""
+        if rng.random() < journal_rate:
+            pool = pools.get(mood) or pools[""]
+            journal_text = " ".join(rng.choice(pool) for _ in range(rng.randint(*JOURNAL_SENTENCES)))
+
+        # Evenly spaced with jitter inside each slot, so timestamps stay ordered
+        offset = (i + rng.random()) * step
+        yield {
+            "user_id": user_id,
+            "mood_name": mood,
+            "intensity": intensity,
+            "journal_text": journal_text,
+            "timestamp": (start + timedelta(seconds=offset)).isoformat()
+        }
+
+
+def populate(store, count, users=1000, days=90, seed=7, now=None):
+    """Load a synthetic history into a mood store; returns the user ids that got entries"""
+    seen = {}
+    for entry in iter_entries(count, users, days, seed, now=now):
+        store.add_entry(entry)
+        seen[entry["user_id"]] = True
+    if hasattr(store, "flush"):
+        store.flush()
+    return list(seen)
+
+
+def journal_samples(count, seed=7):
+    """Journal texts only (for the analysis benchmarks)"""
+    return [entry["journal_text"] for entry in iter_entries(count, users=1, seed=seed, journal_rate=1.0)]
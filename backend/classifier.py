@@ -0,0 +1,276 @@
+"""
+MindMate Emotion Classifier
+First tier of journal analysis: a small in-process linear model over hashed
+word and word-pair features. It predicts the primary emotion (with a
+confidence) and the intensity in microseconds, with no network call; only
+journals it is unsure about are escalated to the LLM (see TieredAnalyzer in
+mind_functions.py).
+
+The model is trained offline from labelled entries and saved as JSON:
+
+    python classifier.py train                               # stored entries (DATABASE_URL)
+    python classifier.py train --jsonl labelled.jsonl        # {"text", "emotion", "intensity"} lines
+    python classifier.py evaluate --jsonl labelled.jsonl     # accuracy and escalation rate
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import zlib
+
+import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def hashed_features(text, dims):
+    """Sparse feature vector of a text: {bucket: weight} over its words and
+    adjacent word pairs, hashed into `dims` buckets and L2-normalized"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    features = {}
+    for i, word in enumerate(words):
+        for term in (word, f"{words[i - 1]} {word}" if i else None):
+            if term:
+                bucket = zlib.crc32(term.encode("utf-8")) % dims
+                features[bucket] = features.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+    return {bucket: value / norm for bucket, value in features.items()}
+
+
+class EmotionClassifier:
+    """Multinomial logistic regression (emotion) plus a linear intensity head.
+
+    Weights are stored sparsely per feature bucket, so the model holds only
+    the buckets seen in training and a prediction costs one lookup per feature.
+    """
+
+    def __init__(self, labels, dims=2 ** 18):
+        self.labels = list(labels)
+        self.dims = dims
+        self.weights = {}  # bucket -> [weight per label]
+        self.bias = [0.0] * len(self.labels)
+        self.intensity_weights = {}  # bucket -> weight
+        self.intensity_bias = 5.0
+        self.info = {}
+
+    def predict(self, text):
+        """(emotion, confidence, intensity) for a journal"""
+        features = hashed_features(text, self.dims)
+        probabilities = self._probabilities(features)
+        best = max(range(len(self.labels)), key=probabilities.__getitem__)
+        intensity = self.intensity_bias + sum(
+            self.intensity_weights.get(bucket, 0.0) * value for bucket, value in features.items()
+        )
+        return self.labels[best], probabilities[best], min(10.0, max(1.0, round(intensity * 2) / 2))
+
+    def fit(self, examples, epochs=5, learning_rate=0.5, l2=1e-6, seed=7):
+        """SGD over (text, emotion, intensity) examples; intensity may be None"""
+        index = {label: i for i, label in enumerate(self.labels)}
+        rows = [(hashed_features(text, self.dims), index[emotion], intensity)
+                for text, emotion, intensity in examples if emotion in index]
+        intensities = [intensity for _, _, intensity in rows if intensity is not None]
+        if intensities:
+            self.intensity_bias = sum(intensities) / len(intensities)
+
+        rng = random.Random(seed)
+        step = 0
+        for _ in range(epochs):
+            rng.shuffle(rows)
+            for features, target, intensity in rows:
+                rate = learning_rate / (1 + step / max(len(rows), 1))
+                step += 1
+                probabilities = self._probabilities(features)
+                probabilities[target] -= 1.0  # gradient of the log loss w.r.t. the scores
+                for k, gradient in enumerate(probabilities):
+                    self.bias[k] -= rate * gradient
+                for bucket, value in features.items():
+                    weights = self.weights.get(bucket)
+                    if weights is None:
+                        weights = self.weights[bucket] = [0.0] * len(self.labels)
+                    for k, gradient in enumerate(probabilities):
+                        weights[k] -= rate * (gradient * value + l2 * weights[k])
+
+                if intensity is not None:
+                    error = self.intensity_bias - intensity + sum(
+                        self.intensity_weights.get(bucket, 0.0) * value for bucket, value in features.items()
+                    )
+                    for bucket, value in features.items():
+                        self.intensity_weights[bucket] = self.intensity_weights.get(bucket, 0.0) - rate * 0.1 * error * value
+        return self
+
+    def _probabilities(self, features):
+        scores = list(self.bias)
+        for bucket, value in features.items():
+            weights = self.weights.get(bucket)
+            if weights is not None:
+                for k, weight in enumerate(weights):
+                    scores[k] += weight * value
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def to_dict(self):
+        return {
+            "version": 1,
+            "labels": self.labels,
+            "dims": self.dims,
+            "bias": [round(b, 5) for b in self.bias],
+            "weights": {str(bucket): [round(w, 5) for w in weights] for bucket, weights in self.weights.items()},
+            "intensity_bias": round(self.intensity_bias, 5),
+            "intensity_weights": {str(bucket): round(w, 5) for bucket, w in self.intensity_weights.items()},
+            "info": self.info
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        model = cls(data["labels"], data["dims"])
+        model.bias = list(data["bias"])
+        model.weights = {int(bucket): weights for bucket, weights in data["weights"].items()}
+        model.intensity_bias = data["intensity_bias"]
+        model.intensity_weights = {int(bucket): w for bucket, w in data["intensity_weights"].items()}
+        model.info = data.get("info", {})
+        return model
+
+    def save(self, path):
+        """Write the model atomically (a running app never sees a partial file)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def load_classifier(path):
+    """The saved model at path, or None when there is none (every journal then goes to the LLM)"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return EmotionClassifier.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠ Emotion classifier not loaded from {path}: {e}")
+        return None
+
+
+def evaluate(model, examples, threshold):
+    """Accuracy overall and on the journals the model would keep (confidence >= threshold)"""
+    total = correct = kept = kept_correct = 0
+    for text, emotion, _ in examples:
+        predicted, confidence, _ = model.predict(text)
+        total += 1
+        correct += predicted == emotion
+        if confidence >= threshold:
+            kept += 1
+            kept_correct += predicted == emotion
+    return {
+        "examples": total,
+        "accuracy": round(correct / total, 4) if total else 0.0,
+        "threshold": threshold,
+        "escalation_rate": round(1 - kept / total, 4) if total else 0.0,
+        "kept_accuracy": round(kept_correct / kept, 4) if kept else 0.0
+    }
+
+
+# ============================================================================
+# Training data
+# ============================================================================
+
+def jsonl_examples(path):
+    """(text, emotion, intensity) from {"text", "emotion", "intensity"} lines"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                intensity = row.get("intensity")
+                yield row["text"], str(row["emotion"]).lower(), float(intensity) if intensity is not None else None
+
+
+def stored_examples(database_url, label_source="mood"):
+    """(text, emotion, intensity) from stored entries with a journal.
+
+    label_source "mood" uses the emotion the user logged; "analysis" uses the
+    first emotion of a stored LLM analysis (distilling the LLM into the model).
+    """
+    from mood_db import SQLiteMoodStore, sqlite_path
+
+    path = sqlite_path(database_url)
+    if path is None:
+        raise SystemExit(f"Training from stored entries needs a sqlite:/// DATABASE_URL, not {database_url}")
+    store = SQLiteMoodStore(path)
+    try:
+        for entry in store.all_entries():
+            if not entry.journal_text:
+                continue
+            if label_source == "analysis":
+                analysis = entry.get("analysis") or {}
+                if analysis.get("source") != "llm" or not analysis.get("emotions"):
+                    continue
+                yield entry.journal_text, str(analysis["emotions"][0]).lower(), analysis.get("intensity")
+            else:
+                yield entry.journal_text, entry.mood_name.lower(), entry.intensity
+    finally:
+        store.close()
+
+
+def load_examples(args):
+    if args.jsonl:
+        return list(jsonl_examples(args.jsonl))
+    return list(stored_examples(args.database, args.label_source))
+
+
+def split(examples, holdout, seed):
+    rng = random.Random(seed)
+    examples = list(examples)
+    rng.shuffle(examples)
+    cut = int(len(examples) * holdout)
+    return examples[cut:], examples[:cut]
+
+
+def train_command(args):
+    train, test = split(load_examples(args), args.holdout, args.seed)
+    counts = {}
+    for _, emotion, _ in train:
+        counts[emotion] = counts.get(emotion, 0) + 1
+    labels = sorted(label for label, count in counts.items() if count >= args.min_examples)
+    if len(labels) < 2:
+        raise SystemExit("Need at least two emotions with --min-examples labelled journals each")
+
+    model = EmotionClassifier(labels, args.dims).fit(train, args.epochs, args.learning_rate, seed=args.seed)
+    model.info = {"examples": len(train), "label_counts": {label: counts[label] for label in labels}}
+    if test:
+        model.info["holdout"] = evaluate(model, test, args.threshold)
+        print(json.dumps(model.info["holdout"], indent=2))
+    model.save(args.output)
+    print(f"✓ Saved emotion classifier ({len(labels)} emotions, {len(model.weights)} features) to {args.output}")
+
+
+def evaluate_command(args):
+    model = load_classifier(args.model)
+    if model is None:
+        raise SystemExit(f"No emotion classifier at {args.model}")
+    print(json.dumps(evaluate(model, load_examples(args), args.threshold), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or evaluate the local emotion classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("train", "evaluate"):
+        command = commands.add_parser(name)
+        command.add_argument("--jsonl", help="Labelled journals, one JSON object per line")
+        command.add_argument("--database", default=config.DATABASE_URL, help="Stored entries to train on")
+        command.add_argument("--label-source", choices=("mood", "analysis"), default="mood")
+        command.add_argument("--threshold", type=float, default=config.CLASSIFIER_CONFIDENCE_THRESHOLD)
+    train = commands.choices["train"]
+    train.add_argument("--output", default=config.CLASSIFIER_MODEL_PATH)
+    train.add_argument("--dims", type=int, default=2 ** 18, help="Hashed feature buckets")
+    train.add_argument("--epochs", type=int, default=5)
+    train.add_argument("--learning-rate", type=float, default=0.5)
+    train.add_argument("--holdout", type=float, default=0.1, help="Share of examples kept for evaluation")
+    train.add_argument("--min-examples", type=int, default=5, help="Fewer labelled journals drops the emotion")
+    train.add_argument("--seed", type=int, default=7)
+    commands.choices["evaluate"].add_argument("--model", default=config.CLASSIFIER_MODEL_PATH)
+    args = parser.parse_args()
+    (train_command if args.command == "train" else evaluate_command)(args)
@@ -8,6 +8,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def backend_path(path):
+    """Relative paths are taken from the backend directory, not the working directory"""
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
 # ============================================================================
 # LLM CONFIGURATION
 # ============================================================================
@@ -15,10 +23,13 @@ load_dotenv()
 # LLM Provider options: "openai", "ollama", "anthropic"
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 
-# OpenAI Configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-OPENAI_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+# OpenAI Configuration (any OpenAI-compatible chat-completions endpoint;
+# the older LLM_API_KEY / LLM_ENDPOINT / LLM_MODEL names are still honoured)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", os.getenv("LLM_API_KEY", ""))
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", os.getenv("LLM_MODEL", "gpt-3.5-turbo"))
+OPENAI_ENDPOINT = os.getenv(
+    "OPENAI_ENDPOINT", os.getenv("LLM_ENDPOINT", "https://api.openai.com/v1/chat/completions")
+)
 
 # Ollama Configuration (for local LLM)
 OLLAMA_ENDPOINT = os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
@@ -27,14 +38,133 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
 # Anthropic Configuration
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
+ANTHROPIC_ENDPOINT = os.getenv("ANTHROPIC_ENDPOINT", "https://api.anthropic.com/v1/messages")
+ANTHROPIC_VERSION = os.getenv("ANTHROPIC_VERSION", "2023-06-01")
+
+# Per-task provider routing (see llm_providers.py): "task=provider,fallback;..."
+# e.g. "analysis=ollama,openai;batch_analysis=ollama,openai;default=openai,anthropic".
+# Tasks without a route use "default", which falls back to LLM_PROVIDER.
+LLM_ROUTES = os.getenv("LLM_ROUTES", "")
+
+# Provider health: after this many consecutive failures a provider is skipped
+# for the cooldown (then tried again); latency percentiles use the last N calls
+LLM_PROVIDER_FAILURE_THRESHOLD = int(os.getenv("LLM_PROVIDER_FAILURE_THRESHOLD", "3"))
+LLM_PROVIDER_COOLDOWN = float(os.getenv("LLM_PROVIDER_COOLDOWN", "30"))  # seconds
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "100"))
+
+# Hedged requests: when the first provider of a route is still running past its
+# p95 latency, the same request is also sent to the next one and the first
+# answer wins. Needs LLM_HEDGE_MIN_SAMPLES latencies before it kicks in.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "False").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Admission control (see admission.py): requests that miss the cache are
+# charged prompt + max_tokens against a global and a per-user token bucket
+# (tokens per minute, 0 = unlimited). Interactive tasks are admitted first and
+# keep LLM_ADMISSION_INTERACTIVE_RESERVE of the global bucket to themselves;
+# a request not admitted within its wait falls back to the canned responses.
+# Only user-facing generation is interactive by default; journal analysis from
+# the background queue and backfill is always admitted as background work.
+LLM_ADMISSION_ENABLED = os.getenv("LLM_ADMISSION_ENABLED", "True").lower() == "true"
+LLM_GLOBAL_TOKENS_PER_MINUTE = int(os.getenv("LLM_GLOBAL_TOKENS_PER_MINUTE", "90000"))
+LLM_USER_TOKENS_PER_MINUTE = int(os.getenv("LLM_USER_TOKENS_PER_MINUTE", "8000"))
+LLM_INTERACTIVE_TASKS = os.getenv("LLM_INTERACTIVE_TASKS", "support_message,breathing_exercise,affirmation")
+LLM_ADMISSION_INTERACTIVE_RESERVE = float(os.getenv("LLM_ADMISSION_INTERACTIVE_RESERVE", "0.25"))
+LLM_ADMISSION_INTERACTIVE_WAIT = float(os.getenv("LLM_ADMISSION_INTERACTIVE_WAIT", "2"))  # seconds
+LLM_ADMISSION_BACKGROUND_WAIT = float(os.getenv("LLM_ADMISSION_BACKGROUND_WAIT", "60"))  # seconds
+LLM_ADMISSION_MAX_USERS = 10000  # Per-user buckets kept (least recently used dropped)
+
+# Shared HTTP client settings (see llm_client.py)
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))  # seconds
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))  # seconds
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds, doubled per retry
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))  # seconds
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))  # keep-alive connections per host
+LLM_RECENT_CALLS = 200  # Per-call records kept for latency/token accounting
+
+# LLM response cache (see llm_cache.py)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+LLM_CACHE_PATH = backend_path(os.getenv("LLM_CACHE_PATH", "llm_cache.db"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
+
+# Support bundle fan-out (message + breathing + affirmation in parallel)
+SUPPORT_BUNDLE_WORKERS = int(os.getenv("SUPPORT_BUNDLE_WORKERS", "12"))
+SUPPORT_BUNDLE_TIMEOUT = float(os.getenv("SUPPORT_BUNDLE_TIMEOUT", "20"))  # seconds
+
+# Background journal analysis (see analysis_queue.py): log_mood queues the
+# journal and returns; workers analyze up to BATCH_ANALYSIS_MAX_ENTRIES queued
+# journals per LLM request. A full queue rejects new work (backfill_journal_analysis
+# picks those entries up later); failed analyses are retried with backoff and
+# finally fall back to keyword matching.
+ANALYSIS_QUEUE_ENABLED = os.getenv("ANALYSIS_QUEUE_ENABLED", "True").lower() == "true"
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "1000"))
+ANALYSIS_ENQUEUE_TIMEOUT = float(os.getenv("ANALYSIS_ENQUEUE_TIMEOUT", "0"))  # seconds to wait for room
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", "3"))
+ANALYSIS_RETRY_DELAY = float(os.getenv("ANALYSIS_RETRY_DELAY", "2"))  # seconds, doubled per retry
+ANALYSIS_STATUS_ENTRIES = 10000  # Recent per-entry job states kept for polling
+
+# Tiered journal analysis: the local classifier (classifier.py, trained with
+# `python classifier.py train`) scores every journal first; only journals it
+# scores below the confidence threshold are sent to the LLM. Without a saved
+# model, background analysis sends every journal to the LLM and
+# emotion_from_text answers from the keyword rules.
+CLASSIFIER_ENABLED = os.getenv("CLASSIFIER_ENABLED", "True").lower() == "true"
+CLASSIFIER_MODEL_PATH = backend_path(os.getenv("CLASSIFIER_MODEL_PATH", "emotion_classifier.json"))
+CLASSIFIER_CONFIDENCE_THRESHOLD = float(os.getenv("CLASSIFIER_CONFIDENCE_THRESHOLD", "0.6"))
+
+# ============================================================================
+# METRICS & PROFILING (see metrics.py)
+# ============================================================================
+
+# Walker/LLM histograms and counters; /metrics is served on METRICS_PORT
+# (0 = only via the get_metrics walker)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_HOST = os.getenv("METRICS_HOST", "localhost")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_TOP_USERS = int(os.getenv("METRICS_TOP_USERS", "10"))  # Users exported with their own entry-count series
+
+# USD per 1K prompt:completion tokens by provider, for the cost counter
+LLM_TOKEN_PRICES = os.getenv(
+    "LLM_TOKEN_PRICES", "openai=0.0005:0.0015;anthropic=0.003:0.015;ollama=0:0"
+)
+
+# Sampling profiler: snapshots every thread's stack each interval; collapsed
+# stacks are served at /debug/profile on the metrics port
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False").lower() == "true"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+PROFILER_MAX_STACKS = 5000  # Distinct stacks kept; later new stacks are dropped
 
 # ============================================================================
 # DATABASE CONFIGURATION
 # ============================================================================
 
+# Relative sqlite paths are resolved from the backend directory
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///mindmate.db")
 DATABASE_ECHO = os.getenv("DATABASE_ECHO", "False").lower() == "true"
 
+# Mood entries are group-committed: buffered writes are flushed once this many
+# are pending, after this many milliseconds, or before any read
+MOOD_DB_BATCH_SIZE = int(os.getenv("MOOD_DB_BATCH_SIZE", "100"))
+MOOD_DB_FLUSH_INTERVAL_MS = int(os.getenv("MOOD_DB_FLUSH_INTERVAL_MS", "50"))
+
+# Users are spread over MOOD_DB_SHARDS SQLite files by consistent hashing of
+# user_id (the DATABASE_URL path is then a directory of shards), so several
+# jac serve processes can share the data. Change the count with
+# `python mood_db.py rebalance --shards N` while the app is stopped.
+MOOD_DB_SHARDS = int(os.getenv("MOOD_DB_SHARDS", "1"))
+MOOD_DB_SHARD_VNODES = 64  # Ring points per shard
+MOOD_DB_ID_BLOCK = int(os.getenv("MOOD_DB_ID_BLOCK", "1000"))  # Entry ids a process reserves at a time
+
+# Bulk NDJSON import/export (ndjson_io.py): the walkers only read and write
+# files under BULK_IO_DIR; imports commit this many entries per transaction
+BULK_IO_DIR = os.getenv("BULK_IO_DIR", "exports")
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "10000"))
+
 # ============================================================================
 # JASECI SERVER CONFIGURATION
 # ============================================================================
@@ -43,6 +173,10 @@ JASECI_HOST = os.getenv("JASECI_HOST", "localhost")
 JASECI_PORT = int(os.getenv("JASECI_PORT", "5000"))
 JASECI_DEBUG = os.getenv("JASECI_DEBUG", "False").lower() == "true"
 
+# Server-sent events endpoint for streamed support messages (support_stream.py)
+STREAM_HOST = os.getenv("STREAM_HOST", "localhost")
+STREAM_PORT = int(os.getenv("STREAM_PORT", "8001"))
+
 # ============================================================================
 # FRONTEND CONFIGURATION
 # ============================================================================
@@ -68,7 +202,17 @@ MAX_JOURNAL_LENGTH = 5000  # Maximum characters for analysis
 
 # Weekly summary configuration
 DAYS_IN_WEEK = 7
-SUMMARY_GENERATION_TIME = "08:00"  # Generate at 8 AM daily
+SUMMARY_GENERATION_TIME = os.getenv("SUMMARY_GENERATION_TIME", "08:00")  # Generate at 8 AM daily
+
+# Weekly reflections and habit suggestions are precomputed by scheduler.py
+# at SUMMARY_GENERATION_TIME for users with new entries; walkers read the result
+SUMMARY_SCHEDULER_ENABLED = os.getenv("SUMMARY_SCHEDULER_ENABLED", "True").lower() == "true"
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+
+# Trigger patterns (trigger_index.py): per-user trigger and emotion x trigger
+# counts, kept for the most recently queried users
+TRIGGER_INDEX_MAX_USERS = int(os.getenv("TRIGGER_INDEX_MAX_USERS", "10000"))
+TRIGGER_MIN_OCCURRENCES = 2  # Times a trigger must appear to count as repeating
 
 # Recommendation system
 MAX_RECOMMENDATIONS = 5
@@ -92,6 +236,13 @@ MAX_TOKENS_AFFIRMATION = 300
 MAX_TOKENS_WEEKLY_REFLECTION = 1000
 MAX_TOKENS_HABIT_SUGGESTIONS = 1200
 
+# Batch journal analysis: entries per request are limited by count and by the
+# estimated size of their text; each entry keeps MAX_TOKENS_ANALYSIS of output
+# budget, up to the per-request ceiling below
+BATCH_ANALYSIS_MAX_ENTRIES = 10
+BATCH_ANALYSIS_PROMPT_TOKENS = 2500
+BATCH_ANALYSIS_MAX_OUTPUT_TOKENS = 3500
+
 # ============================================================================
 # NOTIFICATION SETTINGS
 # ============================================================================
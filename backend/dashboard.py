@@ -0,0 +1,181 @@
+"""
+MindMate Dashboard
+Report builders shared by the summary walkers and the composite get_dashboard
+walker, which computes every dashboard section from a single read of the
+user's entries.
+"""
+
+from lexicon import detect_triggers
+from recommendations import activity_recommendations
+from mood_store import MoodStats, to_micros, window_start, window_start_day
+
+DASHBOARD_SECTIONS = ["daily", "weekly", "trends", "common_emotions", "recommendations"]
+
+# Entries considered by the daily check-in
+RECENT_ENTRIES = 5
+
+# Extra triggers inferred from the current emotion once there are at least
+# three recent entries: (minimum recent entries with that emotion, trigger)
+EMOTION_TRIGGER_RULES = {
+    "stressed": [(2, "work or daily pressures"), (1, "time management")],
+    "anxious": [(2, "uncertainty or future worries"), (1, "stress or pressure")],
+    "sad": [(1, "low energy or motivation"), (2, "persistent low mood")],
+    "lonely": [(1, "lack of social connection"), (2, "isolation patterns")],
+    "overwhelmed": [(1, "too many responsibilities"), (2, "difficulty prioritizing")],
+    "angry": [(0, "frustration or conflict")],
+}
+
+def daily_summary(recent, total_entries):
+    """get_daily_summary report from the user's most recent entries (oldest first)"""
+    if not recent:
+        return {
+            "status": "no_data",
+            "message": "No mood entries found for this user",
+            "current_mood": "Not Yet Logged",
+            "total_entries": 0,
+            "triggers": []
+        }
+
+    recent = recent[-RECENT_ENTRIES:]
+    latest = recent[-1]
+    # Trigger categories mentioned in the recent journal entries
+    triggers = detect_triggers(*[entry.get("journal_text", "") for entry in recent])
+
+    # Infer triggers from the current emotion; positive emotions add none
+    if len(recent) >= 3:
+        current_emotion = latest["mood_name"].lower()
+        same_count = sum(1 for entry in recent if entry["mood_name"].lower() == current_emotion)
+        for minimum, trigger in EMOTION_TRIGGER_RULES.get(current_emotion, []):
+            if same_count >= minimum and trigger not in triggers:
+                triggers.append(trigger)
+
+    return {
+        "status": "success",
+        "current_mood": latest["mood_name"],
+        "intensity": latest["intensity"],
+        "journal_text": latest.get("journal_text", ""),
+        "timestamp": latest["timestamp"],
+        "total_entries": total_entries,
+        "triggers": triggers
+    }
+
+
+def emotional_trends(stats):
+    """calculate_emotional_trends report from a window's MoodStats"""
+    if stats.count < 3:
+        return {
+            "trend": "stable",
+            "stability_score": 0.8,
+            "volatility": "low",
+            "explanation": "Need more data to determine trends"
+        }
+
+    positive_count = stats.positive
+    negative_count = stats.negative
+    total = positive_count + negative_count
+    trend = "stable"
+    if total > 0:
+        positive_ratio = positive_count / total
+        if positive_ratio >= 0.6:
+            trend = "improving"
+        elif positive_ratio <= 0.4:
+            trend = "declining"
+
+    # Lower intensity spread = more stable; std_dev tops out around 3-4 on a 1-10 scale
+    std_dev = stats.variance ** 0.5
+    stability_score = max(0.0, min(1.0, 1.0 - (std_dev / 4.0)))
+    if std_dev < 1.5:
+        volatility = "low"
+    elif std_dev < 2.5:
+        volatility = "medium"
+    else:
+        volatility = "high"
+
+    return {
+        "trend": trend,
+        "stability_score": stability_score,
+        "volatility": volatility,
+        "positive_count": positive_count,
+        "negative_count": negative_count,
+        "explanation": f"Based on {stats.count} entries: {positive_count} positive, {negative_count} negative"
+    }
+
+
+def common_emotions(stats, lookback_days):
+    """find_common_emotions report from a window's MoodStats"""
+    if stats.count == 0:
+        return {"common_emotions": [], "period_days": lookback_days}
+    return {
+        "common_emotions": [[emotion, count] for emotion, count in stats.emotion_counts.items()],
+        "period_days": lookback_days,
+        "total_entries": stats.count
+    }
+
+
+def build_dashboard(store, user_id, sections=None, num_days=7, trend_days=14,
+                    common_days=7, mood_fields=None, now=None):
+    """Every requested dashboard section from one read of the user's entries.
+
+    Reads the widest window any section needs, then folds each entry into the
+    weekly, trend and common-emotion aggregates in a single pass. The weekly
+    section lists entries only when `mood_fields` names the keys to include.
+    """
+    sections = list(sections or DASHBOARD_SECTIONS)
+    unknown = [section for section in sections if section not in DASHBOARD_SECTIONS]
+    if unknown:
+        return {"status": "error", "message": f"Unknown sections: {', '.join(unknown)}"}
+
+    windows = {}
+    if "weekly" in sections:
+        windows["weekly"] = num_days
+    if "trends" in sections:
+        windows["trends"] = trend_days
+    if "common_emotions" in sections:
+        windows["common_emotions"] = common_days
+    needs_recent = "daily" in sections or "recommendations" in sections
+
+    # One read: the widest window (or everything, if any window is unbounded)
+    entries = []
+    if windows:
+        widest = 0 if min(windows.values()) <= 0 else max(windows.values())
+        entries = store.window(user_id, widest, now)
+    recent = entries[-RECENT_ENTRIES:]
+    if needs_recent and len(recent) < RECENT_ENTRIES:
+        recent = store.latest(user_id, RECENT_ENTRIES)
+
+    starts = {name: window_start(days, now) for name, days in windows.items()}
+    stats = {name: MoodStats() for name in windows}
+    weekly_moods = []
+    for entry in entries:
+        ts = to_micros(entry.timestamp) / 1_000_000
+        for name, start in starts.items():
+            if start is None or ts >= start:
+                stats[name].add(entry.mood_name, entry.intensity, ts)
+        if mood_fields and "weekly" in starts and (starts["weekly"] is None or ts >= starts["weekly"]):
+            weekly_moods.append(entry.to_dict(mood_fields))
+
+    result = {"status": "success", "user_id": user_id}
+    if needs_recent:
+        daily = daily_summary(recent, store.count(user_id))
+        if "daily" in sections:
+            result["daily"] = daily
+        if "recommendations" in sections:
+            result["recommendations"] = (
+                activity_recommendations(daily["current_mood"], daily["intensity"])
+                if daily["status"] == "success" else None
+            )
+    if "weekly" in sections:
+        weekly = stats["weekly"]
+        result["weekly"] = {
+            "status": "success" if weekly.count else "no_data",
+            "total_entries": weekly.count,
+            "weekly_moods": weekly_moods,
+            "emotion_distribution": weekly.emotion_counts,
+            "dominant_emotions": weekly.emotion_counts,
+            "window_start": window_start_day(num_days, now)
+        }
+    if "trends" in sections:
+        result["trends"] = emotional_trends(stats["trends"])
+    if "common_emotions" in sections:
+        result["common_emotions"] = common_emotions(stats["common_emotions"], common_days)
+    return result
@@ -0,0 +1,297 @@
+"""
+MindMate Fake LLM Server
+Offline LLM server for local testing. Speaks the OpenAI chat-completions
+(/v1/chat/completions), Ollama (/api/chat) and Anthropic Messages (/v1/messages)
+formats, streaming included, with configurable latency and error rate, and
+optionally a provider-style rate limit (429 once the prompt + max_tokens of
+the last minute exceed --tokens-per-minute). --reply answers every prompt
+with fixed text, e.g. to serve malformed analyses.
+
+Usage:
+    python fake_llm_server.py --port 8099 --latency-ms 300 --token-delay-ms 25
+    OPENAI_ENDPOINT=http://localhost:8099/v1/chat/completions jac serve walkers.jac
+
+    # Route analysis to a "local Ollama" and everything else to OpenAI, with
+    # Anthropic as the fallback (run a second server on 8100 to fail over to)
+    OLLAMA_ENDPOINT=http://localhost:8099 \
+    ANTHROPIC_ENDPOINT=http://localhost:8100/v1/messages \
+    LLM_ROUTES="analysis=ollama,openai;default=openai,anthropic" jac serve walkers.jac
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUPPORT_REPLY = (
+    "I hear you, and what you're feeling makes sense. Try a few slow breaths, "
+    "take a short walk, and write down what is on your mind. You are doing "
+    "better than you think. If these feelings stay heavy, reach out to someone you trust."
+)
+
+HABITS_REPLY = (
+    "- Take a 10-minute walk after lunch each day\n"
+    "- Write down three things that went well every evening\n"
+    "- Keep a consistent bedtime, even on weekends\n"
+    "- Message a friend or family member twice a week"
+)
+
+ANALYSIS_REPLY = {
+    "emotions": ["stressed"],
+    "intensity": 6,
+    "triggers": ["work"],
+    "sentiment": "negative",
+    "themes": ["pressure"],
+    "suggested_strategies": ["deep breathing", "short walk"]
+}
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def fake_reply(prompt):
+    """Plausible completion for one of the MindMate prompts"""
+    if "JSON array" in prompt:
+        ids = re.findall(r"^\[(\d+)\] ", prompt, re.M)
+        return json.dumps([dict(ANALYSIS_REPLY, id=int(i)) for i in ids])
+    if "JSON" in prompt:
+        return json.dumps(ANALYSIS_REPLY)
+    if "one per line" in prompt:
+        return HABITS_REPLY
+    return SUPPORT_REPLY
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Answers chat requests like an OpenAI, Ollama or Anthropic provider (by path)"""
+
+    # Keep-alive and chunked streaming, as real providers do
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the body
+    # waits on the client's delayed ACK and every reply gains ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        server.record_request()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(server.latency_ms / 1000)
+
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(server.error_status, {"error": {"message": "Injected failure"}})
+            return
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        retry_after = server.charge(estimate_tokens(prompt) + int(body.get("max_tokens") or 0))
+        if retry_after:
+            self._send_json(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": f"{retry_after:.1f}"})
+            return
+
+        content = fake_reply(prompt) if server.reply is None else server.reply
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        path = self.path.split("?")[0]
+        if path == "/api/chat":
+            self._ollama(content, prompt_tokens, completion_tokens, body)
+        elif path == "/v1/messages":
+            self._anthropic(content, prompt_tokens, completion_tokens, body)
+        elif path == "/v1/chat/completions":
+            self._openai(content, prompt_tokens, completion_tokens, body)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    def _openai(self, content, prompt_tokens, completion_tokens, body):
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        if body.get("stream"):
+            self._start_chunked("text/event-stream")
+            for piece in self._pieces(content):
+                self._event({"choices": [{"index": 0, "delta": {"content": piece}}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._event({"choices": [], "usage": usage})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        else:
+            self._send_json(200, {
+                "id": "fake-completion",
+                "object": "chat.completion",
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+    def _ollama(self, content, prompt_tokens, completion_tokens, body):
+        final = {
+            "model": body.get("model", "fake"),
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens
+        }
+        # Ollama streams unless told otherwise
+        if body.get("stream", True):
+            self._start_chunked("application/x-ndjson")
+            for piece in self._pieces(content):
+                self._write_chunk(json.dumps({
+                    "model": body.get("model", "fake"),
+                    "message": {"role": "assistant", "content": piece},
+                    "done": False
+                }).encode("utf-8") + b"\n")
+            self._write_chunk(json.dumps(dict(final, message={"role": "assistant", "content": ""})).encode("utf-8") + b"\n")
+            self._write_chunk(b"")
+        else:
+            self._send_json(200, dict(final, message={"role": "assistant", "content": content}))
+
+    def _anthropic(self, content, prompt_tokens, completion_tokens, body):
+        if body.get("stream"):
+            self._start_chunked("text/event-stream")
+            self._event({
+                "type": "message_start",
+                "message": {"id": "fake-message", "role": "assistant", "content": [],
+                            "usage": {"input_tokens": prompt_tokens, "output_tokens": 0}}
+            }, "message_start")
+            self._event({"type": "content_block_start", "index": 0,
+                         "content_block": {"type": "text", "text": ""}}, "content_block_start")
+            for piece in self._pieces(content):
+                self._event({"type": "content_block_delta", "index": 0,
+                             "delta": {"type": "text_delta", "text": piece}}, "content_block_delta")
+            self._event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            self._event({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                         "usage": {"output_tokens": completion_tokens}}, "message_delta")
+            self._event({"type": "message_stop"}, "message_stop")
+            self._write_chunk(b"")
+        else:
+            self._send_json(200, {
+                "id": "fake-message",
+                "type": "message",
+                "role": "assistant",
+                "model": body.get("model", "fake"),
+                "content": [{"type": "text", "text": content}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": prompt_tokens, "output_tokens": completion_tokens}
+            })
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _pieces(self, content):
+        """Word-sized deltas, whitespace kept so the pieces join back exactly"""
+        for piece in re.findall(r"\S+\s*", content):
+            yield piece
+            time.sleep(self.server.token_delay_ms / 1000)
+
+    def _event(self, payload, name=None):
+        prefix = f"event: {name}\n" if name else ""
+        self._write_chunk(f"{prefix}data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """In-process fake provider; start() returns the chat-completions URL"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, token_delay_ms=0,
+                 error_rate=0.0, error_status=500, tokens_per_minute=0, reply=None):
+        super().__init__((host, port), FakeLLMHandler)
+        self.latency_ms = latency_ms
+        self.token_delay_ms = token_delay_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.tokens_per_minute = tokens_per_minute  # 0 = no rate limit
+        self.reply = reply  # fixed completion for every prompt (None = fake_reply)
+        self.request_count = 0
+        self.rate_limited = 0
+        self._count_lock = threading.Lock()
+        self._tokens = float(tokens_per_minute)
+        self._refilled = time.monotonic()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self):
+        return f"{self.base_url}/v1/chat/completions"
+
+    @property
+    def ollama_url(self):
+        return self.base_url
+
+    @property
+    def anthropic_url(self):
+        return f"{self.base_url}/v1/messages"
+
+    def record_request(self):
+        with self._count_lock:
+            self.request_count += 1
+
+    def charge(self, tokens):
+        """Take tokens from the per-minute budget; seconds to wait (0 = allowed)"""
+        if not self.tokens_per_minute:
+            return 0
+        with self._count_lock:
+            now = time.monotonic()
+            rate = self.tokens_per_minute / 60
+            self._tokens = min(self.tokens_per_minute, self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            if tokens <= self._tokens:
+                self._tokens -= tokens
+                return 0
+            self.rate_limited += 1
+            return (tokens - self._tokens) / rate
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline fake OpenAI/Ollama/Anthropic server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=200, help="Delay before the first byte")
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="Delay between streamed deltas")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--tokens-per-minute", type=int, default=0, help="Rate limit (429) on prompt + max_tokens")
+    parser.add_argument("--reply", help="Answer every prompt with this text")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, args.latency_ms, args.token_delay_ms,
+                           args.error_rate, args.error_status, args.tokens_per_minute, args.reply)
+    print(f"✓ Fake LLM server listening on {server.base_url} "
+          "(/v1/chat/completions, /api/chat, /v1/messages)")
+    server.serve_forever()
@@ -0,0 +1,171 @@
+"""
+MindMate Lexicon Engine
+Shared emotion and trigger keyword lists, matched in a single pass with an
+Aho-Corasick automaton that respects word boundaries.
+
+Terms ending in "*" match any word starting with them ("stress*" matches
+"stressed" and "stressful"); all other terms must match whole words, so
+"down" no longer matches "download" and "work" no longer matches "homework".
+"""
+
+from collections import deque
+
+# Emotion keywords, in priority order: when several emotions are found the
+# reported intensity is that of the last one listed here
+EMOTION_KEYWORDS = {
+    "happy": ["happy", "happiness", "joy", "joyful", "great"],
+    "sad": ["sad", "sadness", "down", "depressed"],
+    "stressed": ["stress*", "anxious", "worried"],
+    "angry": ["angry", "frustrat*"],
+    "calm": ["calm*", "peaceful", "relaxed"],
+}
+
+EMOTION_INTENSITIES = {
+    "happy": 7.5,
+    "sad": 3.5,
+    "stressed": 4.0,
+    "angry": 3.0,
+    "calm": 8.0,
+}
+
+# Trigger categories detected in journal text
+TRIGGER_KEYWORDS = {
+    "work stress": ["work", "working", "worked", "workload", "job*", "boss", "deadline*"],
+    "relationship issues": ["friend*", "family", "relationship*", "argument*", "partner"],
+    "lack of sleep": ["sleep*", "tired", "exhausted"],
+    "financial stress": ["money", "financial", "bills"],
+    "health concerns": ["sick", "pain", "painful", "health"],
+}
+
+# Mood polarity used for trend scoring (mind_functions.analyze_trends, analytics)
+POSITIVE_MOODS = {"happy", "calm", "content", "peaceful", "excited", "grateful", "confident", "joyful", "relaxed", "energized"}
+NEGATIVE_MOODS = {"sad", "anxious", "stressed", "overwhelmed", "angry", "frustrated", "lonely", "worried", "depressed", "fearful"}
+
+# The narrower polarity calculate_emotional_trends has always counted with
+# (positive_count/negative_count); kept separate so its reports don't change
+TREND_POSITIVE_MOODS = {"happy", "calm", "content", "peaceful", "excited", "grateful", "confident"}
+TREND_NEGATIVE_MOODS = {"sad", "anxious", "stressed", "overwhelmed", "angry", "frustrated", "lonely"}
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class Lexicon:
+    """Maps keywords to labels and finds all of them in one scan of the text"""
+
+    def __init__(self, groups):
+        # groups: label -> list of terms; label order is preserved in results
+        self.labels = list(groups)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(term_length, label, is_prefix)]
+        for label, terms in groups.items():
+            for term in terms:
+                self._add_term(term.lower(), label)
+        self._build_failure_links()
+
+    def _add_term(self, term, label):
+        is_prefix = term.endswith("*")
+        word = term.rstrip("*")
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(word), label, is_prefix))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the same position via the suffix
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def matches(self, text):
+        """Yield (start, end, label) for every whole-word keyword hit in text.
+
+        `text` must already be lower-cased; for prefix terms `end` is the end
+        of the whole matched word.
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        length = len(text)
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for size, label, is_prefix in output[state]:
+                start = end - size
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < length and _is_word_char(text[end]):
+                    if not is_prefix:
+                        continue
+                    word_end = end
+                    while word_end < length and _is_word_char(text[word_end]):
+                        word_end += 1
+                    yield start, word_end, label
+                else:
+                    yield start, end, label
+
+    def counts(self, text):
+        """Label -> number of keyword hits"""
+        found = {}
+        for _, _, label in self.matches(text.lower()):
+            found[label] = found.get(label, 0) + 1
+        return found
+
+    def find_labels(self, *texts):
+        """Labels present in any of the texts, in lexicon order"""
+        found = set()
+        for text in texts:
+            if text:
+                found.update(label for _, _, label in self.matches(text.lower()))
+        return [label for label in self.labels if label in found]
+
+
+# Built once at import and shared by every walker
+emotion_lexicon = Lexicon(EMOTION_KEYWORDS)
+trigger_lexicon = Lexicon(TRIGGER_KEYWORDS)
+keyword_lexicon = Lexicon({**EMOTION_KEYWORDS, **TRIGGER_KEYWORDS})
+
+
+def detect_emotions(text):
+    """Emotions named in the text and the intensity of the strongest-priority one"""
+    emotions = emotion_lexicon.find_labels(text)
+    return {
+        "emotions": emotions,
+        "intensity": EMOTION_INTENSITIES[emotions[-1]] if emotions else None
+    }
+
+
+def detect_triggers(*texts):
+    """Trigger categories mentioned across one or more journal texts"""
+    return trigger_lexicon.find_labels(*texts)
+
+
+def find_keywords(text, limit=10):
+    """Distinct lexicon keywords in order of first appearance"""
+    text = text.lower()
+    keywords = []
+    for start, end, _ in keyword_lexicon.matches(text):
+        word = text[start:end]
+        if word not in keywords:
+            keywords.append(word)
+            if len(keywords) == limit:
+                break
+    return keywords
@@ -0,0 +1,204 @@
+"""
+MindMate LLM Response Cache
+Two-tier (in-memory LRU + on-disk SQLite) cache for LLM completions
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Purge expired/overflowing disk rows once every this many writes
+DISK_PRUNE_INTERVAL = 100
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so cosmetically different prompts share a key"""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def make_cache_key(prompt, model, temperature, max_tokens):
+    """Stable key for a completion request"""
+    raw = json.dumps([normalize_prompt(prompt), model, temperature, max_tokens])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU memory tier in front of a SQLite tier, with TTL and in-flight coalescing"""
+
+    def __init__(self, path, ttl_seconds, max_memory_entries, max_disk_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}  # key -> Future shared by concurrent callers
+        self._writes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+        self._db.commit()
+
+    def get(self, key):
+        """Cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                value, stored_at = item
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                row = None
+            elif row is not None:
+                self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._db.commit()
+
+        with self._lock:
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._remember(key, row[0], row[1])
+        return row[0]
+
+    def set(self, key, value):
+        """Store value in both tiers"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._writes += 1
+            prune = self._writes % DISK_PRUNE_INTERVAL == 0
+
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if prune:
+                self._prune_disk(now)
+            self._db.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        with self._db_lock:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def get_or_compute(self, key, compute, validate=None):
+        """Return the cached value or compute it once, sharing the result with concurrent callers.
+
+        With validate(value) -> bool, only values that pass are cached, and a
+        cached value that fails (stored before the check existed) is dropped
+        and computed again. A caller that waited on a concurrent computation
+        whose value fails its check makes its own call instead.
+        """
+        value = self.get(key)
+        if value is not None:
+            if validate is None or validate(value):
+                return value
+            self.delete(key)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            value = future.result()
+            if validate is None or validate(value):
+                return value
+            # The leader's value was rejected (and not cached): ask again
+            value = compute()
+            if validate(value):
+                self.set(key, value)
+            return value
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            if validate is None or validate(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        """Hit/miss/eviction counters and tier sizes"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+        with self._db_lock:
+            stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+
+    def _remember(self, key, value, stored_at):
+        # Caller holds self._lock
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _prune_disk(self, now):
+        # Caller holds self._db_lock
+        removed = self._db.execute(
+            "DELETE FROM llm_cache WHERE stored_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_disk_entries
+        if overflow > 0:
+            removed += self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)", (overflow,)
+            ).rowcount
+        with self._lock:
+            self.counters["disk_evictions"] += removed
@@ -0,0 +1,315 @@
+"""
+MindMate LLM Client
+Shared pooled HTTP client used by every LLM call in mind_functions
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from llm_cache import make_cache_key
+from metrics import record_llm_call
+
+# Status codes worth retrying (rate limits and transient provider failures)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a chat completion could not be obtained"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMCallStats:
+    """Running latency and token totals for one task type"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, latency_ms, retries, prompt_tokens, completion_tokens, ok):
+        self.calls += 1
+        self.retries += retries
+        self.total_latency_ms += latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        if not ok:
+            self.errors += 1
+
+    def merge(self, other):
+        """Add another task's totals into this one"""
+        self.calls += other.calls
+        self.errors += other.errors
+        self.retries += other.retries
+        self.total_latency_ms += other.total_latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, other.max_latency_ms)
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_latency_ms": self.total_latency_ms / self.calls if self.calls else 0.0,
+            "max_latency_ms": self.max_latency_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+class LLMClient:
+    """Chat-completions client with a keep-alive session, timeouts and bounded retries.
+
+    Speaks the OpenAI wire format; llm_providers subclasses override the
+    _headers/_payload/_parse/_stream_events hooks for other providers.
+    """
+
+    provider = "openai"  # metrics label and LLM_TOKEN_PRICES key
+
+    def __init__(self, endpoint, api_key, model, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff_base=None, backoff_max=None, pool_size=None, cache=None):
+        self.endpoint = endpoint
+        self.model = model
+        self.cache = cache
+        self.connect_timeout = config.LLM_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+        self.read_timeout = config.LLM_READ_TIMEOUT if read_timeout is None else read_timeout
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = config.LLM_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = config.LLM_BACKOFF_MAX if backoff_max is None else backoff_max
+        pool_size = config.LLM_POOL_SIZE if pool_size is None else pool_size
+
+        # One session per client so TCP/TLS connections are reused across calls.
+        # Retries are handled below, so the adapter itself never retries.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self._headers(api_key))
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._recent = deque(maxlen=config.LLM_RECENT_CALLS)
+
+    def complete(self, prompt, temperature, max_tokens, task="default", use_cache=True, validate=None,
+                 deadline=None):
+        """Send a single-turn chat completion and return the message content
+        (cached only if validate(content) passes, when given). `deadline`
+        (time.monotonic()) caps the HTTP timeouts and retries of the call."""
+        payload = self._payload(prompt, temperature, max_tokens)
+        if self.cache is None or not use_cache:
+            return self._request(payload, task, deadline)
+        key = make_cache_key(prompt, self.model, temperature, max_tokens)
+        return self.cache.get_or_compute(key, lambda: self._request(payload, task, deadline), validate)
+
+    def stream(self, prompt, temperature, max_tokens, task="default", use_cache=True):
+        """Yield the completion as text deltas while the provider generates it.
+
+        Retries only happen before the first byte arrives; a cached completion
+        is yielded as a single delta.
+        """
+        key = None
+        if self.cache is not None and use_cache:
+            key = make_cache_key(prompt, self.model, temperature, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        payload = self._payload(prompt, temperature, max_tokens, stream=True)
+        started = time.perf_counter()
+        response, attempt = self._post(payload, task, started, stream=True)
+        parts = []
+        usage = {}
+        first_token_ms = None
+        try:
+            for delta, chunk_usage in self._stream_events(response):
+                if chunk_usage:
+                    usage = dict(usage, **chunk_usage)
+                if delta:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    parts.append(delta)
+                    yield delta
+        except (requests.RequestException, ValueError) as e:
+            self._record(task, started, attempt, usage, ok=False, first_token_ms=first_token_ms)
+            raise LLMError(f"Stream interrupted: {e}")
+        except LLMError:
+            # Error event from the provider mid-stream
+            self._record(task, started, attempt, usage, ok=False, first_token_ms=first_token_ms)
+            raise
+        finally:
+            response.close()
+
+        self._record(task, started, attempt, usage, ok=True, first_token_ms=first_token_ms)
+        if key is not None:
+            self.cache.set(key, "".join(parts))
+
+    def _request(self, payload, task, deadline=None):
+        started = time.perf_counter()
+        response, attempt = self._post(payload, task, started, deadline=deadline)
+        try:
+            content, usage = self._parse(response)
+        except requests.RequestException as e:
+            # Body cut off while reading
+            self._record(task, started, attempt, {}, ok=False)
+            raise LLMError(f"Malformed response: {e}", response.status_code)
+        except LLMError:
+            # A 200 that could not be used still counts as a failed call
+            self._record(task, started, attempt, {}, ok=False)
+            raise
+        self._record(task, started, attempt, usage, ok=True)
+        return content
+
+    def _post(self, payload, task, started, stream=False, deadline=None):
+        """POST with retries; returns the first 200 response and the retry count.
+
+        With a deadline, each attempt's timeouts are cut to the time left and
+        no retry is started that could not finish before it.
+        """
+        attempt = 0
+        while True:
+            retry_after = None
+            timeout = (self.connect_timeout, self.read_timeout)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    error = LLMError("Deadline exceeded")
+                    break
+                timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+            try:
+                response = self.session.post(
+                    self.endpoint,
+                    json=payload,
+                    timeout=timeout,
+                    stream=stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = LLMError(str(e))
+            else:
+                if response.status_code == 200:
+                    return response, attempt
+                response.close()
+                error = LLMError(f"API Error: {response.status_code}", response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt >= self.max_retries:
+                break
+            delay = self._backoff_delay(attempt, retry_after)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+            attempt += 1
+
+        self._record(task, started, attempt, {}, ok=False)
+        raise error
+
+    def stats(self):
+        """Per-task call, latency and token totals (cache hits never reach here)"""
+        with self._lock:
+            return {task: s.as_dict() for task, s in self._stats.items()}
+
+    def task_stats(self):
+        """Copies of the raw per-task LLMCallStats, for merging across clients"""
+        with self._lock:
+            copies = {}
+            for task, s in self._stats.items():
+                copies[task] = LLMCallStats()
+                copies[task].merge(s)
+            return copies
+
+    def recent_calls(self):
+        """Most recent individual call records, oldest first"""
+        with self._lock:
+            return list(self._recent)
+
+    def close(self):
+        self.session.close()
+
+    def _headers(self, api_key):
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt, temperature, max_tokens, stream=False):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _parse(self, response):
+        """(content, usage) from a non-streaming response; usage uses OpenAI key names"""
+        try:
+            data = response.json()
+            content = data['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Malformed response: {e}", response.status_code)
+        return content, data.get("usage") or {}
+
+    def _stream_events(self, response):
+        """Yield (text delta or None, usage dict or None) from a streaming response"""
+        # chunk_size=None hands over each transfer chunk as soon as it arrives
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            for choice in chunk.get("choices") or []:
+                yield (choice.get("delta") or {}).get("content"), None
+            if chunk.get("usage"):
+                yield None, chunk["usage"]
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _record(self, task, started, retries, usage, ok, first_token_ms=None):
+        latency_ms = (time.perf_counter() - started) * 1000
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        with self._lock:
+            stats = self._stats.get(task)
+            if stats is None:
+                stats = self._stats[task] = LLMCallStats()
+            stats.record(latency_ms, retries, prompt_tokens, completion_tokens, ok)
+            self._recent.append({
+                "task": task,
+                "latency_ms": latency_ms,
+                "attempts": retries + 1,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "first_token_ms": first_token_ms,
+                "ok": ok
+            })
+        record_llm_call(self.provider, task, latency_ms, retries, prompt_tokens, completion_tokens, ok)
@@ -0,0 +1,457 @@
+"""
+MindMate LLM Providers
+OpenAI, Ollama and Anthropic clients behind one router. Each task (analysis,
+support_message, ...) is routed to an ordered list of providers; the router
+tracks every provider's health and latency, fails over to the next provider
+when one errors or is cooling down, and can hedge a slow request by also
+sending it to the next provider once the first is past its p95 latency.
+Requests that miss the cache pass admission control first (admission.py).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import config
+from admission import build_admission, estimate_request_tokens
+from llm_cache import make_cache_key
+from llm_client import LLMCallStats, LLMClient, LLMError
+from metrics import record_llm_request
+
+DEFAULT_ROUTE = "default"
+
+
+class OllamaClient(LLMClient):
+    """Client for Ollama's /api/chat endpoint (newline-delimited JSON streaming)"""
+
+    provider = "ollama"
+
+    def __init__(self, base_url, model, **kwargs):
+        super().__init__(base_url.rstrip("/") + "/api/chat", "", model, **kwargs)
+
+    def _headers(self, api_key):
+        return {"Content-Type": "application/json"}
+
+    def _payload(self, prompt, temperature, max_tokens, stream=False):
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+            "options": {"temperature": temperature, "num_predict": max_tokens}
+        }
+
+    def _parse(self, response):
+        try:
+            data = response.json()
+            content = data["message"]["content"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise LLMError(f"Malformed response: {e}", response.status_code)
+        return content, self._usage(data)
+
+    def _stream_events(self, response):
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise LLMError(chunk["error"])
+            yield (chunk.get("message") or {}).get("content"), None
+            if chunk.get("done"):
+                yield None, self._usage(chunk)
+                break
+
+    def _usage(self, data):
+        return {
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "completion_tokens": data.get("eval_count", 0)
+        }
+
+
+class AnthropicClient(LLMClient):
+    """Client for Anthropic's Messages API (server-sent events streaming)"""
+
+    provider = "anthropic"
+
+    def _headers(self, api_key):
+        return {
+            "x-api-key": api_key,
+            "anthropic-version": config.ANTHROPIC_VERSION,
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt, temperature, max_tokens, stream=False):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _parse(self, response):
+        try:
+            data = response.json()
+            content = "".join(block["text"] for block in data["content"] if block.get("type") == "text")
+        except (ValueError, KeyError, TypeError) as e:
+            raise LLMError(f"Malformed response: {e}", response.status_code)
+        return content, self._usage(data.get("usage") or {})
+
+    def _stream_events(self, response):
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:].strip())
+            kind = event.get("type")
+            if kind == "content_block_delta":
+                yield (event.get("delta") or {}).get("text"), None
+            elif kind == "message_start":
+                yield None, self._usage((event.get("message") or {}).get("usage") or {})
+            elif kind == "message_delta":
+                yield None, self._usage(event.get("usage") or {})
+            elif kind == "error":
+                raise LLMError((event.get("error") or {}).get("message", "Stream error"))
+            elif kind == "message_stop":
+                break
+
+    def _usage(self, usage):
+        # Only report the counts this event carries, so stream updates merge
+        renamed = {}
+        if "input_tokens" in usage:
+            renamed["prompt_tokens"] = usage["input_tokens"]
+        if "output_tokens" in usage:
+            renamed["completion_tokens"] = usage["output_tokens"]
+        return renamed
+
+
+def build_client(provider, **kwargs):
+    """Client for a provider name from config ("openai", "ollama" or "anthropic")"""
+    if provider == "openai":
+        return LLMClient(config.OPENAI_ENDPOINT, config.OPENAI_API_KEY, config.OPENAI_MODEL, **kwargs)
+    if provider == "ollama":
+        return OllamaClient(config.OLLAMA_ENDPOINT, config.OLLAMA_MODEL, **kwargs)
+    if provider == "anthropic":
+        return AnthropicClient(config.ANTHROPIC_ENDPOINT, config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL, **kwargs)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def parse_routes(spec, default_provider):
+    """{task: [provider, ...]} from "task=a,b;task2=c"; always has a default route"""
+    routes = {}
+    for part in spec.split(";"):
+        if "=" not in part:
+            continue
+        task, providers = part.split("=", 1)
+        names = [name.strip().lower() for name in providers.split(",") if name.strip()]
+        if task.strip() and names:
+            routes[task.strip()] = names
+    routes.setdefault(DEFAULT_ROUTE, [default_provider.lower()])
+    return routes
+
+
+class ProviderHealth:
+    """Recent latencies and a failure circuit for one provider"""
+
+    def __init__(self, failure_threshold, cooldown, window):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def record_success(self, latency_ms=None):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            if latency_ms is not None:
+                self.latencies.append(latency_ms)
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.consecutive_failures >= self.failure_threshold:
+                # Re-armed by every further failure, so a dead provider is only
+                # probed once per cooldown
+                self.open_until = time.monotonic() + self.cooldown
+
+    def available(self):
+        return time.monotonic() >= self.open_until
+
+    def percentile(self, pct, min_samples=1):
+        """Latency percentile in ms (nearest rank), or None with too few samples"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < max(min_samples, 1):
+            return None
+        rank = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+        return samples[rank]
+
+    def as_dict(self):
+        return {
+            "available": self.available(),
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "p50_latency_ms": self.percentile(50),
+            "p95_latency_ms": self.percentile(95),
+            "last_error": self.last_error
+        }
+
+
+class _BothFailed(Exception):
+    """Both providers of a hedged call failed"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class LLMRouter:
+    """Same complete/stream interface as LLMClient, spread over several providers"""
+
+    def __init__(self, clients, routes, cache=None, hedge=False, hedge_percentile=95,
+                 hedge_min_samples=20, failure_threshold=3, cooldown=30.0, latency_window=100,
+                 admission=None):
+        unknown = {name for names in routes.values() for name in names} - set(clients)
+        if unknown:
+            raise ValueError(f"Routes use providers without a client: {', '.join(sorted(unknown))}")
+        self.clients = clients
+        self.routes = routes
+        self.cache = cache
+        self.admission = admission
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.health = {
+            name: ProviderHealth(failure_threshold, cooldown, latency_window) for name in clients
+        }
+        self.counters = {"failovers": 0, "hedged": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        # Runs the first provider of a hedged call while the router waits on it
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.LLM_POOL_SIZE, thread_name_prefix="llm-hedge"
+        ) if hedge else None
+
+    def route(self, task):
+        """Providers for a task, healthy ones first (cooling-down ones as a last resort)"""
+        names = self.routes.get(task) or self.routes[DEFAULT_ROUTE]
+        healthy = [name for name in names if self.health[name].available()]
+        return healthy + [name for name in names if name not in healthy]
+
+    def complete(self, prompt, temperature, max_tokens, task="default", use_cache=True, user_id="",
+                 validate=None, priority=None, deadline=None):
+        """Send a single-turn completion to the task's providers and return the content.
+
+        user_id is charged against its own token bucket when admission control is
+        on; priority overrides the task's admission class. When validate is
+        given, content that fails validate(content) counts as that provider's
+        failure and the next provider is tried. Provider calls stop at
+        `deadline` (time.monotonic()), failovers included.
+        """
+        started = time.perf_counter()
+        ok = False
+        try:
+            args = (prompt, temperature, max_tokens, task, user_id, priority, deadline, validate)
+            if self.cache is None or not use_cache:
+                content = self._complete(*args)
+            else:
+                key = self._cache_key(prompt, temperature, max_tokens, task)
+                content = self.cache.get_or_compute(key, lambda: self._complete(*args), validate)
+            ok = True
+            return content
+        finally:
+            record_llm_request(task, started, ok)
+
+    def stream(self, prompt, temperature, max_tokens, task="default", use_cache=True, user_id=""):
+        """Yield text deltas; fails over only while nothing has been yielded yet"""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield from self._stream(prompt, temperature, max_tokens, task, use_cache, user_id)
+            ok = True
+        finally:
+            # A consumer that stops early counts as an error, like a broken stream
+            record_llm_request(task, started, ok)
+
+    def stats(self):
+        """Per-task call, latency and token totals across all providers"""
+        merged = {}
+        for client in self.clients.values():
+            for task, stats in client.task_stats().items():
+                merged.setdefault(task, LLMCallStats()).merge(stats)
+        return {task: stats.as_dict() for task, stats in merged.items()}
+
+    def provider_stats(self):
+        """Per-provider health, latency percentiles and per-task totals"""
+        return {
+            name: dict(self.health[name].as_dict(), model=client.model, tasks=client.stats())
+            for name, client in self.clients.items()
+        }
+
+    def router_stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(counters, routes=self.routes, hedge_enabled=self.hedge)
+
+    def admission_stats(self):
+        """Admitted/rejected requests and bucket levels per priority class"""
+        return self.admission.stats() if self.admission is not None else {"enabled": False}
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _cache_key(self, prompt, temperature, max_tokens, task):
+        # Keyed on the route's configured primary model, whichever provider
+        # answers and however health has reordered the route
+        model = self.clients[(self.routes.get(task) or self.routes[DEFAULT_ROUTE])[0]].model
+        return make_cache_key(prompt, model, temperature, max_tokens)
+
+    def _stream(self, prompt, temperature, max_tokens, task, use_cache, user_id):
+        names = self.route(task)
+        key = None
+        if self.cache is not None and use_cache:
+            key = self._cache_key(prompt, temperature, max_tokens, task)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        self._admit(task, prompt, max_tokens, user_id)
+
+        error = None
+        for index, name in enumerate(names):
+            if index:
+                self._count("failovers")
+            parts = []
+            try:
+                for delta in self.clients[name].stream(prompt, temperature, max_tokens, task, use_cache=False):
+                    parts.append(delta)
+                    yield delta
+            except LLMError as e:
+                self.health[name].record_failure(e)
+                if parts:
+                    raise
+                error = e
+                continue
+            # Stream durations depend on output length, so they are not latency samples
+            self.health[name].record_success()
+            if key is not None:
+                self.cache.set(key, "".join(parts))
+            return
+        raise error
+
+    def _complete(self, prompt, temperature, max_tokens, task, user_id="", priority=None, deadline=None,
+                  validate=None):
+        self._admit(task, prompt, max_tokens, user_id, priority)
+        names = self.route(task)
+        error = None
+        index = 0
+        while index < len(names):
+            if index:
+                self._count("failovers")
+            primary = names[index]
+            backup = names[index + 1] if index + 1 < len(names) else None
+            delay_ms = self._hedge_delay(primary) if backup else None
+            try:
+                if delay_ms is None:
+                    return self._call(primary, prompt, temperature, max_tokens, task, deadline, validate)
+                return self._hedged(
+                    primary, backup, delay_ms, prompt, temperature, max_tokens, task, deadline, validate
+                )
+            except _BothFailed as e:
+                error = e.error
+                index += 2
+            except LLMError as e:
+                error = e
+                index += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        raise error
+
+    def _admit(self, task, prompt, max_tokens, user_id, priority=None):
+        # Cache hits never get here: only provider calls are charged
+        if self.admission is not None:
+            self.admission.admit(task, estimate_request_tokens(prompt, max_tokens), user_id, priority)
+
+    def _call(self, name, prompt, temperature, max_tokens, task, deadline=None, validate=None):
+        started = time.perf_counter()
+        try:
+            content = self.clients[name].complete(
+                prompt, temperature, max_tokens, task, use_cache=False, deadline=deadline
+            )
+            if validate is not None and not validate(content):
+                # Answered, but not in the shape the task needs: fail over like an error
+                raise LLMError(f"Invalid response from {name}")
+        except LLMError as e:
+            # Running out of the caller's time is not the provider's failure
+            if deadline is None or time.monotonic() < deadline:
+                self.health[name].record_failure(e)
+            raise
+        self.health[name].record_success((time.perf_counter() - started) * 1000)
+        return content
+
+    def _hedge_delay(self, name):
+        if not self.hedge:
+            return None
+        return self.health[name].percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def _hedged(self, primary, backup, delay_ms, prompt, temperature, max_tokens, task, deadline=None,
+                validate=None):
+        args = (prompt, temperature, max_tokens, task, deadline, validate)
+        first = self._executor.submit(self._call, primary, *args)
+        done, _ = wait([first], timeout=delay_ms / 1000)
+        if done:
+            # Answered (or failed) inside its usual latency: no hedge needed
+            return first.result()
+
+        self._count("hedged")
+        second = self._executor.submit(self._call, backup, *args)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    content = future.result()
+                except LLMError as e:
+                    error = e
+                    continue
+                if future is second:
+                    self._count("hedge_wins")
+                # The slower request keeps running and still feeds its provider's health
+                return content
+        raise _BothFailed(error)
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+
+def build_router(cache=None):
+    """Router over every provider named in config.LLM_ROUTES (or LLM_PROVIDER)"""
+    routes = parse_routes(config.LLM_ROUTES, config.LLM_PROVIDER)
+    names = dict.fromkeys(name for providers in routes.values() for name in providers)
+    return LLMRouter(
+        {name: build_client(name) for name in names},
+        routes,
+        cache=cache,
+        hedge=config.LLM_HEDGE_ENABLED,
+        hedge_percentile=config.LLM_HEDGE_PERCENTILE,
+        hedge_min_samples=config.LLM_HEDGE_MIN_SAMPLES,
+        failure_threshold=config.LLM_PROVIDER_FAILURE_THRESHOLD,
+        cooldown=config.LLM_PROVIDER_COOLDOWN,
+        latency_window=config.LLM_LATENCY_WINDOW,
+        admission=build_admission()
+    )
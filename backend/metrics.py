@@ -0,0 +1,500 @@
+"""
+MindMate Metrics
+Lightweight in-process instrumentation: walker ability and LLM call latency
+histograms, token/cost counters by task, mood storage sizes, rendered in the
+Prometheus text format. An exporter thread serves /metrics (and the sampling
+profiler's /debug/profile) on METRICS_PORT; the get_metrics walker returns the
+same text. Recording a sample is a bisect and a few additions under a lock.
+"""
+
+import bisect
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as Tally
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from weakref import WeakKeyDictionary
+
+import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; walkers are mostly sub-millisecond, LLM calls take seconds
+WALKER_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+USER_ENTRY_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic total per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+
+    def snapshot(self):
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in self.values.items()}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=WALKER_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: ([*counts], total, count) for key, (counts, total, count) in self.series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {count}"
+
+    def snapshot(self):
+        """{labels: {count, avg_ms, p50_ms, p99_ms}}; percentiles are bucket upper bounds"""
+        with self._lock:
+            series = {key: ([*counts], total, count) for key, (counts, total, count) in self.series.items()}
+        result = {}
+        for key, (counts, total, count) in series.items():
+            result[",".join(key) or "total"] = {
+                "count": count,
+                "avg_ms": total / count * 1000 if count else 0.0,
+                "p50_ms": self._quantile(counts, count, 0.5),
+                "p99_ms": self._quantile(counts, count, 0.99)
+            }
+        return result
+
+    def _quantile(self, counts, count, q):
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return None if bound == float("inf") else bound * 1000
+        return None
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that produce extra samples at scrape time"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []  # () -> [(name, kind, help, [sample line, ...]), ...]
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=WALKER_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collect):
+        with self._lock:
+            self.collectors.append(collect)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collect in collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {_escape(e)}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """JSON-friendly view of the registered metrics (collectors excluded)"""
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def _register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+
+registry = MetricsRegistry()
+
+walker_seconds = registry.histogram(
+    "mindmate_walker_duration_seconds", "Walker ability time from entry to exit", ("walker",)
+)
+llm_request_seconds = registry.histogram(
+    "mindmate_llm_request_duration_seconds",
+    "LLM helper calls as seen by mind_functions (cache, failover and retries included)",
+    ("task", "outcome"), LLM_BUCKETS
+)
+llm_call_seconds = registry.histogram(
+    "mindmate_llm_call_duration_seconds", "Requests to one provider, retries included",
+    ("provider", "task"), LLM_BUCKETS
+)
+llm_calls = registry.counter(
+    "mindmate_llm_calls_total", "Provider requests by outcome", ("provider", "task", "outcome")
+)
+llm_retries = registry.counter("mindmate_llm_retries_total", "Provider request retries", ("provider", "task"))
+llm_tokens = registry.counter(
+    "mindmate_llm_tokens_total", "Prompt and completion tokens", ("provider", "task", "kind")
+)
+llm_cost = registry.counter(
+    "mindmate_llm_cost_usd_total", "Estimated spend from LLM_TOKEN_PRICES", ("provider", "task")
+)
+
+
+def parse_prices(spec):
+    """{provider: (prompt, completion) USD per 1K tokens} from "openai=0.0005:0.0015;..." """
+    prices = {}
+    for part in spec.split(";"):
+        if "=" not in part:
+            continue
+        provider, rates = part.split("=", 1)
+        try:
+            prompt, completion = (float(rate) for rate in rates.split(":", 1))
+        except ValueError:
+            continue
+        prices[provider.strip().lower()] = (prompt, completion)
+    return prices
+
+
+TOKEN_PRICES = parse_prices(config.LLM_TOKEN_PRICES)
+
+
+# ============================================================================
+# Recording
+# ============================================================================
+
+_walker_started = WeakKeyDictionary()
+
+
+def walker_started(walker):
+    """Entry hook of the instrumented walker archetype"""
+    if config.METRICS_ENABLED:
+        _walker_started[walker] = time.perf_counter()
+        if not _exporter_started:
+            start_exporter()
+
+
+def walker_finished(walker):
+    """Exit hook: records the walker's ability time under its archetype name"""
+    started = _walker_started.pop(walker, None)
+    if started is not None:
+        walker_seconds.observe(time.perf_counter() - started, type(walker).__name__)
+
+
+def record_llm_request(task, started, ok):
+    if config.METRICS_ENABLED:
+        llm_request_seconds.observe(time.perf_counter() - started, task, "ok" if ok else "error")
+
+
+def record_llm_call(provider, task, latency_ms, retries, prompt_tokens, completion_tokens, ok):
+    """One provider request (see LLMClient._record)"""
+    if not config.METRICS_ENABLED:
+        return
+    llm_call_seconds.observe(latency_ms / 1000, provider, task)
+    llm_calls.inc(provider, task, "ok" if ok else "error")
+    if retries:
+        llm_retries.inc(provider, task, amount=retries)
+    if prompt_tokens:
+        llm_tokens.inc(provider, task, "prompt", amount=prompt_tokens)
+    if completion_tokens:
+        llm_tokens.inc(provider, task, "completion", amount=completion_tokens)
+    prompt_price, completion_price = TOKEN_PRICES.get(provider, (0.0, 0.0))
+    cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+    if cost:
+        llm_cost.inc(provider, task, amount=cost)
+
+
+# ============================================================================
+# Mood storage (sampled at scrape time)
+# ============================================================================
+
+_tracked_store = None
+
+
+def track_store(store):
+    """Remember the store the walkers use so scrapes can report its size"""
+    global _tracked_store
+    _tracked_store = store
+
+
+def storage_metrics():
+    store = _tracked_store
+    if store is None:
+        return []
+    counts = store.user_counts()
+    buckets = [0] * (len(USER_ENTRY_BUCKETS) + 1)
+    for count in counts.values():
+        buckets[bisect.bisect_left(USER_ENTRY_BUCKETS, count)] += 1
+    distribution = []
+    cumulative = 0
+    for bound, bucket_count in zip(USER_ENTRY_BUCKETS + (float("inf"),), buckets):
+        cumulative += bucket_count
+        distribution.append(f'mindmate_storage_user_entries_bucket{{le="{_number(bound)}"}} {cumulative}')
+    distribution.append(f"mindmate_storage_user_entries_sum {sum(counts.values())}")
+    distribution.append(f"mindmate_storage_user_entries_count {len(counts)}")
+
+    # Per-user series only for the largest users, to bound label cardinality
+    top = sorted(counts.items(), key=lambda item: -item[1])[:config.METRICS_TOP_USERS]
+    families = [
+        ("mindmate_storage_entries", "gauge", "Mood entries stored",
+         [f"mindmate_storage_entries {store.total_entries}"]),
+        ("mindmate_storage_users", "gauge", "Users with at least one mood entry",
+         [f"mindmate_storage_users {len(counts)}"]),
+        ("mindmate_storage_user_entries", "histogram", "Mood entries per user", distribution),
+        ("mindmate_storage_top_user_entries", "gauge", "Mood entries of the METRICS_TOP_USERS largest users",
+         [f'mindmate_storage_top_user_entries{{user_id="{_escape(user_id)}"}} {count}' for user_id, count in top])
+    ]
+    if hasattr(store, "write_stats"):
+        # SQLite stores: logged entries not yet committed, and commits that failed and are being retried
+        writes = store.write_stats()
+        families += [
+            ("mindmate_storage_pending_entries", "gauge", "Mood entries waiting for a group commit",
+             [f"mindmate_storage_pending_entries {writes['pending']}"]),
+            ("mindmate_storage_flush_failures_total", "counter", "Failed mood database group commits",
+             [f"mindmate_storage_flush_failures_total {writes['flush_failures']}"])
+        ]
+    return families
+
+
+registry.add_collector(storage_metrics)
+
+
+def stats_collector(prefix, help, stats, counters=()):
+    """Collector exposing the numeric values of a stats() dict; keys in counters
+    are totals, the rest gauges"""
+
+    def collect():
+        families = []
+        for key, value in stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                families.append((f"{prefix}_{key}_total", "counter", f"{help}: {key}",
+                                 [f"{prefix}_{key}_total {_number(value)}"]))
+            else:
+                families.append((f"{prefix}_{key}", "gauge", f"{help}: {key}",
+                                 [f"{prefix}_{key} {_number(value)}"]))
+        return families
+    collect.__name__ = prefix
+    return collect
+
+
+# ============================================================================
+# Sampling profiler
+# ============================================================================
+
+class StackSampler:
+    """Samples every thread's stack at a fixed interval (no per-request cost).
+
+    Stacks are aggregated in collapsed "frame;frame;frame count" form, ready
+    for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval_ms=10, max_stacks=5000, max_depth=40):
+        self.interval = interval_ms / 1000
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.stacks = Tally()
+        self.samples = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.dropped = 0
+
+    def collapsed(self, limit=None):
+        with self._lock:
+            stacks = self.stacks.most_common(limit)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top(self, limit=20):
+        with self._lock:
+            return [{"stack": stack, "samples": count} for stack, count in self.stacks.most_common(limit)]
+
+    def _loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own:
+                        continue
+                    stack = ";".join(
+                        f"{entry.name} ({entry.filename.rsplit('/', 1)[-1]}:{entry.lineno})"
+                        for entry in traceback.extract_stack(frame, limit=self.max_depth)
+                    )
+                    if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                        self.stacks[stack] += 1
+                    else:
+                        self.dropped += 1
+                self.samples += 1
+
+
+profiler = StackSampler(config.PROFILER_INTERVAL_MS, config.PROFILER_MAX_STACKS)
+if config.PROFILER_ENABLED:
+    profiler.start()
+
+
+def profiler_metrics():
+    return [
+        ("mindmate_profiler_samples_total", "counter", "Stack sampling rounds",
+         [f"mindmate_profiler_samples_total {profiler.samples}"]),
+        ("mindmate_profiler_running", "gauge", "Whether the sampling profiler is running",
+         [f"mindmate_profiler_running {int(profiler.running)}"])
+    ]
+
+
+registry.add_collector(profiler_metrics)
+
+
+# ============================================================================
+# Exporter
+# ============================================================================
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics (Prometheus text) and /debug/profile (collapsed stacks)"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._send(registry.render(), CONTENT_TYPE)
+        elif path == "/debug/profile":
+            self._send(profiler.collapsed(), "text/plain; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def _send(self, text, content_type):
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(host=None, port=None):
+    """Serve /metrics from a daemon thread (once per process); False if disabled or the port is taken"""
+    global _exporter_started
+    port = config.METRICS_PORT if port is None else port
+    with _exporter_lock:
+        if _exporter_started:
+            return True
+        # Only one attempt per process, whatever its outcome
+        _exporter_started = True
+        if not port:
+            return False
+        try:
+            server = ThreadingHTTPServer((host or config.METRICS_HOST, port), MetricsHandler)
+        except OSError as e:
+            print(f"⚠ Metrics exporter not started on port {port}: {e}")
+            return False
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return True
+
+
+def metrics_report(format="prometheus", profile=False):
+    """get_metrics report"""
+    if format == "json":
+        result = {"status": "success", "metrics": registry.snapshot()}
+    else:
+        result = {"status": "success", "content_type": CONTENT_TYPE, "metrics": registry.render()}
+    if profile:
+        result["profile"] = {
+            "running": profiler.running,
+            "samples": profiler.samples,
+            "dropped": profiler.dropped,
+            "top_stacks": profiler.top()
+        }
+    return result
@@ -3,23 +3,82 @@ MindMate AI Functions Module
 Contains all helper functions and LLM integration
 """
 
-import requests
 import json
-import os
 import datetime
 import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
-# Configuration
-LLM_API_KEY = os.getenv("LLM_API_KEY", "sk-your-key")
-LLM_ENDPOINT = os.getenv("LLM_ENDPOINT", "https://api.openai.com/v1/chat/completions")
-LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+import config
+from admission import BACKGROUND
+from classifier import load_classifier
+from lexicon import NEGATIVE_MOODS, POSITIVE_MOODS, find_keywords
+from llm_cache import ResponseCache
+from llm_providers import build_router
+from metrics import registry, stats_collector
+from recommendations import rank_activities
+from seed_data import canned_affirmation, canned_breathing_text, canned_support_message
+from trigger_index import trigger_graph, trigger_index
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """Shared router over the configured providers, built on first use.
+
+    Every LLM call below goes through it and is sent to the providers routed
+    for its task; identical prompts (same model/temperature) are answered
+    from the response cache when LLM_CACHE_ENABLED.
+    """
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            response_cache = ResponseCache(
+                config.LLM_CACHE_PATH,
+                config.LLM_CACHE_TTL_SECONDS,
+                config.LLM_CACHE_MEMORY_ENTRIES,
+                config.LLM_CACHE_DISK_ENTRIES
+            ) if config.LLM_CACHE_ENABLED else None
+            router = build_router(cache=response_cache)
+
+            # Cache and failover counters are read when metrics are scraped
+            registry.add_collector(stats_collector(
+                "mindmate_llm_router", "LLM router", router.router_stats,
+                counters=("failovers", "hedged", "hedge_wins")
+            ))
+            if router.admission is not None:
+                registry.add_collector(stats_collector(
+                    "mindmate_llm_admission", "LLM admission control", router.admission_stats,
+                    counters=tuple(router.admission.counters)
+                ))
+            if response_cache:
+                registry.add_collector(stats_collector(
+                    "mindmate_llm_cache", "LLM response cache", response_cache.stats,
+                    counters=("memory_hits", "disk_hits", "misses", "coalesced", "memory_evictions", "disk_evictions")
+                ))
+            _llm = router
+        return _llm
+
+def json_validator(*types):
+    """Cache check for analysis responses: content parses as JSON of one of these types"""
+    def validate(content):
+        try:
+            return isinstance(json.loads(content), types)
+        except ValueError:
+            return False
+    return validate
+
+# Malformed analyses are not cached, so a retry asks the provider again
+is_analysis = json_validator(dict)
+is_batch_analysis = json_validator(list, dict)
 
 class EmotionalAnalyzer:
     """Analytical LLM for emotional extraction"""
     
     @staticmethod
-    def analyze_emotion_from_text(text):
+    def analyze_emotion_from_text(text, user_id="", priority=None):
         """Analytical Prompt: Extract emotion information from journal text"""
         prompt = f"""You are an expert emotional intelligence analyst. Analyze the following journal entry and extract:
 1. Primary emotion(s) being expressed
@@ -35,36 +94,122 @@ Journal Entry:
 Please provide a structured JSON response with keys: emotions, intensity, triggers, sentiment, themes, suggested_strategies"""
 
         try:
-            response = requests.post(
-                LLM_ENDPOINT,
-                headers={
-                    "Authorization": f"Bearer {LLM_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": LLM_MODEL,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7,
-                    "max_tokens": 500
-                }
+            content = get_llm().complete(
+                prompt, 0.7, config.MAX_TOKENS_ANALYSIS, task="analysis", user_id=user_id,
+                validate=is_analysis, priority=priority
             )
-            
-            if response.status_code == 200:
-                content = response.json()['choices'][0]['message']['content']
-                result = json.loads(content)
-                return result
-            else:
-                return {"error": f"API Error: {response.status_code}"}
+            return json.loads(content)
         except Exception as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def analyze_emotions_batch(texts, user_id="", priority=None):
+        """Analyze many journal entries using as few LLM round trips as possible.
+
+        Entries are packed into chunks that fit the batch token budget, each
+        chunk is analyzed in one request and the JSON array is mapped back to
+        entries by id. Entries a chunk fails to cover are analyzed one by one.
+        Returns one result (or {"error": ...}) per input text, in order.
+        priority overrides the admission class of every request made.
+        """
+        # Identical texts are analyzed once and share the result
+        unique_texts = list(dict.fromkeys(texts))
+        analyses = {}
+        for chunk in chunk_texts_for_analysis(unique_texts):
+            analyses.update(EmotionalAnalyzer._analyze_chunk(chunk, user_id, priority))
+        return [analyses[text] for text in texts]
+
+    @staticmethod
+    def _analyze_chunk(chunk, user_id="", priority=None):
+        if len(chunk) == 1:
+            return {chunk[0]: EmotionalAnalyzer.analyze_emotion_from_text(chunk[0], user_id, priority)}
+
+        entries = "\n".join(f'[{i}] "{text}"' for i, text in enumerate(chunk))
+        prompt = f"""You are an expert emotional intelligence analyst. Analyze each of the following journal entries independently and extract, for every entry:
+1. Primary emotion(s) being expressed
+2. Emotional intensity on a scale of 1-10
+3. Identified triggers or causes
+4. Sentiment (positive/neutral/negative)
+5. Key emotional themes
+6. Suggested coping strategies
+
+Journal Entries:
+{entries}
+
+Please provide a JSON array with one object per entry, each with keys: id (the entry number in brackets), emotions, intensity, triggers, sentiment, themes, suggested_strategies"""
+
+        results = {}
+        try:
+            max_tokens = min(config.MAX_TOKENS_ANALYSIS * len(chunk), config.BATCH_ANALYSIS_MAX_OUTPUT_TOKENS)
+            parsed = json.loads(get_llm().complete(
+                prompt, 0.7, max_tokens, task="batch_analysis", user_id=user_id,
+                validate=is_batch_analysis, priority=priority
+            ))
+            if isinstance(parsed, dict):
+                parsed = parsed.get("results", [])
+            for item in parsed:
+                index = item.pop("id", None) if isinstance(item, dict) else None
+                if isinstance(index, int) and 0 <= index < len(chunk):
+                    results[chunk[index]] = item
+        except Exception:
+            pass
+
+        # Fall back to single-entry analysis for anything the batch missed
+        for text in chunk:
+            if text not in results:
+                results[text] = EmotionalAnalyzer.analyze_emotion_from_text(text, user_id, priority)
+        return results
+
+class TieredAnalyzer:
+    """Journal analysis in two tiers: the local classifier first, the LLM
+    (EmotionalAnalyzer) only for journals the classifier is unsure about"""
+
+    def __init__(self, classifier, escalate, threshold):
+        self.classifier = classifier
+        self.escalate = escalate  # ([text, ...], user_id, priority) -> [result or {"error": ...}, ...]
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.counters = {"classified": 0, "escalated": 0}
+
+    def classify(self, text):
+        """Classifier result for a journal, or None when it should be escalated"""
+        if self.classifier is None:
+            return None
+        emotion, confidence, intensity = self.classifier.predict(text)
+        if confidence < self.threshold:
+            return None
+        return {"emotions": [emotion], "intensity": intensity, "confidence": round(confidence, 3), "source": "classifier"}
+
+    def analyze_batch(self, texts, user_id="", priority=None):
+        """One result per text, in order; escalated journals share LLM batches"""
+        results = [self.classify(text) for text in texts]
+        hard = [i for i, result in enumerate(results) if result is None]
+        if hard:
+            for i, result in zip(hard, self.escalate([texts[i] for i in hard], user_id, priority)):
+                results[i] = result
+        with self._lock:
+            self.counters["classified"] += len(texts) - len(hard)
+            self.counters["escalated"] += len(hard)
+        return results
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        total = counters["classified"] + counters["escalated"]
+        return dict(
+            counters,
+            escalation_rate=round(counters["escalated"] / total, 4) if total else 0.0,
+            threshold=self.threshold,
+            model_loaded=self.classifier is not None
+        )
+
 class SupportiveCompanion:
     """Generative LLM for empathetic responses and coping strategies"""
     
     @staticmethod
-    def generate_support_response(emotion, intensity, triggers, context=""):
-        """Generative Prompt: Create empathetic response and coping strategies"""
-        prompt = f"""You are a compassionate mental wellness companion. Based on the following emotional state, provide supportive guidance:
+    def support_prompt(emotion, intensity, triggers, context=""):
+        """Build the support prompt shared by the blocking and streaming paths"""
+        return f"""You are a compassionate mental wellness companion. Based on the following emotional state, provide supportive guidance:
 
 Emotion: {emotion}
 Intensity (1-10): {intensity}
@@ -80,41 +225,98 @@ Please provide a response that includes:
 
 Format as a warm, supportive message suitable for emotional support."""
 
+    @staticmethod
+    def generate_support_response(emotion, intensity, triggers, context="", user_id="", deadline=None):
+        """Generative Prompt: Create empathetic response and coping strategies"""
+        prompt = SupportiveCompanion.support_prompt(emotion, intensity, triggers, context)
         try:
-            response = requests.post(
-                LLM_ENDPOINT,
-                headers={
-                    "Authorization": f"Bearer {LLM_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": LLM_MODEL,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.8,
-                    "max_tokens": 800
-                }
+            message = get_llm().complete(
+                prompt, 0.8, config.MAX_TOKENS_SUPPORT_MESSAGE, task="support_message", user_id=user_id,
+                deadline=deadline
             )
-            
-            if response.status_code == 200:
-                message = response.json()['choices'][0]['message']['content']
-                return {"message": message}
-            else:
-                return {"error": f"API Error: {response.status_code}"}
+            return {"message": message}
         except Exception as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def stream_support_response(emotion, intensity, triggers, context="", user_id=""):
+        """Yield the support message in pieces as the LLM produces them"""
+        prompt = SupportiveCompanion.support_prompt(emotion, intensity, triggers, context)
+        return get_llm().stream(prompt, 0.8, config.MAX_TOKENS_SUPPORT_MESSAGE, task="support_message", user_id=user_id)
+
 # Initialize instances
 analyzer = EmotionalAnalyzer()
 companion = SupportiveCompanion()
+tiered_analyzer = TieredAnalyzer(
+    load_classifier(config.CLASSIFIER_MODEL_PATH) if config.CLASSIFIER_ENABLED else None,
+    analyzer.analyze_emotions_batch,
+    config.CLASSIFIER_CONFIDENCE_THRESHOLD
+)
+registry.add_collector(stats_collector(
+    "mindmate_analysis_tier", "Tiered journal analysis", tiered_analyzer.stats,
+    counters=("classified", "escalated")
+))
 
 # Walker callable functions
 def analyze_emotion_by_llm(text):
     return analyzer.analyze_emotion_from_text(text)
 
-def generate_message_by_llm(emotion, intensity, triggers, context):
-    return companion.generate_support_response(emotion, intensity, triggers, context)
-
-def generate_breathing_by_llm(emotion, intensity, duration):
+def analyze_emotions_batch(texts, user_id="", priority=None):
+    return analyzer.analyze_emotions_batch(texts, user_id, priority)
+
+def analyze_journals(texts, user_ids=None):
+    """Classifier first, LLM for the low-confidence rest (one result per text).
+
+    user_ids gives each text's owner: journals are batched per user so each
+    user's own token bucket is charged. Queue and backfill work, so always
+    admitted as background.
+    """
+    by_user = {}
+    for i, user_id in enumerate(user_ids or [""] * len(texts)):
+        by_user.setdefault(user_id, []).append(i)
+    results = [None] * len(texts)
+    for user_id, indexes in by_user.items():
+        analyses = tiered_analyzer.analyze_batch([texts[i] for i in indexes], user_id, BACKGROUND)
+        for i, result in zip(indexes, analyses):
+            results[i] = result
+    return results
+
+def analyze_journal_tiered(text, user_id=""):
+    return tiered_analyzer.analyze_batch([text], user_id)[0]
+
+def classifier_loaded():
+    """Whether a trained classifier is in use (CLASSIFIER_ENABLED and a saved model)"""
+    return tiered_analyzer.classifier is not None
+
+def get_analysis_tier_stats():
+    """Journals scored locally vs escalated to the LLM"""
+    return tiered_analyzer.stats()
+
+def generate_message_by_llm(emotion, intensity, triggers, context, user_id="", deadline=None):
+    return companion.generate_support_response(emotion, intensity, triggers, context, user_id, deadline)
+
+def stream_message_by_llm(emotion, intensity, triggers, context, user_id=""):
+    return companion.stream_support_response(emotion, intensity, triggers, context, user_id)
+
+def get_llm_stats():
+    """Per-task LLM call counts, latency and token usage"""
+    return get_llm().stats()
+
+def get_llm_provider_stats():
+    """Per-provider health and latency, plus failover/hedging counters"""
+    llm = get_llm()
+    return {"providers": llm.provider_stats(), "router": llm.router_stats()}
+
+def get_llm_cache_stats():
+    """Response cache hit/miss and eviction counters"""
+    cache = get_llm().cache
+    return cache.stats() if cache else {"enabled": False}
+
+def get_llm_admission_stats():
+    """Admitted/rejected LLM requests per priority class and token bucket levels"""
+    return get_llm().admission_stats()
+
+def generate_breathing_by_llm(emotion, intensity, duration, user_id="", deadline=None):
     prompt = f"""You are an expert in breathing techniques and mindfulness. Create a personalized breathing exercise for someone experiencing:
 
 Emotion: {emotion}
@@ -131,28 +333,14 @@ Design a breathing exercise that:
 Format as clear, step-by-step instructions with a catchy name."""
     
     try:
-        response = requests.post(
-            LLM_ENDPOINT,
-            headers={
-                "Authorization": f"Bearer {LLM_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": LLM_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,
-                "max_tokens": 600
-            }
+        return get_llm().complete(
+            prompt, 0.7, config.MAX_TOKENS_BREATHING_EXERCISE, task="breathing_exercise", user_id=user_id,
+            deadline=deadline
         )
-        
-        if response.status_code == 200:
-            return response.json()['choices'][0]['message']['content']
-        else:
-            return {"error": f"API Error: {response.status_code}"}
     except Exception as e:
         return {"error": str(e)}
 
-def generate_affirmation_by_llm(emotion, intensity, user_name, triggers):
+def generate_affirmation_by_llm(emotion, intensity, user_name, triggers, user_id="", deadline=None):
     prompt = f"""Create a personalized, powerful affirmation for someone named {user_name} who is experiencing {emotion} (intensity: {intensity}/10).
 Triggers: {', '.join(triggers) if triggers else 'Not specified'}
 
@@ -165,40 +353,151 @@ The affirmation should be:
 Also suggest how to use it (when to repeat it, how many times, etc.)"""
     
     try:
-        response = requests.post(
-            LLM_ENDPOINT,
-            headers={
-                "Authorization": f"Bearer {LLM_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": LLM_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,
-                "max_tokens": 300
-            }
+        return get_llm().complete(
+            prompt, 0.7, config.MAX_TOKENS_AFFIRMATION, task="affirmation", user_id=user_id, deadline=deadline
         )
-        
-        if response.status_code == 200:
-            return response.json()['choices'][0]['message']['content']
-        else:
-            return {"error": f"API Error: {response.status_code}"}
     except Exception as e:
         return {"error": str(e)}
 
+def generate_weekly_reflection_by_llm(weekly_emotions, patterns, intensity_average, entry_count, user_id=""):
+    emotions = ", ".join(f"{emotion} ({count}x)" for emotion, count in weekly_emotions.items())
+    prompt = f"""You are a compassionate mental wellness companion writing a weekly reflection for someone who tracked their moods this week.
+
+Mood entries this week: {entry_count}
+Emotions logged: {emotions if emotions else 'None'}
+Average intensity (1-10): {intensity_average:.1f}
+Observed patterns: {', '.join(patterns) if patterns else 'None identified'}
+
+Write a warm reflection (one short paragraph) that:
+1. Acknowledges the range of emotions without judgment
+2. Highlights one strength they showed this week
+3. Names one pattern worth noticing next week
+
+Speak directly to them as "you"."""
+
+    try:
+        return get_llm().complete(
+            prompt, config.GENERATIVE_TEMPERATURE, config.MAX_TOKENS_WEEKLY_REFLECTION, task="weekly_reflection",
+            user_id=user_id
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+def generate_habit_suggestions_by_llm(triggers, dominant_emotions, intensity_average, user_id=""):
+    prompt = f"""You are a wellbeing coach. Suggest small, specific daily habits for someone whose past week looked like this:
+
+Most frequent emotions: {', '.join(dominant_emotions) if dominant_emotions else 'Not specified'}
+Common triggers: {', '.join(triggers) if triggers else 'Not specified'}
+Average intensity (1-10): {intensity_average:.1f}
+
+List 4-6 habits, one per line, each starting with "- ". Keep each habit to one sentence that says what to do and how often."""
+
+    try:
+        return get_llm().complete(
+            prompt, config.GENERATIVE_TEMPERATURE, config.MAX_TOKENS_HABIT_SUGGESTIONS, task="habit_suggestions",
+            user_id=user_id
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+# Worker pool for fanning out independent generations concurrently
+bundle_executor = ThreadPoolExecutor(
+    max_workers=config.SUPPORT_BUNDLE_WORKERS, thread_name_prefix="support-bundle"
+)
+
+SUPPORT_BUNDLE_PARTS = ("support_message", "breathing_exercise", "affirmation")
+
+def generate_support_bundle_by_llm(emotion, intensity, triggers, context, duration, user_name, timeout=None, parts=None,
+                                   user_id=""):
+    """Generate support message, breathing exercise and affirmation concurrently.
+
+    Each part is returned as soon as all of them finish or the timeout expires,
+    whichever comes first; parts that failed, were not admitted or are still
+    running are listed in "errors" and answered with the canned response
+    instead (named in "fallback"). `parts` limits the bundle to a subset
+    (e.g. when the message is streamed separately).
+
+    Cancelling only removes parts still queued for a worker. Running parts
+    are stopped by the deadline they are given: it caps their HTTP timeouts
+    and retries, so a timed-out call gives its thread and connection back.
+    """
+    timeout = config.SUPPORT_BUNDLE_TIMEOUT if timeout is None else timeout
+    parts = parts or SUPPORT_BUNDLE_PARTS
+    started = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    calls = {
+        "support_message": (generate_message_by_llm, emotion, intensity, triggers, context, user_id, deadline),
+        "breathing_exercise": (generate_breathing_by_llm, emotion, intensity, duration, user_id, deadline),
+        "affirmation": (generate_affirmation_by_llm, emotion, intensity, user_name, triggers, user_id, deadline)
+    }
+    futures = {part: bundle_executor.submit(*calls[part]) for part in SUPPORT_BUNDLE_PARTS if part in parts}
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    results = {}
+    errors = {}
+    for part, future in futures.items():
+        if future not in done:
+            # Only a part still queued is cancelled; a running one stops at the deadline
+            future.cancel()
+            errors[part] = f"Timed out after {timeout}s"
+            continue
+        result = future.result()
+        if isinstance(result, dict) and "error" in result:
+            errors[part] = result["error"]
+        elif part == "support_message":
+            results[part] = result["message"]
+        else:
+            results[part] = result
+
+    canned = {
+        "support_message": canned_support_message,
+        "breathing_exercise": canned_breathing_text,
+        "affirmation": canned_affirmation
+    }
+    for part in errors:
+        results[part] = canned[part](emotion)
+
+    return {
+        "results": results,
+        "errors": errors,
+        "fallback": sorted(errors),
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
 # Helper functions
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def chunk_texts_for_analysis(texts):
+    """Split texts into chunks that fit one batch analysis request"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= config.BATCH_ANALYSIS_MAX_ENTRIES
+                        or current_tokens + tokens > config.BATCH_ANALYSIS_PROMPT_TOKENS):
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
 def extract_keywords(text):
-    """Extract keywords from journal text"""
-    words = text.lower().split()
-    return words[:10]
+    """Extract emotion and trigger keywords from journal text"""
+    return find_keywords(text, limit=10)
 
 def get_latest_emotion(user_id):
     """Get most recent emotion entry for user"""
     return {"name": "calm", "intensity": 6.5}
 
-def traverse_emotion_triggers(emotion):
-    """Get triggers connected to emotion"""
-    return []
+def traverse_emotion_triggers(emotion, user_id="", lookback_days=30):
+    """Get triggers connected to emotion (strongest caused_by edges first)"""
+    return [edge["trigger"] for edge in traverse_outgoing_edges(emotion, "caused_by", user_id, lookback_days)]
 
 def traverse_emotion_activities(emotion):
     """Get activities connected to emotion"""
@@ -222,11 +521,8 @@ def count_emotion_frequencies(emotions_list):
 def analyze_trends(emotion_counts):
     """Analyze trend from emotion counts - classify emotions as positive/negative"""
     # Classify emotions
-    positive_emotions = {'happy', 'calm', 'content', 'peaceful', 'excited', 'grateful', 'confident', 'joyful', 'relaxed', 'energized'}
-    negative_emotions = {'sad', 'anxious', 'stressed', 'overwhelmed', 'angry', 'frustrated', 'lonely', 'worried', 'depressed', 'fearful'}
-    
-    positive_count = sum(count for emotion, count in emotion_counts.items() if emotion.lower() in positive_emotions)
-    negative_count = sum(count for emotion, count in emotion_counts.items() if emotion.lower() in negative_emotions)
+    positive_count = sum(count for emotion, count in emotion_counts.items() if emotion.lower() in POSITIVE_MOODS)
+    negative_count = sum(count for emotion, count in emotion_counts.items() if emotion.lower() in NEGATIVE_MOODS)
     
     # Calculate ratio
     total = positive_count + negative_count
@@ -251,17 +547,24 @@ def find_emotion_by_name(emotion_name):
     """Find emotion node by name"""
     return None
 
-def traverse_outgoing_edges(node, edge_type):
-    """Traverse outgoing edges of a node"""
-    return []
+def traverse_outgoing_edges(node, edge_type, user_id="", lookback_days=30):
+    """Traverse outgoing caused_by / correlates_with edges of an emotion node,
+    materialized from the user's trigger index"""
+    if not user_id or trigger_index.store is None:
+        return []
+    graph = trigger_graph(trigger_index.store, user_id, lookback_days)
+    emotion = node.lower()
+    return [edge for edge in graph.get(edge_type, []) if edge["emotion"] == emotion]
 
 def rank_activities_by_effectiveness(activities, intensity):
     """Rank activities by effectiveness"""
-    return activities
+    return rank_activities(activities, intensity)
 
 def get_user_entries_by_date(user_id, lookback_days):
     """Get user entries within date range"""
-    return []
+    if trigger_index.store is None:
+        return []
+    return [entry.to_dict() for entry in trigger_index.store.window(user_id, lookback_days)]
 
 def traverse_entry_emotions(entry):
     """Get emotions connected to entry"""
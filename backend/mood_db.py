@@ -0,0 +1,839 @@
+"""
+MindMate Mood Database
+SQLite-backed mood store selected by config.DATABASE_URL. Same interface as
+mood_store.MoodStore, but history lives on disk: restarts are instant and
+memory stays flat as history grows. Summary aggregates are read over the
+(user_id, ts) index and summed day by day exactly as the in-memory store does.
+
+With MOOD_DB_SHARDS > 1 users are spread over that many SQLite files by
+consistent hashing of user_id, so several `jac serve` processes can share
+the data with one write lock per shard. Every insert and annotation takes
+the next value of a per-file commit sequence inside its own transaction, so
+sequence numbers follow commit order even though entry ids (reserved in
+blocks per process) do not: delta sync, summary versions and the per-process
+caches use the sequence as their watermark. Change the shard count with:
+
+    python mood_db.py rebalance --shards 8
+    python mood_db.py status
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import config
+from metrics import track_store
+from mood_store import (
+    MoodRecord,
+    get_mood_store as get_memory_store,
+    stats_by_day,
+    to_micros,
+    window_start,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mood_entries (
+    entry_id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    intensity REAL NOT NULL,
+    journal_text TEXT NOT NULL DEFAULT '',
+    ts INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    extras TEXT,
+    seq INTEGER NOT NULL DEFAULT 0,
+    changed_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS commit_seq (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+"""
+
+# Created after SEQ_COLUMNS are added to databases that predate them
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_mood_user_ts ON mood_entries (user_id, ts);
+CREATE INDEX IF NOT EXISTS idx_mood_user_emotion ON mood_entries (user_id, emotion);
+CREATE INDEX IF NOT EXISTS idx_mood_user_seq ON mood_entries (user_id, seq);
+CREATE INDEX IF NOT EXISTS idx_mood_user_changed ON mood_entries (user_id, changed_seq);
+CREATE INDEX IF NOT EXISTS idx_mood_seq ON mood_entries (seq);
+"""
+
+# seq: commit order of the insert; changed_seq: commit order of the latest insert or annotation
+SEQ_COLUMNS = ("seq", "changed_seq")
+
+# Longest wait between retries of a failed group commit
+FLUSH_RETRY_MAX_SECONDS = 5
+
+ENTRY_COLUMNS = "entry_id, user_id, emotion, intensity, journal_text, timestamp, extras"
+ROW_COLUMNS = "entry_id, user_id, emotion, intensity, journal_text, ts, timestamp, extras"
+
+ID_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entry_ids (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    next_entry_id INTEGER NOT NULL
+);
+"""
+
+
+def sqlite_path(url):
+    """Filesystem path for a sqlite:/// URL, or None for any other database.
+    Relative paths (sqlite:///mindmate.db) are taken from the backend directory."""
+    if not url.startswith("sqlite://"):
+        return None
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else ""
+    return config.backend_path(path) if path else ":memory:"
+
+
+def app_db_path(url=None):
+    """SQLite file for app-wide tables (activity feedback, materialized
+    summaries): the mood database itself, or app.db inside a shard directory"""
+    path = sqlite_path(url or config.DATABASE_URL)
+    if path is None or path == ":memory:":
+        return path
+    if config.MOOD_DB_SHARDS > 1 or os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        return os.path.join(path, "app.db")
+    return path
+
+
+class IdAllocator:
+    """Entry ids that stay unique across processes and shards: each process
+    reserves a block of ids at a time from a counter row in SQLite"""
+
+    def __init__(self, path, block=1000):
+        self.block = block
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(ID_SCHEMA)
+        self._next = self._limit = 0
+        self.floor = 1  # lowest id still free (raised to the stores' highest id + 1)
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._reserve()
+            entry_id = self._next
+            self._next += 1
+            return entry_id
+
+    def next_ids(self, n):
+        """n ids at once (bulk import); may span several reserved blocks"""
+        with self._lock:
+            ids = []
+            while len(ids) < n:
+                if self._next >= self._limit:
+                    self._reserve(max(self.block, n - len(ids)))
+                take = min(n - len(ids), self._limit - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+            return ids
+
+    def _reserve(self, size=None):
+        # BEGIN IMMEDIATE takes the file's write lock, so no two processes
+        # can read the same counter value
+        size = size or self.block
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT next_entry_id FROM entry_ids WHERE id = 0").fetchone()
+            start = max(row[0] if row else 1, self.floor)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entry_ids (id, next_entry_id) VALUES (0, ?)", (start + size,)
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._next, self._limit = start, start + size
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SQLiteMoodStore:
+    """Mood entries in one SQLite table (WAL mode, group-committed inserts)"""
+
+    shared = True  # other processes may write to the same file
+
+    def __init__(self, path, batch_size=100, flush_interval_ms=50, echo=False, ids=None, id_block=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if echo:
+            self._db.set_trace_callback(print)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+        self._db.executescript(INDEXES)
+        self._db.commit()
+
+        # Ids are handed out here so log_mood can report one before the flush;
+        # shards share one allocator so ids never clash when users move
+        self._pending_lock = threading.Lock()
+        self._pending = []
+        self.flush_failures = 0
+        self.last_flush_error = None
+        self.total_entries, max_id = self._db.execute(
+            "SELECT COUNT(*), COALESCE(MAX(entry_id), 0) FROM mood_entries"
+        ).fetchone()
+        self._owns_ids = ids is None
+        self.ids = IdAllocator(path, id_block) if ids is None else ids
+        self.ids.floor = max(self.ids.floor, max_id + 1)
+
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def add(self, user_id, mood_name, intensity, journal_text="", timestamp=None):
+        """Queue a new mood entry for the next group commit and return its record"""
+        timestamp = timestamp or datetime.now().isoformat()
+        journal_text = journal_text or ""
+        entry_id = self.ids.next_id()
+        with self._pending_lock:
+            self.total_entries += 1
+            self._pending.append(
+                (entry_id, user_id, mood_name, intensity, journal_text, to_micros(timestamp), timestamp)
+            )
+            full = len(self._pending) >= self.batch_size
+        if full:
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Still queued (see flush): the flusher retries it
+                self._wakeup.set()
+        else:
+            self._wakeup.set()
+        return MoodRecord(entry_id, user_id, mood_name, intensity, journal_text, timestamp, None)
+
+    def add_entry(self, entry):
+        """Store an existing entry dict (e.g. migrated history)"""
+        return self.add(
+            entry["user_id"],
+            entry["mood_name"],
+            entry["intensity"],
+            entry.get("journal_text", ""),
+            entry.get("timestamp")
+        )
+
+    def add_entries(self, entries):
+        """Store a batch of entry dicts in one transaction (bulk import); fields
+        beyond the entry columns, e.g. "analysis", are kept as extras.
+        Returns how many were stored."""
+        rows = []
+        for entry_id, entry in zip(self.ids.next_ids(len(entries)), entries):
+            timestamp = entry.get("timestamp") or datetime.now().isoformat()
+            extras = {key: value for key, value in entry.items() if key not in MoodRecord.FIELDS}
+            rows.append((
+                entry_id, entry["user_id"], entry["mood_name"], entry["intensity"],
+                entry.get("journal_text") or "", to_micros(timestamp), timestamp,
+                json.dumps(extras) if extras else None
+            ))
+        # In (user_id, ts) order the index inserts touch neighbouring pages
+        rows.sort(key=lambda row: (row[1], row[5]))
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                self._insert_rows(rows)
+        with self._pending_lock:
+            self.total_entries += len(rows)
+        return len(rows)
+
+    def flush(self):
+        """Write all pending entries in one transaction.
+
+        Entries leave the queue only once the transaction has committed. If it
+        fails (e.g. "database is locked" once another process has held the
+        write lock past the timeout) they stay queued for the next flush, the
+        failure is counted in write_stats() and the error is raised.
+        """
+        # Taken under the db lock so a reader never overtakes a flush in progress;
+        # add() only appends, so the first len(rows) entries are still these rows
+        with self._db_lock:
+            with self._pending_lock:
+                rows = list(self._pending)
+            if not rows:
+                return
+            try:
+                with self._db:
+                    seqs = self._take_seqs(len(rows))
+                    self._db.executemany(
+                        "INSERT INTO mood_entries "
+                        "(entry_id, user_id, emotion, intensity, journal_text, ts, timestamp, seq, changed_seq) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [row + (seq, seq) for row, seq in zip(rows, seqs)]
+                    )
+            except sqlite3.Error as e:
+                with self._pending_lock:
+                    self.flush_failures += 1
+                    self.last_flush_error = str(e)
+                raise
+            with self._pending_lock:
+                del self._pending[:len(rows)]
+
+    def write_stats(self):
+        """Entries waiting for a group commit and failed flushes so far"""
+        with self._pending_lock:
+            return {
+                "pending": len(self._pending),
+                "flush_failures": self.flush_failures,
+                "last_flush_error": self.last_flush_error
+            }
+
+    def annotate(self, user_id, entry_id, key, value):
+        """Attach an extra field (e.g. "analysis") to a stored entry.
+
+        Returns (seq, previous changed_seq, new changed_seq, previous value of
+        the field), read in the same transaction as the update, or None if
+        there is no such entry.
+        """
+        if key in MoodRecord.FIELDS:
+            raise ValueError(f"{key} is a stored column and cannot be annotated")
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                # Taking the sequence first holds the write lock, so nothing
+                # changes the entry between the read and the update
+                changed_seq, = self._take_seqs(1)
+                row = self._db.execute(
+                    "SELECT seq, changed_seq, extras FROM mood_entries WHERE entry_id = ? AND user_id = ?",
+                    (entry_id, user_id)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._db.execute(
+                    "UPDATE mood_entries SET extras = json_set(COALESCE(extras, '{}'), ?, json(?)), "
+                    "changed_seq = ? WHERE entry_id = ? AND user_id = ?",
+                    (f'$."{key}"', json.dumps(value), changed_seq, entry_id, user_id)
+                )
+        seq, previous_seq, extras = row
+        return seq, previous_seq, changed_seq, (json.loads(extras) if extras else {}).get(key)
+
+    def entry(self, user_id, entry_id):
+        """One of the user's entries by id, or None"""
+        rows = self._query(
+            f"SELECT {ENTRY_COLUMNS} FROM mood_entries WHERE entry_id = ? AND user_id = ?",
+            (entry_id, user_id)
+        )
+        return self._record(rows[0]) if rows else None
+
+    def count(self, user_id):
+        return self._query("SELECT COUNT(*) FROM mood_entries WHERE user_id = ?", (user_id,))[0][0]
+
+    def latest(self, user_id, n=1):
+        """The user's n most recent entries, oldest first"""
+        if n <= 0:
+            return []
+        rows = self._query(
+            f"SELECT {ENTRY_COLUMNS} FROM mood_entries WHERE user_id = ? "
+            "ORDER BY ts DESC, entry_id DESC LIMIT ?",
+            (user_id, n)
+        )
+        return [self._record(row) for row in reversed(rows)]
+
+    def entries(self, user_id, start=None, end=None):
+        """The user's entries between two epoch timestamps, oldest first"""
+        sql = f"SELECT {ENTRY_COLUMNS} FROM mood_entries WHERE user_id = ?"
+        params = [user_id]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(int(start * 1_000_000))
+        if end is not None:
+            sql += " AND ts <= ?"
+            params.append(int(end * 1_000_000))
+        rows = self._query(sql + " ORDER BY ts, entry_id", params)
+        return [self._record(row) for row in rows]
+
+    def window(self, user_id, days, now=None):
+        """The user's entries from the last N days (all entries if days <= 0)"""
+        return self.entries(user_id, start=window_start(days, now))
+
+    def page(self, user_id, days, after=None, since=0, limit=0, now=None):
+        """One page of the user's last N days (at most limit + 1 entries), after
+        cursor key `after` and committed after sequence number `since`"""
+        start = window_start(days, now)
+        sql = f"SELECT {ENTRY_COLUMNS} FROM mood_entries WHERE user_id = ?"
+        params = [user_id]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(int(start * 1_000_000))
+        if after is not None:
+            sql += " AND (ts > ? OR (ts = ? AND entry_id > ?))"
+            params.extend([after[0], after[0], after[1]])
+        if since:
+            sql += " AND seq > ?"
+            params.append(since)
+        sql += " ORDER BY ts, entry_id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        return [self._record(row) for row in self._query(sql, params)]
+
+    def window_version(self, user_id, days, now=None):
+        """(entry count, highest commit sequence number) in the user's last N days"""
+        start = window_start(days, now)
+        if start is None:
+            sql, params = "WHERE user_id = ?", (user_id,)
+        else:
+            sql, params = "WHERE user_id = ? AND ts >= ?", (user_id, int(start * 1_000_000))
+        count, max_seq = self._query(f"SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM mood_entries {sql}", params)[0]
+        return count, max_seq
+
+    def changes(self, user_id, since=0):
+        """[(seq, changed_seq, record), ...] for the user's entries inserted or
+        annotated after sequence number `since`, in commit order"""
+        rows = self._query(
+            f"SELECT seq, changed_seq, {ENTRY_COLUMNS} FROM mood_entries "
+            "WHERE user_id = ? AND changed_seq > ? ORDER BY changed_seq",
+            (user_id, since)
+        )
+        return [(row[0], row[1], self._record(row[2:])) for row in rows]
+
+    def changed_users(self, token=0):
+        """(users with entries inserted after `token`, token to pass next time)"""
+        top, = self._query("SELECT value FROM commit_seq WHERE id = 0", ())[0]
+        rows = self._query(
+            "SELECT DISTINCT user_id FROM mood_entries WHERE seq > ? AND seq <= ?", (token or 0, top)
+        )
+        return [row[0] for row in rows], top
+
+    def last_seq(self):
+        """Highest commit sequence number handed out in this file"""
+        return self._query("SELECT value FROM commit_seq WHERE id = 0", ())[0][0]
+
+    def stats(self, user_id, days, now=None):
+        """MoodStats for the user's last N days. The window is read in commit
+        order and aggregated by mood_store.stats_by_day, as the in-memory
+        store's daily buckets are, so both stores report identical numbers."""
+        start = window_start(days, now)
+        where = "user_id = ?" + ("" if start is None else " AND ts >= ?")
+        params = [user_id] if start is None else [user_id, int(start * 1_000_000)]
+        return stats_by_day(self._query(
+            f"SELECT emotion, intensity, ts FROM mood_entries WHERE {where} ORDER BY seq, entry_id", params
+        ))
+
+    def user_ids(self):
+        return [row[0] for row in self._query("SELECT DISTINCT user_id FROM mood_entries", ())]
+
+    def user_counts(self):
+        """{user_id: entry count}"""
+        return dict(self._query("SELECT user_id, COUNT(*) FROM mood_entries GROUP BY user_id", ()))
+
+    def all_entries(self):
+        """Every stored entry, grouped by user"""
+        rows = self._query(f"SELECT {ENTRY_COLUMNS} FROM mood_entries ORDER BY user_id, ts, entry_id", ())
+        return [self._record(row) for row in rows]
+
+    def export_user(self, user_id):
+        """Raw rows of all of a user's entries (for moving the user to another shard)"""
+        return self._query(f"SELECT {ROW_COLUMNS} FROM mood_entries WHERE user_id = ?", (user_id,))
+
+    def import_rows(self, rows, seq_floor=0):
+        """Store rows from export_user as they are (ids, timestamps and extras
+        kept). They get new sequence numbers above seq_floor, the source file's
+        last_seq(), so watermarks taken there still see them as new."""
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                existing = self._db.execute(
+                    "SELECT COUNT(*) FROM mood_entries WHERE entry_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([row[0] for row in rows]),)
+                ).fetchone()[0]
+                self._insert_rows(rows, seq_floor, replace=True)
+        with self._pending_lock:
+            self.total_entries += len(rows) - existing
+
+    def delete_user(self, user_id):
+        """Remove all of a user's entries; returns how many there were"""
+        self.flush()
+        with self._db_lock:
+            with self._db:
+                deleted = self._db.execute("DELETE FROM mood_entries WHERE user_id = ?", (user_id,)).rowcount
+        with self._pending_lock:
+            self.total_entries -= deleted
+        return deleted
+
+    def close(self):
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+        if self._owns_ids:
+            self.ids.close()
+
+    def _take_seqs(self, n, floor=0):
+        """The next n commit sequence numbers. Call inside the writing
+        transaction: the UPDATE holds the file's write lock until it commits."""
+        self._db.execute("UPDATE commit_seq SET value = MAX(value, ?) + ? WHERE id = 0", (floor, n))
+        end, = self._db.execute("SELECT value FROM commit_seq WHERE id = 0").fetchone()
+        return range(end - n + 1, end + 1)
+
+    def _insert_rows(self, rows, seq_floor=0, replace=False):
+        seqs = self._take_seqs(len(rows), seq_floor)
+        self._db.executemany(
+            f"INSERT {'OR REPLACE ' if replace else ''}INTO mood_entries ({ROW_COLUMNS}, seq, changed_seq) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [tuple(row) + (seq, seq) for row, seq in zip(rows, seqs)]
+        )
+
+    def _migrate(self):
+        # Databases written before the commit sequence: existing rows are
+        # numbered by entry id, and the counter continues from there. Under
+        # the write lock, so processes starting together migrate once.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(mood_entries)")}
+            for column in SEQ_COLUMNS:
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE mood_entries ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            if "seq" not in columns:
+                self._db.execute("UPDATE mood_entries SET seq = entry_id, changed_seq = entry_id")
+            self._db.execute(
+                "INSERT OR IGNORE INTO commit_seq (id, value) "
+                "SELECT 0, COALESCE(MAX(changed_seq), 0) FROM mood_entries"
+            )
+            self._db.commit()
+        except BaseException:
+            self._db.rollback()
+            raise
+
+    def _query(self, sql, params):
+        # Read-your-writes: anything still buffered is committed first
+        self.flush()
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _record(self, row):
+        entry_id, user_id, emotion, intensity, journal_text, timestamp, extras = row
+        return MoodRecord(
+            entry_id, user_id, emotion, intensity, journal_text, timestamp,
+            json.loads(extras) if extras else None
+        )
+
+    def _flush_loop(self):
+        delay = self.flush_interval
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let more writes join this commit
+            time.sleep(delay)
+            try:
+                self.flush()
+                delay = self.flush_interval
+            except sqlite3.Error:
+                # The entries are queued again (counted in write_stats): retry, backing off
+                delay = min(max(delay * 2, 0.1), FLUSH_RETRY_MAX_SECONDS)
+                self._wakeup.set()
+
+
+class HashRing:
+    """Consistent hashing of user ids onto shard names. Each shard owns many
+    points on the ring, so adding or removing one moves only its share of users."""
+
+    def __init__(self, names, vnodes=64):
+        self.names = list(names)
+        points = sorted(
+            (self._hash(f"{name}#{v}"), name) for name in self.names for v in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [name for _, name in points]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def node(self, key):
+        """Shard name owning a key"""
+        i = bisect.bisect(self._points, self._hash(key))
+        return self._owners[i % len(self._owners)]
+
+
+def shard_name(index):
+    return f"shard-{index:03d}.db"
+
+
+class ShardedMoodStore:
+    """Mood entries spread over N SQLiteMoodStore shards in one directory.
+
+    Every per-user call is routed to the user's shard, so each shard's write
+    lock and group commit only serializes the users it owns. Several
+    processes can open the same directory: SQLite locks each file, and entry
+    ids come from a shared allocator (entry_ids.db). The shard count is
+    recorded in shards.json and only changed by rebalance().
+    """
+
+    MANIFEST = "shards.json"
+    shared = True
+
+    def __init__(self, directory, shards=None, vnodes=64, batch_size=100, flush_interval_ms=50,
+                 echo=False, id_block=1000):
+        """shards=None opens whatever the manifest records (for tooling, e.g.
+        finishing an interrupted rebalance); otherwise it must match"""
+        self.directory = directory
+        self._options = {"batch_size": batch_size, "flush_interval_ms": flush_interval_ms, "echo": echo}
+        os.makedirs(directory, exist_ok=True)
+
+        manifest = self._read_manifest()
+        if manifest is None:
+            shards = shards or 1
+            self._write_manifest({"shards": shards, "vnodes": vnodes})
+        elif shards is None:
+            shards = manifest["shards"]
+            vnodes = manifest.get("vnodes", vnodes)
+        elif "rebalancing_to" in manifest:
+            raise RuntimeError(
+                f"Rebalance of {directory} to {manifest['rebalancing_to']} shards did not finish; "
+                f"run `python mood_db.py rebalance --shards {manifest['rebalancing_to']}` again"
+            )
+        elif manifest["shards"] != shards or manifest.get("vnodes", vnodes) != vnodes:
+            raise RuntimeError(
+                f"{directory} holds {manifest['shards']} shards but MOOD_DB_SHARDS is {shards}; "
+                f"run `python mood_db.py rebalance --shards {shards}` first"
+            )
+        self.vnodes = vnodes
+
+        self.ids = IdAllocator(os.path.join(directory, "entry_ids.db"), id_block)
+        self.shards = {}
+        for index in range(shards):
+            self._open_shard(shard_name(index))
+        self.ring = HashRing(self.shards, vnodes)
+
+    @property
+    def total_entries(self):
+        return sum(shard.total_entries for shard in self.shards.values())
+
+    def shard(self, user_id):
+        """The SQLiteMoodStore holding a user's entries"""
+        return self.shards[self.ring.node(user_id)]
+
+    # Per-user calls go to the user's shard
+
+    def add(self, user_id, mood_name, intensity, journal_text="", timestamp=None):
+        return self.shard(user_id).add(user_id, mood_name, intensity, journal_text, timestamp)
+
+    def add_entry(self, entry):
+        return self.shard(entry["user_id"]).add_entry(entry)
+
+    def add_entries(self, entries):
+        """Bulk import: one transaction per shard the batch touches"""
+        by_shard = {}
+        for entry in entries:
+            by_shard.setdefault(self.ring.node(entry["user_id"]), []).append(entry)
+        return sum(self.shards[name].add_entries(batch) for name, batch in by_shard.items())
+
+    def annotate(self, user_id, entry_id, key, value):
+        return self.shard(user_id).annotate(user_id, entry_id, key, value)
+
+    def entry(self, user_id, entry_id):
+        return self.shard(user_id).entry(user_id, entry_id)
+
+    def count(self, user_id):
+        return self.shard(user_id).count(user_id)
+
+    def latest(self, user_id, n=1):
+        return self.shard(user_id).latest(user_id, n)
+
+    def entries(self, user_id, start=None, end=None):
+        return self.shard(user_id).entries(user_id, start, end)
+
+    def window(self, user_id, days, now=None):
+        return self.shard(user_id).window(user_id, days, now)
+
+    def page(self, user_id, days, after=None, since=0, limit=0, now=None):
+        return self.shard(user_id).page(user_id, days, after, since, limit, now)
+
+    def window_version(self, user_id, days, now=None):
+        return self.shard(user_id).window_version(user_id, days, now)
+
+    def changes(self, user_id, since=0):
+        # A user's entries live in one shard, so its sequence orders them
+        return self.shard(user_id).changes(user_id, since)
+
+    def stats(self, user_id, days, now=None):
+        return self.shard(user_id).stats(user_id, days, now)
+
+    # Whole-store calls visit every shard
+
+    def user_ids(self):
+        return [user_id for shard in self.shards.values() for user_id in shard.user_ids()]
+
+    def user_counts(self):
+        counts = {}
+        for shard in self.shards.values():
+            counts.update(shard.user_counts())
+        return counts
+
+    def all_entries(self):
+        """Every stored entry, grouped by user"""
+        return [entry for shard in self.shards.values() for entry in shard.all_entries()]
+
+    def changed_users(self, token=None):
+        """(users with entries inserted after `token`, token to pass next time);
+        the token holds one watermark per shard"""
+        token = token or {}
+        users, next_token = [], {}
+        for name, shard in self.shards.items():
+            changed, next_token[name] = shard.changed_users(token.get(name, 0))
+            users.extend(changed)
+        return users, next_token
+
+    def write_stats(self):
+        """Pending entries and failed flushes summed over the shards"""
+        stats = [shard.write_stats() for shard in self.shards.values()]
+        errors = [s["last_flush_error"] for s in stats if s["last_flush_error"]]
+        return {
+            "pending": sum(s["pending"] for s in stats),
+            "flush_failures": sum(s["flush_failures"] for s in stats),
+            "last_flush_error": errors[-1] if errors else None
+        }
+
+    def shard_counts(self):
+        """{shard name: (users, entries)}"""
+        return {name: (len(shard.user_ids()), shard.total_entries) for name, shard in self.shards.items()}
+
+    def flush(self):
+        for shard in self.shards.values():
+            shard.flush()
+
+    def close(self):
+        for shard in self.shards.values():
+            shard.close()
+        self.ids.close()
+
+    def rebalance(self, shards):
+        """Spread the users over a new number of shards; returns users moved.
+
+        Only users whose ring owner changes are moved (about 1/N of them when a
+        shard is added). Run it with the app stopped. An interrupted rebalance
+        is recorded in the manifest and finished by running it again.
+        """
+        manifest = self._read_manifest()
+        current = max(manifest["shards"], manifest.get("rebalancing_to", 0))
+        self._write_manifest(dict(manifest, rebalancing_to=shards))
+
+        for index in range(max(current, shards)):
+            self._open_shard(shard_name(index))
+        target = HashRing([shard_name(index) for index in range(shards)], self.vnodes)
+
+        moved = 0
+        for name, shard in list(self.shards.items()):
+            for user_id in shard.user_ids():
+                owner = target.node(user_id)
+                if owner != name:
+                    # Copy before delete: a crash leaves a duplicate, never a loss
+                    self.shards[owner].import_rows(shard.export_user(user_id), shard.last_seq())
+                    shard.delete_user(user_id)
+                    moved += 1
+
+        for index in range(shards, max(current, shards)):
+            name = shard_name(index)
+            self.shards.pop(name).close()
+            for suffix in ("", "-wal", "-shm"):
+                path = os.path.join(self.directory, name + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+        self.ring = target
+        self._write_manifest({"shards": shards, "vnodes": self.vnodes})
+        return moved
+
+    def _open_shard(self, name):
+        if name not in self.shards:
+            self.shards[name] = SQLiteMoodStore(os.path.join(self.directory, name), ids=self.ids, **self._options)
+
+    def _read_manifest(self):
+        path = os.path.join(self.directory, self.MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.directory, self.MANIFEST)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_mood_db(url=None, shards=None):
+    """Shared store for a sqlite:/// URL (one per path per process): one
+    SQLiteMoodStore, or a ShardedMoodStore over the directory at that path
+    when MOOD_DB_SHARDS > 1 (or the path already is a shard directory)"""
+    path = sqlite_path(url or config.DATABASE_URL)
+    shards = shards or config.MOOD_DB_SHARDS
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            options = {
+                "batch_size": config.MOOD_DB_BATCH_SIZE,
+                "flush_interval_ms": config.MOOD_DB_FLUSH_INTERVAL_MS,
+                "echo": config.DATABASE_ECHO,
+                "id_block": config.MOOD_DB_ID_BLOCK
+            }
+            if shards > 1 or os.path.isdir(path):
+                store = ShardedMoodStore(path, shards, config.MOOD_DB_SHARD_VNODES, **options)
+            else:
+                store = SQLiteMoodStore(path, **options)
+            _stores[path] = store
+        return store
+
+
+def get_mood_store(node):
+    """The mood store the walkers should use.
+
+    SQLite when DATABASE_URL is a sqlite:/// URL; history previously kept on
+    the node (an in-memory MoodStore or legacy `mood_logs` lists) is copied
+    into the database once and dropped from the node. Other URLs fall back to
+    the in-memory store on the node.
+    """
+    if sqlite_path(config.DATABASE_URL) is None:
+        store = get_memory_store(node)
+        track_store(store)
+        return store
+
+    store = open_mood_db()
+    track_store(store)
+    if getattr(node, "mood_store", None) is not None or getattr(node, "mood_logs", None):
+        memory_store = get_memory_store(node)
+        for entry in memory_store.all_entries():
+            record = store.add_entry(entry)
+            if entry.extras:
+                for key, value in entry.extras.items():
+                    store.annotate(record.user_id, record.entry_id, key, value)
+        node.mood_store = None
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or rebalance the sharded mood database")
+    parser.add_argument("command", choices=("status", "rebalance"))
+    parser.add_argument("--database", default=config.DATABASE_URL, help="sqlite:/// URL of the shard directory")
+    parser.add_argument("--shards", type=int, help="New shard count (rebalance)")
+    args = parser.parse_args()
+
+    directory = sqlite_path(args.database)
+    if not directory or not os.path.exists(os.path.join(directory, ShardedMoodStore.MANIFEST)):
+        raise SystemExit(f"No sharded mood database at {args.database}")
+    store = ShardedMoodStore(directory, flush_interval_ms=0)
+    if args.command == "rebalance":
+        if not args.shards or args.shards < 1:
+            raise SystemExit("rebalance needs --shards N")
+        started = time.time()
+        moved = store.rebalance(args.shards)
+        print(f"✓ Moved {moved} users; {directory} now has {args.shards} shards ({time.time() - started:.1f}s)")
+    for name, (users, entries) in store.shard_counts().items():
+        print(f"{name}: {users} users, {entries} entries")
+    store.close()
@@ -0,0 +1,523 @@
+"""
+MindMate Mood Store
+Per-user mood history kept in timestamp order in compact columnar arrays, with
+bisect-based range queries and per-day aggregates maintained on write
+"""
+
+import bisect
+import heapq
+from array import array
+from datetime import date, datetime, timedelta
+
+from lexicon import TREND_NEGATIVE_MOODS, TREND_POSITIVE_MOODS
+
+
+def window_start(days, now=None):
+    """Epoch start of an N-day lookback window; today counts as the first day.
+
+    Returns None (no lower bound) when days is zero or negative.
+    """
+    if days is None or days <= 0:
+        return None
+    now = now or datetime.now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - timedelta(days=days - 1)).timestamp()
+
+
+def window_start_day(days, now=None):
+    """First day (YYYY-MM-DD) of an N-day lookback window, or None for all days"""
+    if days is None or days <= 0:
+        return None
+    today = (now or datetime.now()).date()
+    return (today - timedelta(days=days - 1)).isoformat()
+
+
+class MoodStats:
+    """Entry count, emotion tallies and the intensities of a set of entries.
+
+    Counts are kept on write and merged day by day. Intensities are kept as
+    the raw values in entry order, and mean and variance are computed from
+    them on read with calculate_emotional_trends' two-pass formulas, so the
+    results are exactly those of a scan over the entries.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.intensities = array("d")
+        self.positive = 0
+        self.negative = 0
+        self.emotion_counts = {}  # ordered by first appearance, like a scan would be
+        self.first_seen = {}  # mood -> earliest timestamp
+
+    def add(self, mood_name, intensity, ts):
+        self.count += 1
+        self.intensities.append(intensity)
+        self.emotion_counts[mood_name] = self.emotion_counts.get(mood_name, 0) + 1
+
+        first = self.first_seen.get(mood_name)
+        if first is None or ts < first:
+            in_order = first is None and all(ts >= seen for seen in self.first_seen.values())
+            self.first_seen[mood_name] = ts
+            if not in_order:
+                # Back-dated entry: restore first-appearance order
+                self.emotion_counts = {
+                    mood: self.emotion_counts[mood]
+                    for mood in sorted(self.emotion_counts, key=self.first_seen.get)
+                }
+
+        mood = mood_name.lower()
+        if mood in TREND_POSITIVE_MOODS:
+            self.positive += 1
+        elif mood in TREND_NEGATIVE_MOODS:
+            self.negative += 1
+
+    def merge(self, other):
+        """Fold another (later) set of entries into this one"""
+        self.count += other.count
+        self.intensities.extend(other.intensities)
+        self.positive += other.positive
+        self.negative += other.negative
+        for mood, count in other.emotion_counts.items():
+            self.emotion_counts[mood] = self.emotion_counts.get(mood, 0) + count
+            if mood not in self.first_seen:
+                self.first_seen[mood] = other.first_seen[mood]
+        return self
+
+    @property
+    def mean(self):
+        """Mean intensity"""
+        if not self.intensities:
+            return 0.0
+        return sum(self.intensities) / len(self.intensities)
+
+    @property
+    def variance(self):
+        """Population variance of intensity"""
+        if not self.intensities:
+            return 0.0
+        mean = self.mean
+        return sum([(x - mean) ** 2 for x in self.intensities]) / len(self.intensities)
+
+
+class EmotionTable:
+    """Interns mood names as small integer ids"""
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def intern(self, name):
+        emotion_id = self.ids.get(name)
+        if emotion_id is None:
+            emotion_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return emotion_id
+
+
+class MoodRecord:
+    """Read-only view of one stored entry, built on demand from the columns.
+
+    Supports the dict-style access the walkers already use (`entry["mood_name"]`,
+    `entry.get(...)`, `"analysis" in entry`); `to_dict()` gives the report shape.
+    """
+
+    __slots__ = ("entry_id", "user_id", "mood_name", "intensity", "journal_text",
+                 "timestamp", "extras")
+
+    FIELDS = ("entry_id", "user_id", "mood_name", "intensity", "journal_text", "timestamp")
+
+    def __init__(self, entry_id, user_id, mood_name, intensity, journal_text, timestamp, extras):
+        self.entry_id = entry_id
+        self.user_id = user_id
+        self.mood_name = mood_name
+        self.intensity = intensity
+        self.journal_text = journal_text
+        self.timestamp = timestamp
+        self.extras = extras
+
+    def __getitem__(self, key):
+        if key in MoodRecord.FIELDS:
+            return getattr(self, key)
+        if self.extras and key in self.extras:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in MoodRecord.FIELDS or bool(self.extras and key in self.extras)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self, fields=None):
+        """Report shape; `fields` limits it to the named keys"""
+        entry = {field: getattr(self, field) for field in MoodRecord.FIELDS}
+        if self.extras:
+            entry.update(self.extras)
+        if fields:
+            return {field: entry[field] for field in fields if field in entry}
+        return entry
+
+    @property
+    def cursor(self):
+        """Opaque position of this entry in timeline order, for pagination"""
+        return f"{to_micros(self.timestamp)}.{self.entry_id}"
+
+
+def parse_cursor(cursor):
+    """Cursor string -> (epoch microseconds, entry_id), or None if malformed"""
+    try:
+        micros, entry_id = cursor.split(".")
+        return int(micros), int(entry_id)
+    except ValueError:
+        return None
+
+
+def to_micros(timestamp):
+    """ISO timestamp string -> integer epoch microseconds (exact)"""
+    moment = datetime.fromisoformat(timestamp)
+    return int(moment.replace(microsecond=0).timestamp()) * 1_000_000 + moment.microsecond
+
+
+def from_micros(micros):
+    """Integer epoch microseconds -> local ISO timestamp string"""
+    seconds, microsecond = divmod(micros, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microsecond).isoformat()
+
+
+def stats_by_day(rows):
+    """MoodStats over (mood_name, intensity, epoch micros) rows in logging
+    order, bucketed by local day and merged in day order as UserTimeline's
+    daily aggregates are, so the intensities are summed in the same order"""
+    daily = {}
+    for mood_name, intensity, micros in rows:
+        ts = micros / 1_000_000
+        day = date.fromtimestamp(ts).isoformat()
+        bucket = daily.get(day)
+        if bucket is None:
+            bucket = daily[day] = MoodStats()
+        bucket.add(mood_name, intensity, ts)
+    stats = MoodStats()
+    for day in sorted(daily):
+        stats.merge(daily[day])
+    return stats
+
+
+class UserTimeline:
+    """One user's entries in timestamp order, stored column-wise.
+
+    Each entry costs a few dozen bytes: epoch microseconds, intensity, an
+    interned emotion id, the entry id and an (offset, length) slice into a
+    single UTF-8 buffer holding all of the user's journal text. Rare
+    per-entry data (analysis results, timestamps that don't round-trip
+    through local time) lives in sparse dicts keyed by entry id. A second,
+    id-ordered pair of columns maps entry ids to timestamps so lookups by id
+    bisect instead of scanning.
+    """
+
+    def __init__(self, user_id, emotions):
+        self.user_id = user_id
+        self.emotions = emotions  # EmotionTable shared by the whole store
+        self.times = array("q")  # epoch microseconds, ascending
+        self.intensities = array("d")
+        self.emotion_ids = array("I")
+        self.entry_ids = array("q")
+        self.text_offsets = array("q")
+        self.text_lengths = array("I")
+        self.ids = array("q")  # entry ids, ascending
+        self.id_times = array("q")  # epoch microseconds of each id in self.ids
+        self.journal = bytearray()
+        self.extras = {}  # entry_id -> {field: value}
+        self.raw_timestamps = {}  # entry_id -> original ISO string
+        self.days = []  # YYYY-MM-DD keys of self.daily, ascending
+        self.daily = {}  # day -> MoodStats
+
+    def __len__(self):
+        return len(self.times)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "ids" not in state:
+            # Persisted before the id columns existed
+            order = sorted(range(len(self.entry_ids)), key=self.entry_ids.__getitem__)
+            self.ids = array("q", (self.entry_ids[index] for index in order))
+            self.id_times = array("q", (self.times[index] for index in order))
+        if any("intensities" not in bucket.__dict__ for bucket in self.daily.values()):
+            # Persisted with running moments instead of raw intensities: recount from the columns
+            self.days = []
+            self.daily = {}
+            for index in range(len(self.times)):
+                self._count_day(
+                    self.times[index], self.emotions.names[self.emotion_ids[index]], self.intensities[index]
+                )
+
+    def add(self, entry_id, mood_name, intensity, journal_text, timestamp):
+        micros = to_micros(timestamp)
+        text = journal_text.encode("utf-8") if journal_text else b""
+        offset = len(self.journal)
+        self.journal += text
+
+        # Entries almost always arrive in order, so appending is the fast path
+        if not self.times or micros >= self.times[-1]:
+            index = len(self.times)
+        else:
+            index = bisect.bisect_right(self.times, micros)
+        self.times.insert(index, micros)
+        self.intensities.insert(index, intensity)
+        self.emotion_ids.insert(index, self.emotions.intern(mood_name))
+        self.entry_ids.insert(index, entry_id)
+        self.text_offsets.insert(index, offset)
+        self.text_lengths.insert(index, len(text))
+        if from_micros(micros) != timestamp:
+            self.raw_timestamps[entry_id] = timestamp
+        # New ids are the highest so far unless history is loaded out of order
+        if not self.ids or entry_id > self.ids[-1]:
+            position = len(self.ids)
+        else:
+            position = bisect.bisect_left(self.ids, entry_id)
+        self.ids.insert(position, entry_id)
+        self.id_times.insert(position, micros)
+        self._count_day(micros, mood_name, intensity)
+        return self.record(index)
+
+    def _count_day(self, micros, mood_name, intensity):
+        ts = micros / 1_000_000
+        day = date.fromtimestamp(ts).isoformat()
+        bucket = self.daily.get(day)
+        if bucket is None:
+            bucket = self.daily[day] = MoodStats()
+            if not self.days or day > self.days[-1]:
+                self.days.append(day)
+            else:
+                bisect.insort(self.days, day)
+        bucket.add(mood_name, intensity, ts)
+
+    def record(self, index):
+        entry_id = self.entry_ids[index]
+        offset = self.text_offsets[index]
+        length = self.text_lengths[index]
+        timestamp = self.raw_timestamps.get(entry_id)
+        return MoodRecord(
+            entry_id,
+            self.user_id,
+            self.emotions.names[self.emotion_ids[index]],
+            self.intensities[index],
+            self.journal[offset:offset + length].decode("utf-8") if length else "",
+            timestamp or from_micros(self.times[index]),
+            self.extras.get(entry_id)
+        )
+
+    def index_of(self, entry_id):
+        """Position of an entry id in timeline order, or None"""
+        position = bisect.bisect_left(self.ids, entry_id)
+        if position == len(self.ids) or self.ids[position] != entry_id:
+            return None
+        micros = self.id_times[position]
+        index = bisect.bisect_left(self.times, micros)
+        while self.entry_ids[index] != entry_id:
+            index += 1
+        return index
+
+    def records(self, lo, hi):
+        return [self.record(index) for index in range(lo, hi)]
+
+    def between(self, start=None, end=None):
+        """Entries with start <= timestamp <= end (epoch seconds, either bound optional)"""
+        lo = 0 if start is None else bisect.bisect_left(self.times, start * 1_000_000)
+        hi = len(self.times) if end is None else bisect.bisect_right(self.times, end * 1_000_000)
+        return self.records(lo, hi)
+
+    def latest(self, n):
+        return self.records(max(0, len(self.times) - n), len(self.times)) if n > 0 else []
+
+    def page(self, start=None, after=None, since_id=0, limit=0):
+        """Entries from epoch `start` on, after cursor key `after`, with ids above
+        since_id; at most limit + 1 of them so callers can tell if more remain"""
+        lo = 0 if start is None else bisect.bisect_left(self.times, start * 1_000_000)
+        if after is not None:
+            micros, entry_id = after
+            index = bisect.bisect_left(self.times, micros)
+            # Equal timestamps are stored in entry id order
+            while index < len(self.times) and self.times[index] == micros and self.entry_ids[index] <= entry_id:
+                index += 1
+            lo = max(lo, index)
+        if not since_id:
+            hi = min(len(self.times), lo + limit + 1) if limit else len(self.times)
+            return self.records(lo, hi)
+
+        if lo == len(self.times):
+            return []
+
+        # Delta sync: only the ids above since_id can match, found by bisecting
+        # the id column, so the cost follows the number of new entries
+        first = bisect.bisect_right(self.ids, since_id)
+        low_key = (self.times[lo], self.entry_ids[lo])
+        keys = [
+            key for key in zip(self.id_times[first:], self.ids[first:]) if key >= low_key
+        ]
+        keys = heapq.nsmallest(limit + 1, keys) if limit else sorted(keys)
+        return [self.record(self.index_of(entry_id)) for _, entry_id in keys]
+
+    def version_since(self, start=None):
+        """(entry count, highest entry id) from epoch `start` on"""
+        lo = 0 if start is None else bisect.bisect_left(self.times, start * 1_000_000)
+        if lo == len(self.times):
+            return 0, 0
+        # Walk down from the highest id: it is inside the window unless it was back-dated
+        position = len(self.ids) - 1
+        while self.id_times[position] < self.times[lo]:
+            position -= 1
+        return len(self.times) - lo, self.ids[position]
+
+    def find(self, entry_id):
+        """Record for an entry id, or None"""
+        index = self.index_of(entry_id)
+        return None if index is None else self.record(index)
+
+    def annotate(self, entry_id, key, value):
+        if key in MoodRecord.FIELDS:
+            raise ValueError(f"{key} is a stored column and cannot be annotated")
+        self.extras.setdefault(entry_id, {})[key] = value
+
+    def stats_since(self, first_day=None):
+        """Aggregates over the days from first_day onwards (all days if None)"""
+        lo = 0 if first_day is None else bisect.bisect_left(self.days, first_day)
+        stats = MoodStats()
+        for day in self.days[lo:]:
+            stats.merge(self.daily[day])
+        return stats
+
+
+class MoodStore:
+    """All users' mood entries, indexed per user by time.
+
+    Kept by one process, which hands out entry ids in the order entries are
+    stored, so ids double as the commit sequence that the SQLite stores
+    keep in a separate column (page's `since`, window_version).
+    """
+
+    shared = False  # only this process writes to it
+
+    def __init__(self):
+        self.users = {}
+        self.emotions = EmotionTable()
+        self.total_entries = 0
+        self.next_entry_id = 1
+
+    def add(self, user_id, mood_name, intensity, journal_text="", timestamp=None):
+        """Store a new mood entry and return its record"""
+        timestamp = timestamp or datetime.now().isoformat()
+        record = self._timeline(user_id).add(
+            self.next_entry_id, mood_name, intensity, journal_text, timestamp
+        )
+        self.next_entry_id += 1
+        self.total_entries += 1
+        return record
+
+    def add_entry(self, entry):
+        """Store an existing entry dict (e.g. migrated history)"""
+        return self.add(
+            entry["user_id"],
+            entry["mood_name"],
+            entry["intensity"],
+            entry.get("journal_text", ""),
+            entry.get("timestamp")
+        )
+
+    def add_entries(self, entries):
+        """Store a batch of entry dicts (bulk import); fields beyond the entry
+        columns, e.g. "analysis", are kept as extras. Returns how many were stored."""
+        for entry in entries:
+            record = self.add_entry(entry)
+            for key, value in entry.items():
+                if key not in MoodRecord.FIELDS:
+                    self.annotate(record.user_id, record.entry_id, key, value)
+        return len(entries)
+
+    def annotate(self, user_id, entry_id, key, value):
+        """Attach an extra field (e.g. "analysis") to a stored entry"""
+        self._timeline(user_id).annotate(entry_id, key, value)
+
+    def entry(self, user_id, entry_id):
+        """One of the user's entries by id, or None"""
+        timeline = self.users.get(user_id)
+        return timeline.find(entry_id) if timeline else None
+
+    def count(self, user_id):
+        timeline = self.users.get(user_id)
+        return len(timeline) if timeline else 0
+
+    def latest(self, user_id, n=1):
+        """The user's n most recent entries, oldest first"""
+        timeline = self.users.get(user_id)
+        return timeline.latest(n) if timeline else []
+
+    def entries(self, user_id, start=None, end=None):
+        """The user's entries between two epoch timestamps, oldest first"""
+        timeline = self.users.get(user_id)
+        return timeline.between(start, end) if timeline else []
+
+    def window(self, user_id, days, now=None):
+        """The user's entries from the last N days (all entries if days <= 0)"""
+        return self.entries(user_id, start=window_start(days, now))
+
+    def page(self, user_id, days, after=None, since=0, limit=0, now=None):
+        """One page of the user's last N days, stored after sequence number
+        (entry id) `since`; see UserTimeline.page"""
+        timeline = self.users.get(user_id)
+        if not timeline:
+            return []
+        return timeline.page(window_start(days, now), after, since, limit)
+
+    def window_version(self, user_id, days, now=None):
+        """(entry count, highest entry id) in the user's last N days"""
+        timeline = self.users.get(user_id)
+        return timeline.version_since(window_start(days, now)) if timeline else (0, 0)
+
+    def stats(self, user_id, days, now=None):
+        """MoodStats for the user's last N days, assembled from daily buckets"""
+        timeline = self.users.get(user_id)
+        if not timeline:
+            return MoodStats()
+        return timeline.stats_since(window_start_day(days, now))
+
+    def user_ids(self):
+        return list(self.users)
+
+    def user_counts(self):
+        """{user_id: entry count}"""
+        return {user_id: len(timeline) for user_id, timeline in self.users.items() if len(timeline)}
+
+    def all_entries(self):
+        """Every stored entry, grouped by user"""
+        result = []
+        for timeline in self.users.values():
+            result.extend(timeline.between())
+        return result
+
+    def _timeline(self, user_id):
+        timeline = self.users.get(user_id)
+        if timeline is None:
+            timeline = self.users[user_id] = UserTimeline(user_id, self.emotions)
+        return timeline
+
+
+def get_mood_store(node):
+    """The MoodStore attached to a storage node, created on first use.
+
+    History written by older versions as plain `mood_logs` lists is indexed
+    into the store once and the lists are dropped.
+    """
+    store = getattr(node, "mood_store", None)
+    if store is None:
+        store = MoodStore()
+        legacy = getattr(node, "mood_logs", None)
+        if legacy:
+            for entry in legacy:
+                store.add_entry(entry)
+            node.mood_logs = []
+            node.user_moods = {}
+        node.mood_store = store
+    return store
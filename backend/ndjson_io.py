@@ -0,0 +1,300 @@
+"""
+MindMate NDJSON Import/Export
+Streams mood histories to and from newline-delimited JSON (one entry per
+line, as returned by the walkers; a ".gz" path is gzip-compressed).
+
+Both directions are generator pipelines, so memory stays flat whatever the
+file size: export reads one user's history at a time, import parses lines
+lazily and writes them in batches with one commit per batch. After every
+batch the import records its progress in "<file>.progress.json"; running it
+again resumes after the last committed batch instead of starting over.
+
+    python ndjson_io.py export history.ndjson.gz [--user USER_ID] [--days N]
+    python ndjson_io.py import history.ndjson.gz [--batch-size 50000] [--no-resume]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+import config
+from mood_store import to_micros
+
+REQUIRED_FIELDS = ("user_id", "mood_name", "intensity", "timestamp")
+MAX_REPORTED_ERRORS = 20
+
+
+def open_ndjson(path, mode, compressed=None):
+    """Text handle on an NDJSON file; gzip when the name ends in .gz"""
+    if path.endswith(".gz") if compressed is None else compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    return open(path, mode, encoding="utf-8", buffering=1024 * 1024)
+
+
+def progress_path(path):
+    return f"{path}.progress.json"
+
+
+# ============================================================================
+# Export
+# ============================================================================
+
+def history_entries(store, user_id=None, days=0):
+    """Every stored entry (or one user's), read one user at a time"""
+    for uid in [user_id] if user_id else store.user_ids():
+        yield from store.window(uid, days)
+
+
+def export_entries(store, path, user_id=None, days=0):
+    """Write entries to path as NDJSON; the file appears only once complete"""
+    started = time.perf_counter()
+    tmp_path = f"{path}.tmp"
+    entries = users = 0
+    last_user = None
+    with open_ndjson(tmp_path, "w", path.endswith(".gz")) as f:
+        for entry in history_entries(store, user_id, days):
+            f.write(json.dumps(entry.to_dict(), separators=(",", ":")))
+            f.write("\n")
+            entries += 1
+            if entry.user_id != last_user:
+                users += 1
+                last_user = entry.user_id
+    os.replace(tmp_path, path)
+    return {
+        "status": "exported",
+        "path": path,
+        "entries": entries,
+        "users": users,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+# ============================================================================
+# Import
+# ============================================================================
+
+def parse_entry(line):
+    """Entry dict for one NDJSON line (entry_id dropped: the store assigns ids).
+    Raises ValueError when the line is not a valid entry."""
+    entry = json.loads(line)
+    if not isinstance(entry, dict):
+        raise ValueError("not a JSON object")
+    missing = [field for field in REQUIRED_FIELDS if entry.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    entry.pop("entry_id", None)
+    entry["user_id"] = str(entry["user_id"])
+    entry["mood_name"] = str(entry["mood_name"])
+    entry["journal_text"] = str(entry.get("journal_text") or "")
+    intensity = entry["intensity"]
+    if isinstance(intensity, bool) or not isinstance(intensity, (int, float)):
+        raise ValueError("intensity is not a number")
+    if not config.EMOTION_INTENSITY_MIN <= intensity <= config.EMOTION_INTENSITY_MAX:
+        raise ValueError(f"intensity {intensity} out of range")
+    datetime.fromisoformat(entry["timestamp"])
+    return entry
+
+
+def parsed_lines(f, skip, errors):
+    """(line number, entry) for every valid line after the first `skip`;
+    invalid lines are counted in errors["skipped"]"""
+    for number, line in enumerate(f, 1):
+        if number <= skip or not line.strip():
+            continue
+        try:
+            yield number, parse_entry(line)
+        except (ValueError, TypeError, AttributeError) as e:
+            errors["skipped"] += 1
+            if len(errors["samples"]) < MAX_REPORTED_ERRORS:
+                errors["samples"].append({"line": number, "error": str(e)})
+
+
+def batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def entry_key(entry):
+    return entry["user_id"], to_micros(entry["timestamp"]), entry["mood_name"], entry["journal_text"]
+
+
+def already_stored(store, batch):
+    """Keys of the batch's entries that are in the store already (a batch
+    committed just before an interrupted import could record its progress)"""
+    stored = set()
+    for user_id in {entry["user_id"] for entry in batch}:
+        times = [to_micros(entry["timestamp"]) for entry in batch if entry["user_id"] == user_id]
+        for record in store.entries(user_id, min(times) / 1_000_000, max(times) / 1_000_000):
+            stored.add(entry_key(record.to_dict()))
+    return stored
+
+
+def import_signature(store, path):
+    """Identifies an import: this exact file into this database"""
+    stat = os.stat(path)
+    target = getattr(store, "path", None) or getattr(store, "directory", None)
+    return {
+        "source": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "target": os.path.abspath(target) if target else f"memory:{id(store)}"
+    }
+
+
+def load_progress(store, path):
+    """Saved progress of importing this file into this store, or None"""
+    try:
+        with open(progress_path(path)) as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return None
+    signature = import_signature(store, path)
+    return progress if all(progress.get(key) == value for key, value in signature.items()) else None
+
+
+def save_progress(path, progress):
+    tmp_path = f"{progress_path(path)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, progress_path(path))
+
+
+def import_entries(store, path, batch_size=10000, resume=True, on_batch=None):
+    """Stream NDJSON entries from path into the store, one commit per batch.
+
+    With resume, lines committed by an earlier (interrupted) run of the same
+    file are skipped, and a file imported completely is not imported again.
+    on_batch(entries) is called after each committed batch.
+    """
+    started = time.perf_counter()
+    progress = load_progress(store, path) if resume else None
+    if progress is None:
+        progress = {**import_signature(store, path), "lines": 0, "imported": 0, "skipped": 0, "done": False}
+    elif progress["done"]:
+        return {**_import_report(path, progress, 0, started), "status": "already_imported"}
+
+    resumed_from = progress["lines"]
+    errors = {"skipped": progress["skipped"], "samples": []}
+    imported = 0
+    with open_ndjson(path, "r") as f:
+        for batch in batches(parsed_lines(f, resumed_from, errors), batch_size):
+            last_line = batch[-1][0]
+            entries = [entry for _, entry in batch]
+            recovered = 0
+            if resumed_from and progress["lines"] == resumed_from:
+                stored = already_stored(store, entries)
+                entries = [entry for entry in entries if entry_key(entry) not in stored]
+                recovered = len(batch) - len(entries)
+            if entries:
+                store.add_entries(entries)
+            imported += len(entries)
+            progress.update(
+                lines=last_line,
+                imported=progress["imported"] + recovered + len(entries),
+                skipped=errors["skipped"]
+            )
+            save_progress(path, progress)
+            if on_batch is not None:
+                on_batch(entries)
+
+    progress.update(skipped=errors["skipped"], done=True)
+    save_progress(path, progress)
+    report = _import_report(path, progress, imported, started)
+    report["resumed_from_line"] = resumed_from
+    report["errors"] = errors["samples"]
+    return report
+
+
+def _import_report(path, progress, imported, started):
+    seconds = time.perf_counter() - started
+    return {
+        "status": "imported",
+        "path": path,
+        "imported": imported,
+        "total_imported": progress["imported"],
+        "skipped": progress["skipped"],
+        "seconds": round(seconds, 3),
+        "entries_per_second": round(imported / seconds) if seconds > 0 else 0
+    }
+
+
+# ============================================================================
+# Walkers
+# ============================================================================
+
+def bulk_io_path(name):
+    """Path of a file under BULK_IO_DIR; names that would leave it are rejected"""
+    root = os.path.abspath(config.BULK_IO_DIR)
+    path = os.path.abspath(os.path.join(root, name))
+    if not name or os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"{name!r} is not a file name under BULK_IO_DIR")
+    return path
+
+
+def export_history(store, name, user_id="", lookback_days=0):
+    """export_mood_history report"""
+    try:
+        path = bulk_io_path(name)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return {**export_entries(store, path, user_id or None, lookback_days), "path": name}
+
+
+def import_history(store, name, batch_size=0, resume=True):
+    """import_mood_history report; imported users' trigger counts and summaries are refreshed"""
+    from scheduler import mark_summary_dirty
+    from trigger_index import trigger_index
+
+    try:
+        path = bulk_io_path(name)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    if not os.path.isfile(path):
+        return {"status": "error", "error": f"{name} not found"}
+
+    users = set()
+
+    def refresh(entries):
+        users.update(entry["user_id"] for entry in entries)
+
+    report = import_entries(store, path, batch_size or config.BULK_IMPORT_BATCH_SIZE, resume, on_batch=refresh)
+    for user_id in users:
+        trigger_index.forget(user_id)
+        mark_summary_dirty(store, user_id)
+    return {**report, "path": name, "users": len(users)}
+
+
+if __name__ == "__main__":
+    from mood_db import open_mood_db, sqlite_path
+
+    parser = argparse.ArgumentParser(description="Stream mood history to or from an NDJSON file")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="NDJSON file (gzip-compressed when it ends in .gz)")
+    parser.add_argument("--database", default=config.DATABASE_URL, help="sqlite:/// URL of the mood database")
+    parser.add_argument("--user", help="Export one user's history")
+    parser.add_argument("--days", type=int, default=0, help="Export the last N days only")
+    parser.add_argument("--batch-size", type=int, default=config.BULK_IMPORT_BATCH_SIZE, help="Entries per commit")
+    parser.add_argument("--no-resume", action="store_true", help="Import from the first line again")
+    args = parser.parse_args()
+
+    if sqlite_path(args.database) is None:
+        raise SystemExit(f"Bulk import/export needs a sqlite:/// database, not {args.database}")
+    store = open_mood_db(args.database)
+    try:
+        if args.command == "export":
+            result = export_entries(store, args.path, args.user, args.days)
+        else:
+            result = import_entries(store, args.path, args.batch_size, not args.no_resume)
+    finally:
+        store.close()
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,195 @@
+"""
+MindMate Recommendation Index
+Emotion -> ranked activity candidates, built on first use from seed_data
+and re-ranked incrementally as users report whether an activity helped.
+
+Each candidate mirrors an activity node and its helps_with edge in
+mindmate.jac: a prior effectiveness_score from the seed data plus usage_count
+and helped_count from real feedback. Feedback is persisted next to the mood
+history when DATABASE_URL is a SQLite database.
+"""
+
+import sqlite3
+import threading
+
+from mood_db import app_db_path
+from seed_data import DEFAULT_HELPS_WITH, SEED_HELPS_WITH
+
+# How many feedback reports the seed prior is worth
+PRIOR_WEIGHT = 5
+
+# Score a 60+ minute activity loses at full intensity (quick ones rank first
+# when feelings are strong)
+DURATION_PENALTY = 0.1
+
+# Intensity bands with their own precomputed ordering: (upper bound, representative intensity)
+INTENSITY_BANDS = [(4.0, 2.0), (7.0, 5.5), (float("inf"), 9.0)]
+
+# Index key for emotions without their own candidate list
+DEFAULT_KEY = ""
+
+
+def intensity_band(intensity):
+    for band, (upper, _) in enumerate(INTENSITY_BANDS):
+        if (intensity or 0) < upper:
+            return band
+    return len(INTENSITY_BANDS) - 1
+
+
+def activity_score(effectiveness, usage_count, helped_count, duration_minutes, intensity):
+    """Feedback-smoothed effectiveness, minus a duration penalty scaled by intensity"""
+    observed = (effectiveness * PRIOR_WEIGHT + helped_count) / (PRIOR_WEIGHT + usage_count)
+    return observed - DURATION_PENALTY * ((intensity or 0) / 10) * min(duration_minutes, 60) / 60
+
+
+def rank_activities(activities, intensity):
+    """Sort activity dicts (activity node fields) best first; ties keep their order"""
+    return sorted(
+        activities,
+        key=lambda a: (
+            -activity_score(
+                a.get("effectiveness_score", 0.0),
+                a.get("usage_count", 0),
+                a.get("helped_count", 0),
+                a.get("duration_minutes", 0),
+                intensity
+            ),
+            -a.get("usage_count", 0)
+        )
+    )
+
+
+class Candidate:
+    """One activity recommended for one emotion"""
+
+    __slots__ = ("name", "duration_minutes", "effectiveness_score", "usage_count", "helped_count")
+
+    def __init__(self, name, duration_minutes, effectiveness_score):
+        self.name = name
+        self.duration_minutes = duration_minutes
+        self.effectiveness_score = effectiveness_score
+        self.usage_count = 0
+        self.helped_count = 0
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in Candidate.__slots__}
+
+
+class RecommendationIndex:
+    """Precomputed emotion x intensity-band rankings with O(1) lookups"""
+
+    def __init__(self, helps_with, default, db_path=None):
+        self.candidates = {
+            emotion.lower(): [Candidate(*row) for row in rows] for emotion, rows in helps_with.items()
+        }
+        self.candidates[DEFAULT_KEY] = [Candidate(*row) for row in default]
+        self.ranked = {}  # emotion -> [names best first, per intensity band]
+        self._lock = threading.Lock()
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS activity_feedback ("
+                "emotion TEXT NOT NULL, activity TEXT NOT NULL, "
+                "usage_count INTEGER NOT NULL, helped_count INTEGER NOT NULL, "
+                "PRIMARY KEY (emotion, activity))"
+            )
+            self._db.commit()
+            for emotion, activity, usage_count, helped_count in self._db.execute(
+                "SELECT emotion, activity, usage_count, helped_count FROM activity_feedback"
+            ):
+                candidate = self._find(emotion, activity)
+                if candidate is not None:
+                    candidate.usage_count = usage_count
+                    candidate.helped_count = helped_count
+
+        for emotion in self.candidates:
+            self._rerank(emotion)
+
+    def recommend(self, emotion_name, intensity):
+        """Activity names for an emotion, best first"""
+        ranked = self.ranked.get(emotion_name.lower()) or self.ranked[DEFAULT_KEY]
+        return list(ranked[intensity_band(intensity)])
+
+    def record_feedback(self, emotion_name, activity, helped=True):
+        """Count one report of whether an activity helped; returns the candidate or None"""
+        emotion = self._key(emotion_name)
+        with self._lock:
+            candidate = self._find(emotion, activity)
+            if candidate is None:
+                return None
+            candidate.usage_count += 1
+            candidate.helped_count += 1 if helped else 0
+            # Only this emotion's handful of candidates is re-sorted
+            self._rerank(emotion)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO activity_feedback (emotion, activity, usage_count, helped_count) "
+                    "VALUES (?, ?, 1, ?) ON CONFLICT (emotion, activity) DO UPDATE SET "
+                    "usage_count = usage_count + 1, helped_count = helped_count + excluded.helped_count",
+                    (emotion, candidate.name, 1 if helped else 0)
+                )
+                self._db.commit()
+            return candidate
+
+    def _key(self, emotion_name):
+        emotion = emotion_name.lower()
+        return emotion if emotion in self.candidates else DEFAULT_KEY
+
+    def _find(self, emotion, activity):
+        for candidate in self.candidates.get(emotion, []):
+            if candidate.name.lower() == activity.lower():
+                return candidate
+        return None
+
+    def _rerank(self, emotion):
+        candidates = self.candidates[emotion]
+        self.ranked[emotion] = [
+            [c.name for c in sorted(
+                candidates,
+                key=lambda c: (
+                    -activity_score(
+                        c.effectiveness_score, c.usage_count, c.helped_count, c.duration_minutes, intensity
+                    ),
+                    -c.usage_count
+                )
+            )]
+            for _, intensity in INTENSITY_BANDS
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_recommendation_index():
+    """The index shared by every walker, built (and its feedback loaded) on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RecommendationIndex(SEED_HELPS_WITH, DEFAULT_HELPS_WITH, app_db_path())
+        return _index
+
+
+def activity_recommendations(emotion_name, intensity):
+    """recommend_activities report"""
+    return {
+        "emotion": emotion_name,
+        "intensity": intensity,
+        "recommended_activities": get_recommendation_index().recommend(emotion_name, intensity)
+    }
+
+
+def activity_feedback(emotion_name, activity, helped=True, intensity=5.0):
+    """record_activity_feedback report"""
+    index = get_recommendation_index()
+    candidate = index.record_feedback(emotion_name, activity, helped)
+    if candidate is None:
+        return {"status": "error", "message": f"Unknown activity for {emotion_name}: {activity}"}
+    return {
+        "status": "success",
+        "emotion": emotion_name,
+        "activity": candidate.to_dict(),
+        "recommended_activities": index.recommend(emotion_name, intensity)
+    }
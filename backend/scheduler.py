@@ -0,0 +1,446 @@
+"""
+MindMate Summary Scheduler
+Weekly reflections and habit suggestions are generated off-peak, once a day
+at SUMMARY_GENERATION_TIME, instead of on every page view. The daily run
+regenerates only users with new entries since their last materialization,
+and the walkers just read the stored result. With a SQLite store the
+candidates are read from the store's commit sequence, so entries logged by
+any process count; with the in-memory store log_mood marks the user dirty.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import config
+from dashboard import emotional_trends
+from lexicon import detect_triggers
+from mind_functions import generate_habit_suggestions_by_llm, generate_weekly_reflection_by_llm
+from mood_db import app_db_path
+from mood_store import MoodStats, to_micros
+
+SUMMARY_KINDS = ("weekly_reflection", "habit_suggestions")
+
+# Served until a user's first materialization (and when generation is disabled)
+DEFAULT_REFLECTION = (
+    "This week you've experienced a range of emotions, which is completely normal. "
+    "Every feeling you had taught you something about yourself and your needs."
+)
+DEFAULT_PATTERNS = ["Showing up for yourself each day", "Being aware of your emotions"]
+REFLECTION_ENCOURAGEMENT = "Keep tracking your moods - you're building valuable self-awareness!"
+NEXT_WEEK_FOCUS = "Try to notice what activities or people help you feel your best."
+
+DEFAULT_HABIT_SUGGESTIONS = [
+    "Establish a consistent sleep schedule - aim for 7-9 hours per night",
+    "Practice 10 minutes of mindfulness or meditation daily",
+    "Move your body for at least 20 minutes each day",
+    "Connect with a friend or loved one regularly",
+    "Limit screen time before bed",
+    "Keep a gratitude journal - write 3 things you're grateful for each day"
+]
+HABIT_PRIORITY_FOCUS = "Start with just one small change this week"
+HABIT_ENCOURAGEMENT = "Small, consistent actions create lasting change. Be patient with yourself!"
+MAX_HABIT_SUGGESTIONS = 6
+
+
+def week_context(entries):
+    """Emotion counts, triggers and patterns from a user's week of entries"""
+    stats = MoodStats()
+    triggers = detect_triggers(*[entry.get("journal_text", "") for entry in entries])
+    for entry in entries:
+        stats.add(entry.mood_name, entry.intensity, to_micros(entry.timestamp) / 1_000_000)
+        for trigger in (entry.get("analysis") or {}).get("triggers") or []:
+            if trigger not in triggers:
+                triggers.append(trigger)
+
+    # Most frequent first; ties keep first-appearance order
+    weekly_emotions = dict(sorted(stats.emotion_counts.items(), key=lambda item: -item[1]))
+    dominant = list(weekly_emotions)[:3]
+    trends = emotional_trends(stats)
+    patterns = []
+    if dominant:
+        patterns.append(f"Most frequent feeling: {dominant[0]}")
+    if stats.count >= 3:
+        patterns.append(f"Mood trend: {trends['trend']}, {trends['volatility']} volatility")
+    if triggers:
+        patterns.append(f"Common triggers: {', '.join(triggers[:3])}")
+    return {
+        "weekly_emotions": weekly_emotions,
+        "dominant_emotions": dominant,
+        "triggers": triggers,
+        "intensity_average": stats.mean,
+        "entry_count": stats.count,
+        "patterns": patterns
+    }
+
+
+def parse_habits(text):
+    """Habit lines from a bulleted or numbered LLM list"""
+    habits = []
+    for line in text.splitlines():
+        line = re.sub(r"^(?:[-*•]|\d+[.)])\s*", "", line.strip()).strip()
+        if line:
+            habits.append(line)
+    return habits[:MAX_HABIT_SUGGESTIONS]
+
+
+class MaterializedSummaries:
+    """Latest generated summary per (user, kind), persisted in SQLite when configured.
+
+    With a database every read goes to it, so all processes sharing it see
+    the summaries whichever of them generated them.
+    """
+
+    def __init__(self, db_path=None):
+        self._rows = {}  # (user_id, kind) -> {"version", "generated_at", "payload"}, without a database
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS materialized_summaries ("
+                "user_id TEXT NOT NULL, kind TEXT NOT NULL, version INTEGER NOT NULL, "
+                "generated_at TEXT NOT NULL, payload TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, kind))"
+            )
+            # Which scheduled run has been claimed, and by which process
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS summary_runs ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), slot TEXT NOT NULL, claimed_by TEXT NOT NULL)"
+            )
+            self._db.execute("INSERT OR IGNORE INTO summary_runs (id, slot, claimed_by) VALUES (0, '', '')")
+            # Store changes already materialized, and users whose generation failed
+            self._db.execute("CREATE TABLE IF NOT EXISTS summary_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS summary_retries (user_id TEXT PRIMARY KEY)")
+            self._db.commit()
+        self._watermark = None
+        self._retries = set()
+
+    def get(self, user_id, kind):
+        with self._lock:
+            if self._db is None:
+                return self._rows.get((user_id, kind))
+            row = self._db.execute(
+                "SELECT version, generated_at, payload FROM materialized_summaries WHERE user_id = ? AND kind = ?",
+                (user_id, kind)
+            ).fetchone()
+        if row is None:
+            return None
+        version, generated_at, payload = row
+        return {"version": version, "generated_at": generated_at, "payload": json.loads(payload)}
+
+    def put(self, user_id, kind, version, payload, generated_at=None):
+        row = {
+            "version": version,
+            "generated_at": generated_at or datetime.now().isoformat(),
+            "payload": payload
+        }
+        with self._lock:
+            if self._db is None:
+                self._rows[(user_id, kind)] = row
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO materialized_summaries "
+                    "(user_id, kind, version, generated_at, payload) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, kind, version, row["generated_at"], json.dumps(payload))
+                )
+                self._db.commit()
+        return row
+
+    def progress(self):
+        """(store change token of the last completed run or None, users to retry)"""
+        with self._lock:
+            if self._db is None:
+                return self._watermark, set(self._retries)
+            row = self._db.execute("SELECT value FROM summary_state WHERE key = 'watermark'").fetchone()
+            retries = {user_id for user_id, in self._db.execute("SELECT user_id FROM summary_retries")}
+        return (json.loads(row[0]) if row else None), retries
+
+    def advance(self, watermark, retries):
+        """Record a completed run: changes up to watermark are done, retries are still owed"""
+        with self._lock:
+            if self._db is None:
+                self._watermark, self._retries = watermark, set(retries)
+                return
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO summary_state (key, value) VALUES ('watermark', ?)", (json.dumps(watermark),)
+                )
+                self._db.execute("DELETE FROM summary_retries")
+                self._db.executemany("INSERT INTO summary_retries (user_id) VALUES (?)", [(u,) for u in retries])
+
+    def claim_run(self, slot):
+        """Whether this process does the scheduled run at `slot` (ISO time): the
+        first process sharing the database to claim a slot runs it, the others skip it"""
+        if self._db is None:
+            return True
+        with self._lock:
+            with self._db:
+                claimed = self._db.execute(
+                    "UPDATE summary_runs SET slot = ?, claimed_by = ? WHERE id = 0 AND slot < ?",
+                    (slot, f"pid {os.getpid()}", slot)
+                ).rowcount
+        return claimed == 1
+
+
+class SummaryScheduler:
+    """Daily background materialization of weekly reflections and habit suggestions.
+
+    A summary's version is the user's highest commit sequence number when it
+    was generated, so users without new entries are skipped. With a shared
+    (SQLite) store the candidates for each run are the users with entries
+    committed since the last completed run, plus the ones that failed then;
+    both are kept in the summaries database, so a run sees every process's
+    writes. With the in-memory store the candidates are the users log_mood
+    marked dirty, and the first run after startup checks every user once.
+    When several processes share the database, each scheduled run is done by
+    the one that claims it first.
+    """
+
+    def __init__(self, summaries, run_at="08:00", workers=4, lookback_days=7, enabled=True):
+        self.summaries = summaries
+        self.run_at = run_at
+        self.workers = workers
+        self.lookback_days = lookback_days
+        self.enabled = enabled
+        self.store = None
+        self.last_run = None
+        self._dirty = set()
+        self._scanned = False
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, store):
+        """Use this mood store; starts the daily thread on first call"""
+        with self._lock:
+            self.store = store
+            if self.enabled and self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="summary-scheduler", daemon=True)
+                self._thread.start()
+
+    def mark_dirty(self, user_id):
+        if getattr(self.store, "shared", False):
+            # Read back from the store's commit sequence instead
+            return
+        with self._lock:
+            self._dirty.add(user_id)
+
+    def next_run(self, now=None):
+        """Next SUMMARY_GENERATION_TIME (local time) strictly after now"""
+        now = now or datetime.now()
+        hour, minute = (int(part) for part in self.run_at.split(":"))
+        run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return run if run > now else run + timedelta(days=1)
+
+    def version(self, user_id):
+        return self.store.window_version(user_id, 0)[1]
+
+    def is_stale(self, user_id, row):
+        """Whether the user has logged entries since this summary was generated"""
+        return self.store is not None and row["version"] != self.version(user_id)
+
+    def pending(self):
+        """(users the next run would materialize, shared store token after them)"""
+        if getattr(self.store, "shared", False):
+            watermark, retries = self.summaries.progress()
+            changed, token = self.store.changed_users(watermark)
+            return retries.union(changed), token
+        with self._lock:
+            users = set(self._dirty)
+            if not self._scanned:
+                users.update(self.store.user_ids())
+        return users, None
+
+    def run(self, now=None):
+        """Materialize every user with new entries; returns run stats"""
+        if self.store is None:
+            return None
+        with self._run_lock:
+            shared = getattr(self.store, "shared", False)
+            if shared:
+                users, token = self.pending()
+            else:
+                # Users marked while this run works go into a fresh set
+                with self._lock:
+                    users, self._dirty = self._dirty, set()
+                    if not self._scanned:
+                        users.update(self.store.user_ids())
+                        self._scanned = True
+
+            started = datetime.now()
+            outcomes = {"generated": 0, "skipped": 0, "inactive": 0, "failed": 0}
+            failed = set()
+            try:
+                with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="summary") as pool:
+                    for user_id, outcome in zip(users, pool.map(lambda u: self.materialize(u, now), users)):
+                        outcomes[outcome] += 1
+                        if outcome == "failed":
+                            failed.add(user_id)
+            except BaseException:
+                # The whole run is owed again (a shared store's watermark has not moved);
+                # users already materialized are skipped by their version next time
+                if not shared:
+                    with self._lock:
+                        self._dirty.update(users)
+                raise
+            # Failures are tried again on the next run
+            if shared:
+                self.summaries.advance(token, failed)
+            else:
+                for user_id in failed:
+                    self.mark_dirty(user_id)
+
+            self.last_run = dict(
+                outcomes,
+                users=len(users),
+                started_at=started.isoformat(),
+                elapsed_ms=(datetime.now() - started).total_seconds() * 1000
+            )
+            return self.last_run
+
+    def materialize(self, user_id, now=None, force=False):
+        """Regenerate one user's summaries; "generated", "skipped", "inactive" or "failed" """
+        version = self.version(user_id)
+        kinds = [kind for kind in SUMMARY_KINDS if self.kind_enabled(kind)]
+        if not force and all(
+            (self.summaries.get(user_id, kind) or {}).get("version") == version for kind in kinds
+        ):
+            return "skipped"
+        entries = self.store.window(user_id, self.lookback_days, now)
+        if not entries:
+            return "inactive"
+
+        context = week_context(entries)
+        failed = False
+        if "weekly_reflection" in kinds:
+            reflection = generate_weekly_reflection_by_llm(
+                context["weekly_emotions"], context["patterns"],
+                context["intensity_average"], context["entry_count"], user_id
+            )
+            if isinstance(reflection, dict):
+                failed = True
+            else:
+                self.summaries.put(user_id, "weekly_reflection", version, {
+                    "reflection": reflection.strip(),
+                    "patterns": context["patterns"],
+                    "weekly_emotions": context["weekly_emotions"]
+                })
+        if "habit_suggestions" in kinds:
+            habits = generate_habit_suggestions_by_llm(
+                context["triggers"], context["dominant_emotions"], context["intensity_average"], user_id
+            )
+            habits = [] if isinstance(habits, dict) else parse_habits(habits)
+            if not habits:
+                failed = True
+            else:
+                self.summaries.put(user_id, "habit_suggestions", version, {
+                    "habit_suggestions": habits,
+                    "triggers": context["triggers"],
+                    "dominant_emotions": context["dominant_emotions"]
+                })
+        return "failed" if failed else "generated"
+
+    def status(self):
+        """Next run time, last run stats and users pending for the next run"""
+        return {
+            "enabled": self.enabled,
+            "next_run": self.next_run().isoformat(),
+            "last_run": self.last_run,
+            "dirty_users": len(self.pending()[0]) if self.store is not None else 0
+        }
+
+    def stop(self):
+        self._stop.set()
+
+    def kind_enabled(self, kind):
+        if kind == "weekly_reflection":
+            return config.ENABLE_WEEKLY_SUMMARIES
+        return config.ENABLE_HABIT_SUGGESTIONS
+
+    def _loop(self):
+        while not self._stop.is_set():
+            slot = self.next_run()
+            if self._stop.wait(max((slot - datetime.now()).total_seconds(), 0)):
+                return
+            try:
+                if self.summaries.claim_run(slot.isoformat()):
+                    self.run()
+            except Exception as e:
+                print(f"⚠ Summary materialization failed: {e}")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_summary_scheduler():
+    """The scheduler shared by every walker, built (with its summary table) on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SummaryScheduler(
+                MaterializedSummaries(app_db_path()),
+                run_at=config.SUMMARY_GENERATION_TIME,
+                workers=config.SUMMARY_WORKERS,
+                lookback_days=config.DAYS_IN_WEEK,
+                enabled=config.SUMMARY_SCHEDULER_ENABLED
+            )
+        return _scheduler
+
+
+def mark_summary_dirty(store, user_id):
+    """Called on every new mood: the user's summaries are regenerated on the next run
+    (shared stores are read back from their commit sequence instead)"""
+    scheduler = get_summary_scheduler()
+    scheduler.attach(store)
+    scheduler.mark_dirty(user_id)
+
+
+def _materialized(store, user_id, kind):
+    """(stored row or None, stale flag). Views never generate: a user with
+    nothing materialized yet gets the defaults until the scheduled run."""
+    scheduler = get_summary_scheduler()
+    scheduler.attach(store)
+    if not user_id or not scheduler.kind_enabled(kind):
+        return None, False
+    row = scheduler.summaries.get(user_id, kind)
+    if row is None:
+        return None, False
+    return row, scheduler.is_stale(user_id, row)
+
+
+def weekly_reflection(store, user_id, detected_patterns=None):
+    """generate_weekly_reflection report from the user's materialized reflection"""
+    row, stale = _materialized(store, user_id, "weekly_reflection")
+    payload = row["payload"] if row else {}
+    return {
+        "user_id": user_id,
+        "reflection": payload.get("reflection", DEFAULT_REFLECTION),
+        "patterns": detected_patterns or payload.get("patterns") or DEFAULT_PATTERNS,
+        "encouragement": REFLECTION_ENCOURAGEMENT,
+        "next_week_focus": NEXT_WEEK_FOCUS,
+        "generated_at": row["generated_at"] if row else None,
+        "materialized": row is not None,
+        "stale": stale
+    }
+
+
+def habit_suggestions(store, user_id):
+    """suggest_habit_improvements report from the user's materialized suggestions"""
+    row, stale = _materialized(store, user_id, "habit_suggestions")
+    payload = row["payload"] if row else {}
+    return {
+        "habit_suggestions": payload.get("habit_suggestions", DEFAULT_HABIT_SUGGESTIONS),
+        "priority_focus": HABIT_PRIORITY_FOCUS,
+        "encouragement": HABIT_ENCOURAGEMENT,
+        "generated_at": row["generated_at"] if row else None,
+        "materialized": row is not None,
+        "stale": stale
+    }
+
@@ -100,6 +100,150 @@ SEED_SUGGESTIONS = [
     },
 ]
 
+# Activities recommended per emotion, mirroring activity nodes and their
+# helps_with edges: (text, duration_minutes, prior effectiveness 0-1)
+SEED_HELPS_WITH = {
+    "sad": [
+        ("Take a walk in nature", 30, 0.75),
+        ("Listen to uplifting music", 15, 0.7),
+        ("Call a friend or family member", 20, 0.75),
+    ],
+    "stressed": [
+        ("Deep breathing exercises", 5, 0.75),
+        ("Meditation or mindfulness", 10, 0.75),
+        ("Light exercise or stretching", 20, 0.7),
+    ],
+    "anxious": [
+        ("Progressive muscle relaxation", 10, 0.75),
+        ("Journaling your thoughts", 15, 0.7),
+        ("Nature walk or time outdoors", 30, 0.7),
+    ],
+    "happy": [
+        ("Share your joy with others", 15, 0.75),
+        ("Creative activity or hobby", 45, 0.7),
+        ("Help someone in need", 30, 0.7),
+    ],
+    "angry": [
+        ("Physical exercise", 30, 0.75),
+        ("Cool down time alone", 15, 0.75),
+        ("Express feelings in a healthy way", 15, 0.7),
+    ],
+    "overwhelmed": [
+        ("Break tasks into smaller steps", 15, 0.75),
+        ("Take a short break", 10, 0.75),
+        ("Prioritize what's most important", 15, 0.7),
+    ],
+    "lonely": [
+        ("Reach out to a friend", 20, 0.75),
+        ("Join a community activity", 60, 0.7),
+        ("Video call a loved one", 30, 0.7),
+    ],
+    "excited": [
+        ("Channel energy into creative work", 45, 0.75),
+        ("Share your excitement", 15, 0.7),
+        ("Plan something fun", 20, 0.7),
+    ],
+    "calm": [
+        ("Enjoy the moment", 5, 0.75),
+        ("Practice gratitude", 10, 0.75),
+        ("Gentle yoga or stretching", 20, 0.7),
+    ],
+    "content": [
+        ("Reflect on positive aspects", 10, 0.75),
+        ("Continue healthy routines", 30, 0.7),
+        ("Express gratitude", 5, 0.7),
+    ],
+    "peaceful": [
+        ("Meditation or quiet reflection", 10, 0.75),
+        ("Read something inspiring", 30, 0.7),
+        ("Spend time in nature", 30, 0.7),
+    ],
+}
+
+# Recommended for emotions without their own list
+DEFAULT_HELPS_WITH = [
+    ("Rest and self-care", 30, 0.7),
+    ("Talk to someone you trust", 20, 0.7),
+    ("Do something that brings you comfort", 30, 0.7),
+]
+
+# Daily affirmations per emotion
+SEED_AFFIRMATIONS = {
+    "sad": "You are stronger than you know, and this feeling will pass.",
+    "stressed": "Take it one step at a time. You've got this.",
+    "anxious": "Breathe. You are safe. You are capable.",
+    "happy": "Your joy is a gift. Keep shining!",
+    "overwhelmed": "It's okay to ask for help. You don't have to do it all alone.",
+}
+DEFAULT_AFFIRMATION = "You are worthy of love and kindness."
+
+# Canned support content: what the support walkers answer without the LLM,
+# and what generated parts fall back to when a request is not admitted or fails
+CANNED_SUPPORT_MESSAGES = {
+    "sad": "I understand you're feeling sad right now. It's okay to feel this way. Remember that emotions are temporary, and brighter days are ahead. Consider reaching out to someone you trust or doing something kind for yourself today.",
+    "stressed": "Stress can feel overwhelming, but you're handling more than you realize. Take a moment to breathe deeply. Break down your tasks into smaller, manageable steps. You don't have to tackle everything at once.",
+    "anxious": "Anxiety is tough, but you're tougher. Try grounding yourself in the present moment - notice 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste. You are safe right now.",
+    "happy": "I'm so glad you're feeling happy! This positive energy is wonderful. Take a moment to savor this feeling and maybe share your joy with someone else. You deserve this happiness.",
+    "overwhelmed": "Feeling overwhelmed is a sign you care deeply. It's okay to pause and prioritize. You don't have to do everything perfectly or all at once. What's one small thing you can focus on right now?",
+    "angry": "Your anger is valid. It's telling you something needs attention. Take some deep breaths, give yourself space if needed, and then think about what you need to feel better. Physical activity or creative expression can help process these feelings.",
+    "lonely": "Loneliness is difficult. Remember that feeling alone doesn't mean you are alone. Consider reaching out to someone, even with a simple message. Your presence matters to people, even when it doesn't feel that way."
+}
+DEFAULT_SUPPORT_MESSAGE = "Thank you for sharing how you're feeling. Every emotion you experience is valid and part of being human. Be gentle with yourself today. If you need support, don't hesitate to reach out to someone you trust."
+
+COPING_STRATEGIES = [
+    "Practice deep breathing for 5 minutes",
+    "Take a short walk outside",
+    "Write in your journal",
+    "Connect with a supportive friend",
+    "Engage in a calming activity you enjoy"
+]
+
+CANNED_BREATHING_EXERCISES = {
+    "stressed": {
+        "name": "4-7-8 Breathing",
+        "description": "Breathe in for 4 counts, hold for 7, exhale for 8. This activates your relaxation response.",
+        "steps": [
+            "Sit comfortably",
+            "Breathe in through nose for 4 counts",
+            "Hold breath for 7 counts",
+            "Exhale through mouth for 8 counts",
+            "Repeat 4 times"
+        ]
+    },
+    "anxious": {
+        "name": "Box Breathing",
+        "description": "Breathe in a square pattern to calm your nervous system.",
+        "steps": [
+            "Breathe in for 4 counts",
+            "Hold for 4 counts",
+            "Exhale for 4 counts",
+            "Hold for 4 counts",
+            "Repeat 5-10 times"
+        ]
+    },
+    "default": {
+        "name": "Simple Deep Breathing",
+        "description": "Basic deep breathing to center yourself.",
+        "steps": [
+            "Find a comfortable position",
+            "Breathe in slowly through nose for 4 counts",
+            "Breathe out slowly through mouth for 6 counts",
+            "Repeat for 5 minutes"
+        ]
+    }
+}
+
+CANNED_AFFIRMATIONS = {
+    "sad": "I am resilient and capable of weathering this storm. Better days are coming.",
+    "stressed": "I release what I cannot control and focus on what I can. I am doing my best.",
+    "anxious": "I am safe. I am grounded. I have everything I need in this moment.",
+    "happy": "I deserve this joy and I welcome more happiness into my life.",
+    "overwhelmed": "I take things one step at a time. I am capable and strong.",
+    "angry": "My feelings are valid. I choose to process them in healthy ways.",
+    "lonely": "I am worthy of connection and love. I reach out with courage."
+}
+DEFAULT_CANNED_AFFIRMATION = "I am worthy of peace, happiness, and self-compassion."
+
 # Sample journal entries for testing
 SEED_JOURNAL_ENTRIES = [
     {
@@ -147,26 +291,52 @@ def export_seed_data():
     
     return seed_data
 
+# Lookup indexes, built once at import
+EMOTIONS_BY_NAME = {emotion["name"].lower(): emotion for emotion in SEED_EMOTIONS}
+SUGGESTIONS_BY_GROUP = {
+    "distress": [s for s in SEED_SUGGESTIONS if s["type"] in ["breathing_exercise", "coping_tip"]],
+    "low": [s for s in SEED_SUGGESTIONS if s["type"] in ["affirmation", "coping_tip"]],
+    "default": SEED_SUGGESTIONS[:3],
+}
+SUGGESTION_GROUPS = {
+    "anxious": "distress",
+    "stressed": "distress",
+    "overwhelmed": "distress",
+    "sad": "low",
+    "lonely": "low",
+}
+
 def get_emotion_by_name(name):
     """Get emotion from seed data"""
-    for emotion in SEED_EMOTIONS:
-        if emotion["name"].lower() == name.lower():
-            return emotion
-    return None
+    return EMOTIONS_BY_NAME.get(name.lower())
 
 def get_suggestions_for_emotion(emotion_name):
     """Get relevant suggestions for an emotion"""
     # This is a simple mapping - could be enhanced with ML
-    relevant_suggestions = []
-    
-    if emotion_name.lower() in ["anxious", "stressed", "overwhelmed"]:
-        relevant_suggestions = [s for s in SEED_SUGGESTIONS if s["type"] in ["breathing_exercise", "coping_tip"]]
-    elif emotion_name.lower() in ["sad", "lonely"]:
-        relevant_suggestions = [s for s in SEED_SUGGESTIONS if s["type"] in ["affirmation", "coping_tip"]]
-    else:
-        relevant_suggestions = SEED_SUGGESTIONS[:3]
-    
-    return relevant_suggestions
+    group = SUGGESTION_GROUPS.get(emotion_name.lower(), "default")
+    return list(SUGGESTIONS_BY_GROUP[group])
+
+def get_affirmation(emotion_name):
+    """Affirmation for an emotion"""
+    return SEED_AFFIRMATIONS.get(emotion_name.lower(), DEFAULT_AFFIRMATION)
+
+def canned_support_message(emotion_name):
+    """Support message for an emotion, without the LLM"""
+    return CANNED_SUPPORT_MESSAGES.get(emotion_name.lower(), DEFAULT_SUPPORT_MESSAGE)
+
+def canned_breathing_exercise(emotion_name):
+    """Breathing exercise (name, description, steps) for an emotion, without the LLM"""
+    return CANNED_BREATHING_EXERCISES.get(emotion_name.lower(), CANNED_BREATHING_EXERCISES["default"])
+
+def canned_breathing_text(emotion_name):
+    """The canned breathing exercise as plain text, like a generated one"""
+    exercise = canned_breathing_exercise(emotion_name)
+    steps = "\n".join(f"{i}. {step}" for i, step in enumerate(exercise["steps"], 1))
+    return f"{exercise['name']}: {exercise['description']}\n{steps}"
+
+def canned_affirmation(emotion_name):
+    """Support affirmation for an emotion, without the LLM"""
+    return CANNED_AFFIRMATIONS.get(emotion_name.lower(), DEFAULT_CANNED_AFFIRMATION)
 
 if __name__ == "__main__":
     # Export seed data to JSON files
@@ -0,0 +1,140 @@
+"""
+MindMate Support Message Streaming Server
+Server-sent events endpoint that forwards LLM output to the client as it is generated.
+Runs next to `jac serve`, which only returns complete walker reports.
+
+Usage:
+    python support_stream.py            # listens on STREAM_HOST:STREAM_PORT
+
+Endpoint:
+    POST /stream/support_message
+    {"emotion_name": "sad", "intensity_score": 4, "detected_triggers": [], "user_context": "", "user_id": ""}
+
+    GET /metrics                            this process's metrics (Prometheus text)
+
+Events:
+    data: {"delta": "..."}                  one per piece of generated text
+    event: done   data: {"message": "..."}  full message once generation finishes
+    event: error  data: {"error": "..."}    generation failed (partial text may precede it)
+
+A request that is not admitted (see admission.py) or fails before any text
+was sent gets the canned support message as one delta instead; its done
+event carries "fallback": true and the "error".
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from metrics import CONTENT_TYPE, registry
+from mind_functions import stream_message_by_llm
+from seed_data import canned_support_message
+
+
+class SupportStreamHandler(BaseHTTPRequestHandler):
+    """Streams generate_support_message output as server-sent events"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._send_cors_headers()
+        self.send_header("Content-Length", "0")
+        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self):
+        # Streamed LLM calls are recorded in this process, not by jac serve
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/stream/support_message":
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("body is not a JSON object")
+            emotion = body["emotion_name"]
+            intensity = body["intensity_score"]
+        except (ValueError, KeyError) as e:
+            self.send_error(400, f"Invalid request: {e}")
+            return
+
+        self.send_response(200)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        parts = []
+        stream = stream_message_by_llm(
+            emotion,
+            intensity,
+            body.get("detected_triggers", []),
+            body.get("user_context", ""),
+            body.get("user_id", "")
+        )
+        try:
+            for delta in stream:
+                parts.append(delta)
+                self._event({"delta": delta})
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away; stop generating instead of finishing for nobody
+            return
+        except Exception as e:
+            if parts:
+                self._event({"error": str(e)}, event="error")
+            else:
+                message = canned_support_message(emotion)
+                self._event({"delta": message})
+                self._event({"message": message, "fallback": True, "error": str(e)}, event="done")
+        else:
+            self._event({"message": "".join(parts)}, event="done")
+        finally:
+            stream.close()
+        self._write_chunk(b"")
+
+    def _event(self, payload, event=None):
+        lines = f"event: {event}\n" if event else ""
+        lines += f"data: {json.dumps(payload)}\n\n"
+        self._write_chunk(lines.encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_cors_headers(self):
+        origin = self.headers.get("Origin")
+        if origin in config.CORS_ORIGINS:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+
+
+def create_server(host=None, port=None):
+    server = ThreadingHTTPServer(
+        (host or config.STREAM_HOST, config.STREAM_PORT if port is None else port), SupportStreamHandler
+    )
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    server = create_server()
+    host, port = server.server_address[:2]
+    print(f"✓ Support stream server listening on http://{host}:{port}/stream/support_message")
+    server.serve_forever()
@@ -0,0 +1,93 @@
+"""
+MindMate Test Fixtures
+Offline configuration (in-memory store, no cache, no metrics port), fake LLM
+providers started in-process, the support stream server on a free port and
+the walkers of walkers.jac run in-process.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+# Set before config is imported: nothing is written to disk and no real provider is called
+os.environ.update({
+    "DATABASE_URL": "sqlite://",
+    "LLM_PROVIDER": "openai",
+    "LLM_ROUTES": "",
+    "OPENAI_API_KEY": "test",
+    "OPENAI_ENDPOINT": "http://127.0.0.1:9/v1/chat/completions",
+    "LLM_CACHE_ENABLED": "False",
+    "LLM_ADMISSION_ENABLED": "False",
+    "METRICS_PORT": "0",
+    "ANALYSIS_QUEUE_ENABLED": "False",
+    "SUMMARY_SCHEDULER_ENABLED": "False"
+})
+
+import mind_functions
+from fake_llm_server import FakeLLMServer
+from llm_client import LLMClient
+from llm_providers import LLMRouter
+from support_stream import create_server
+
+
+@pytest.fixture
+def fake_llm():
+    """start(**options) -> a running FakeLLMServer, stopped after the test"""
+    servers = []
+
+    def start(**options):
+        server = FakeLLMServer(**options)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def use_providers(monkeypatch):
+    """use(*servers) -> the router every LLM call goes through for this test,
+    failing over from each fake server to the next"""
+
+    def use(*servers, admission=None):
+        clients = {
+            f"provider{i}": LLMClient(server.url, "test", "fake", max_retries=0)
+            for i, server in enumerate(servers)
+        }
+        router = LLMRouter(clients, {"default": list(clients)}, admission=admission)
+        monkeypatch.setattr(mind_functions, "_llm", router)
+        return router
+
+    return use
+
+
+@pytest.fixture
+def stream_url():
+    """URL of a support stream server running for this test"""
+    server = create_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/stream/support_message"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def spawn():
+    """spawn(walker_name, **fields) -> the reports of that walker run on root.
+    Every test shares one in-memory database, so each should use its own user ids."""
+    from jaclang import JacRuntime as Jac
+
+    (walkers,) = Jac.jac_import("walkers", base_path=BACKEND_DIR)
+
+    def run(name, **fields):
+        return Jac.spawn(Jac.root(), getattr(walkers, name)(**fields)).reports
+
+    return run
@@ -0,0 +1,27 @@
+import mind_functions
+from admission import AdmissionController
+
+
+def test_background_analysis_is_never_interactive(fake_llm, use_providers):
+    # Even with "analysis" listed as interactive, queued and backfilled journals stay background
+    admission = AdmissionController(0, 0, ["support_message", "analysis"])
+    use_providers(fake_llm(), admission=admission)
+
+    mind_functions.analyze_journals(["Slept badly and the deadline is tomorrow"])
+    assert admission.stats()["background_admitted"] == 1
+    assert admission.stats()["interactive_admitted"] == 0
+
+    mind_functions.analyze_emotion_by_llm("A calm morning walk")
+    assert admission.stats()["interactive_admitted"] == 1
+
+
+def test_mixed_user_batches_are_charged_per_user(fake_llm, use_providers):
+    admission = AdmissionController(0, 100000, ["support_message"])
+    use_providers(fake_llm(), admission=admission)
+
+    texts = ["Rough day at work", "Long walk with a friend", "Could not sleep again"]
+    results = mind_functions.analyze_journals(texts, ["u1", "u2", "u1"])
+
+    assert len(results) == 3 and all("error" not in result for result in results)
+    assert set(admission.users) == {"u1", "u2"}
+    assert admission.stats()["background_admitted"] == 2
@@ -0,0 +1,66 @@
+from analysis_queue import AnalysisQueue
+from mood_store import MoodStore
+
+
+def analyze(texts, user_ids):
+    return [{"emotions": ["calm"], "intensity": 4, "sentiment": "positive"} for _ in texts]
+
+
+def make_queue(**options):
+    return AnalysisQueue(analyze, workers=1, retry_delay=0.01, batch_size=1, **options)
+
+
+def test_analysis_is_written_back():
+    store = MoodStore()
+    entry = store.add("u1", "calm", 4, "A quiet walk after work")
+    jobs = make_queue()
+
+    assert jobs.submit(store, entry) == "queued"
+    assert jobs.wait_idle(5)
+    assert jobs.status("u1", entry.entry_id)["status"] == "done"
+    analysis = store.entry("u1", entry.entry_id)["analysis"]
+    assert analysis["emotions"] == ["calm"]
+    assert "work stress" in analysis["triggers"]
+
+
+def test_failed_analyses_are_retried_then_fall_back_to_keywords():
+    calls = []
+
+    def failing(texts, user_ids):
+        calls.append(texts)
+        raise RuntimeError("provider down")
+
+    store = MoodStore()
+    entry = store.add("u1", "sad", 6, "I feel so sad and tired")
+    jobs = AnalysisQueue(failing, workers=1, max_attempts=2, retry_delay=0.01)
+
+    jobs.submit(store, entry)
+    assert jobs.wait_idle(5)
+    assert len(calls) == 2
+    state = jobs.status("u1", entry.entry_id)
+    assert state == {"status": "done", "attempts": 2, "error": "provider down"}
+    assert store.entry("u1", entry.entry_id)["analysis"]["source"] == "keywords"
+
+
+def test_worker_survives_a_failing_batch(monkeypatch):
+    store = MoodStore()
+    first = store.add("u1", "calm", 4, "First journal")
+    second = store.add("u1", "calm", 4, "Second journal")
+    jobs = make_queue()
+    finish = jobs._finish
+    failures = []
+
+    def finish_once(job, result):
+        if not failures:
+            failures.append(job.entry_id)
+            raise RuntimeError("status store unavailable")
+        finish(job, result)
+
+    monkeypatch.setattr(jobs, "_finish", finish_once)
+    jobs.submit(store, first)
+    jobs.submit(store, second)
+
+    assert jobs.wait_idle(5)
+    assert jobs.status("u1", first.entry_id)["status"] == "failed"
+    assert jobs.status("u1", second.entry_id)["status"] == "done"
+    assert jobs.stats()["in_flight"] == 0
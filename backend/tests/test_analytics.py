@@ -0,0 +1,80 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from analytics import Cohort, mood_polarity, score_cohort
+from mind_functions import analyze_trends, calculate_intensity_trend, calculate_volatility
+from mood_store import MoodStore
+
+NOW = datetime(2025, 1, 20, 15, 30)
+MOODS = ["happy", "Sad", "calm", "anxious", "tired", "joyful", "worried", "content", "angry"]
+
+
+def random_timelines(rng, users=60):
+    timelines = {}
+    for n in range(users):
+        size = rng.choice([0, 1, 2, 3, rng.randint(4, 40)])
+        # Whole and tenth intensities put many users exactly on a +/-1 threshold
+        timelines[f"user-{n}"] = [
+            {"mood_name": rng.choice(MOODS), "intensity": rng.choice([rng.randint(1, 10), rng.randint(10, 100) / 10])}
+            for _ in range(size)
+        ]
+    return timelines
+
+
+def streaks(entries):
+    longest = current = 0
+    for entry in entries:
+        current = current + 1 if mood_polarity(entry["mood_name"]) == 1 else 0
+        longest = max(longest, current)
+    return longest, current
+
+
+def test_cohort_metrics_match_the_per_user_functions():
+    rng = random.Random(11)
+    for _ in range(20):
+        timelines = random_timelines(rng)
+        scores = score_cohort(Cohort.from_timelines(timelines))
+        for i, entries in enumerate(timelines.values()):
+            assert scores["entries"][i] == len(entries)
+            assert scores["intensity_trend"][i] == calculate_intensity_trend(entries)
+            assert scores["volatility"][i] == pytest.approx(calculate_volatility(entries), rel=1e-9, abs=1e-9)
+            assert scores["mood_trend"][i] == analyze_trends(Counter(entry["mood_name"] for entry in entries))
+            assert (scores["longest_positive_streak"][i], scores["current_positive_streak"][i]) == streaks(entries)
+
+
+def test_users_on_a_trend_threshold_get_the_exact_label():
+    # Halves average 3.4666... and 4.4666...: exactly 1 apart, but not in floating point
+    entries = [{"mood_name": "calm", "intensity": value} for value in (8.3, 1.1, 1.0, 2.8, 8.3, 2.3)]
+    assert calculate_intensity_trend(entries) == "stable"
+    assert score_cohort(Cohort.from_timelines({"u1": entries}))["intensity_trend"][0] == "stable"
+
+
+def test_rolling_means_stay_within_each_user():
+    cohort = Cohort.from_timelines({
+        "a": [{"mood_name": "calm", "intensity": value} for value in (1, 2, 3, 4)],
+        "b": [{"mood_name": "calm", "intensity": value} for value in (10, 20)]
+    })
+    assert score_cohort(cohort)["rolling_mean"].tolist() == [1, 1.5, 2, 3, 10, 15]
+
+
+def test_store_windows_pack_like_timelines():
+    rng = random.Random(12)
+    store = MoodStore()
+    for n in range(30):
+        for _ in range(rng.randint(1, 20)):
+            moment = NOW - timedelta(hours=rng.randint(0, 24 * 14))
+            store.add(f"user-{n}", rng.choice(MOODS), rng.randint(1, 10), "", moment.isoformat())
+
+    for days in (0, 1, 7):
+        packed = Cohort.from_store(store, days, NOW)
+        expected = Cohort.from_timelines({
+            user_id: [entry.to_dict() for entry in store.window(user_id, days, NOW)] for user_id in store.user_ids()
+        })
+        assert packed.user_ids == expected.user_ids
+        assert np.array_equal(packed.offsets, expected.offsets)
+        assert np.array_equal(packed.intensities, expected.intensities)
+        assert np.array_equal(packed.polarity, expected.polarity)
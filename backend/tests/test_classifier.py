@@ -0,0 +1,100 @@
+import mind_functions
+from classifier import EmotionClassifier, evaluate, load_classifier
+from fake_llm_server import ANALYSIS_REPLY
+from mind_functions import TieredAnalyzer
+
+EXAMPLES = [
+    ("So much pressure at work, another deadline", "stressed", 7),
+    ("Deadlines everywhere and my boss keeps adding more", "stressed", 8),
+    ("Had a lovely dinner with friends and laughed a lot", "happy", 3),
+    ("Sunny walk in the park, feeling great today", "happy", 2),
+    ("Miss my family, the flat feels empty tonight", "lonely", 6),
+    ("Nobody to talk to again this weekend", "lonely", 7),
+] * 5
+
+
+class FixedClassifier:
+    """Predicts a set confidence per journal"""
+
+    def __init__(self, confidences):
+        self.confidences = confidences
+
+    def predict(self, text):
+        return "stressed", self.confidences[text], 6.0
+
+
+def escalate_to(calls):
+    def escalate(texts, user_id, priority):
+        calls.append(list(texts))
+        return [{"source": "llm", "text": text} for text in texts]
+    return escalate
+
+
+def test_only_journals_below_the_threshold_are_escalated():
+    calls = []
+    texts = ["sure", "at threshold", "just below", "unsure"]
+    analyzer = TieredAnalyzer(
+        FixedClassifier({"sure": 0.95, "at threshold": 0.6, "just below": 0.5999, "unsure": 0.2}),
+        escalate_to(calls), 0.6
+    )
+
+    results = analyzer.analyze_batch(texts)
+    assert [result["source"] for result in results] == ["classifier", "classifier", "llm", "llm"]
+    assert results[2]["text"] == "just below"
+    # The escalated journals go out together, in order
+    assert calls == [["just below", "unsure"]]
+    stats = analyzer.stats()
+    assert (stats["classified"], stats["escalated"], stats["escalation_rate"]) == (2, 2, 0.5)
+
+
+def test_without_a_model_every_journal_is_escalated():
+    calls = []
+    analyzer = TieredAnalyzer(None, escalate_to(calls), 0.6)
+    analyzer.analyze_batch(["one", "two"])
+    assert calls == [["one", "two"]]
+    assert analyzer.stats()["model_loaded"] is False
+    assert analyzer.analyze_batch([]) == [] and len(calls) == 1
+
+
+def test_escalated_journals_share_one_llm_batch(fake_llm, use_providers):
+    provider = fake_llm()
+    use_providers(provider)
+    analyzer = TieredAnalyzer(
+        FixedClassifier({"Barely slept": 0.3, "Deadline again": 0.4, "Great day": 0.9}),
+        mind_functions.analyzer.analyze_emotions_batch, 0.6
+    )
+
+    results = analyzer.analyze_batch(["Barely slept", "Great day", "Deadline again"])
+    assert results[0] == results[2] == ANALYSIS_REPLY
+    assert results[1]["source"] == "classifier"
+    assert provider.request_count == 1
+
+
+def test_escalation_matches_the_offline_evaluation(tmp_path):
+    model = EmotionClassifier(["stressed", "happy", "lonely"], dims=2 ** 12).fit(EXAMPLES)
+    path = str(tmp_path / "classifier.json")
+    model.save(path)
+    loaded = load_classifier(path)
+    unseen = [
+        ("Another deadline at work", "stressed", None),
+        ("Laughed with friends at dinner", "happy", None),
+        ("The flat is empty tonight", "lonely", None),
+        ("My boss and the deadline", "stressed", None),
+        ("Nobody called", "lonely", None),
+        ("Just a day", "happy", None),
+    ]
+    # Weights are saved rounded, so compare at that precision
+    for text, _, _ in unseen:
+        emotion, confidence, _ = model.predict(text)
+        assert loaded.predict(text)[0] == emotion
+        assert abs(loaded.predict(text)[1] - confidence) < 1e-3
+
+    rates = []
+    for threshold in (0.45, 0.5, 0.6):
+        analyzer = TieredAnalyzer(loaded, escalate_to([]), threshold)
+        analyzer.analyze_batch([text for text, _, _ in unseen])
+        rates.append(analyzer.stats()["escalation_rate"])
+        assert rates[-1] == evaluate(loaded, unseen, threshold)["escalation_rate"]
+    # A higher threshold keeps fewer journals
+    assert 0 < rates[0] < rates[1] < rates[2] < 1
+    assert load_classifier(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,56 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from mood_db import open_mood_db
+
+MOODS = ["happy", "Sad", "calm", "anxious", "stressed", "lonely", "joyful", "angry"]
+JOURNALS = ["", "Another deadline at work", "Barely slept", "Argued with my partner", "Nice walk"]
+
+
+def seed(user_id, rng, now):
+    """Entries over the last three weeks, a fifth of them logged late (back-dated)"""
+    store = open_mood_db()
+    moment = now - timedelta(days=21)
+    for _ in range(rng.randint(0, 40)):
+        moment += timedelta(minutes=rng.randint(10, 60 * 20))
+        logged = moment - timedelta(hours=rng.randint(1, 72)) if rng.random() < 0.2 else moment
+        if logged > now:
+            break
+        store.add(user_id, rng.choice(MOODS), rng.uniform(1, 10), rng.choice(JOURNALS), logged.isoformat())
+
+
+@pytest.mark.parametrize("seed_value", range(15))
+def test_dashboard_sections_match_the_separate_walkers(spawn, seed_value):
+    rng = random.Random(seed_value)
+    user_id = f"dashboard-{seed_value}"
+    seed(user_id, rng, datetime.now())
+    num_days, trend_days, common_days = rng.choice([(7, 14, 7), (1, 3, 30), (7, 0, 3)])
+
+    dashboard, = spawn(
+        "get_dashboard", user_id=user_id, num_days=num_days, trend_days=trend_days, common_days=common_days,
+        mood_fields=["entry_id", "mood_name", "intensity", "timestamp"]
+    )
+    daily, = spawn("get_daily_summary", user_id=user_id)
+    weekly, = spawn("get_weekly_summary", user_id=user_id, num_days=num_days,
+                    fields=["entry_id", "mood_name", "intensity", "timestamp"])
+    trends, = spawn("calculate_emotional_trends", user_id=user_id, lookback_days=trend_days)
+    common, = spawn("find_common_emotions", user_id=user_id, lookback_days=common_days)
+
+    assert dashboard["daily"] == daily
+    assert dashboard["trends"] == trends
+    assert dashboard["common_emotions"] == common
+    if weekly["status"] == "success":
+        for key in ("total_entries", "weekly_moods", "emotion_distribution", "window_start"):
+            assert dashboard["weekly"][key] == weekly[key]
+    else:
+        assert dashboard["weekly"]["status"] == "no_data"
+    if daily["status"] == "success":
+        recommended, = spawn("recommend_activities", emotion_name=daily["current_mood"], intensity=daily["intensity"])
+        assert dashboard["recommendations"] == recommended
+
+
+def test_unknown_sections_are_rejected(spawn):
+    report, = spawn("get_dashboard", user_id="dashboard-x", sections=["daily", "horoscope"])
+    assert report == {"status": "error", "message": "Unknown sections: horoscope"}
@@ -0,0 +1,42 @@
+import pytest
+
+from lexicon import Lexicon, detect_emotions, detect_triggers, find_keywords
+
+
+@pytest.mark.parametrize("text, triggers", [
+    ("Finished my homework early", []),
+    ("Too much work today", ["work stress"]),
+    ("Work, work, WORK.", ["work stress"]),
+    ("The download was slow", []),
+    ("My boss moved the deadlines again", ["work stress"]),
+    ("Barely slept and I'm exhausted", ["lack of sleep"]),
+    ("Argued with my partner about money", ["relationship issues", "financial stress"]),
+    ("", []),
+])
+def test_triggers_match_whole_words(text, triggers):
+    assert detect_triggers(text) == triggers
+
+
+def test_prefix_terms_match_longer_words_only_at_a_word_start():
+    lexicon = Lexicon({"stress": ["stress*"], "calm": ["calm"]})
+    assert lexicon.counts("stressed, stressful and stress") == {"stress": 3}
+    assert lexicon.counts("distressed") == {}
+    assert lexicon.counts("calmly calm_down calm") == {"calm": 1}
+
+
+def test_overlapping_terms_are_all_found():
+    lexicon = Lexicon({"short": ["pain"], "long": ["painful"]})
+    assert sorted(lexicon.matches("painful pain")) == [(0, 7, "long"), (8, 12, "short")]
+
+
+def test_emotions_are_reported_in_priority_order():
+    result = detect_emotions("Feeling calm now, though I was so frustrated and sad earlier")
+    assert result["emotions"] == ["sad", "angry", "calm"]
+    assert result["intensity"] == 8.0
+    assert detect_emotions("Nothing to report") == {"emotions": [], "intensity": None}
+
+
+def test_keywords_are_distinct_and_in_order_of_appearance():
+    text = "Stressed about work. Work is stressful; my boss too."
+    assert find_keywords(text) == ["stressed", "work", "stressful", "boss"]
+    assert find_keywords(text, limit=2) == ["stressed", "work"]
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from llm_cache import ResponseCache, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_memory_entries=2, max_disk_entries=100)
+
+
+def is_number(value):
+    return value.isdigit()
+
+
+def follow(cache, key, compute, validate=None):
+    """Start a get_or_compute that joins the call already in flight for key"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=cache.get_or_compute(key, compute, validate)))
+    thread.start()
+    while cache.stats()["coalesced"] == 0:
+        time.sleep(0.005)
+    return thread, result
+
+
+def test_prompts_differing_in_whitespace_share_a_key():
+    assert make_cache_key("How are  you?\n", "m", 0.7, 100) == make_cache_key("How are you?", "m", 0.7, 100)
+    assert make_cache_key("How are you?", "m", 0.7, 100) != make_cache_key("How are you?", "m", 0.8, 100)
+
+
+def test_evicted_entries_are_served_from_disk(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+
+    assert cache.get("a") == "A"
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 2  # "a" on write, "b" when "a" came back
+    assert stats["disk_hits"] == 1
+    assert cache.get("missing") is None
+
+
+def test_concurrent_callers_share_one_computation(cache):
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "42"
+
+    leader = threading.Thread(target=cache.get_or_compute, args=("k", slow))
+    leader.start()
+    while not calls:
+        time.sleep(0.005)
+    thread, result = follow(cache, "k", lambda: pytest.fail("computed twice"))
+    release.set()
+    leader.join()
+    thread.join()
+
+    assert result["value"] == "42"
+    assert len(calls) == 1
+
+
+def test_followers_do_not_take_a_rejected_value(cache):
+    release = threading.Event()
+    started = threading.Event()
+
+    def malformed():
+        started.set()
+        release.wait(5)
+        return "not a number"
+
+    leader = threading.Thread(target=cache.get_or_compute, args=("k", malformed, is_number))
+    leader.start()
+    started.wait(5)
+    thread, result = follow(cache, "k", lambda: "7", is_number)
+    release.set()
+    leader.join()
+    thread.join()
+
+    assert result["value"] == "7"
+    assert cache.get("k") == "7"
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from fake_llm_server import SUPPORT_REPLY
+from llm_cache import ResponseCache
+from llm_client import LLMClient, LLMError
+from llm_providers import LLMRouter
+from mind_functions import is_analysis
+
+ANALYSIS_PROMPT = "Reply with a JSON analysis"
+
+
+def router_for(*servers, **options):
+    """A router failing over from each fake server to the next, each with its own model name"""
+    clients = {
+        f"provider{i}": LLMClient(server.url, "test", f"model-{i}", max_retries=0)
+        for i, server in enumerate(servers)
+    }
+    return LLMRouter(clients, {"default": list(clients)}, **options)
+
+
+def test_failed_providers_fail_over_and_cool_down(fake_llm):
+    down, up = fake_llm(error_rate=1.0), fake_llm()
+    router = router_for(down, up, failure_threshold=2, cooldown=60)
+
+    for _ in range(3):
+        assert router.complete("How do I relax?", 0.7, 100) == SUPPORT_REPLY
+    # Two failures open the circuit: the third request goes straight to the healthy provider
+    assert down.request_count == 2
+    assert router.route("default") == ["provider1", "provider0"]
+    stats = router.provider_stats()
+    assert (stats["provider0"]["failures"], stats["provider1"]["successes"]) == (2, 3)
+    assert router.router_stats()["failovers"] == 2
+
+
+def test_invalid_content_counts_as_a_provider_failure(fake_llm):
+    router = router_for(fake_llm(reply="Sorry, I can't do JSON today"), fake_llm())
+
+    assert router.complete(ANALYSIS_PROMPT, 0.7, 100, validate=is_analysis).startswith("{")
+    assert router.provider_stats()["provider0"]["failures"] == 1
+    assert router.provider_stats()["provider0"]["last_error"] == "Invalid response from provider0"
+    # Without validate the provider's text is taken as it is
+    assert router.complete(ANALYSIS_PROMPT, 0.7, 100) == "Sorry, I can't do JSON today"
+
+    malformed = router_for(fake_llm(reply="not json"), fake_llm(reply="still not json"))
+    with pytest.raises(LLMError):
+        malformed.complete(ANALYSIS_PROMPT, 0.7, 100, validate=is_analysis)
+
+
+def test_slow_requests_are_hedged_to_the_next_provider(fake_llm):
+    slow, fast = fake_llm(), fake_llm()
+    router = router_for(slow, fast, hedge=True, hedge_min_samples=3)
+    try:
+        for _ in range(3):
+            router.complete("How do I relax?", 0.7, 100)
+        assert router.router_stats()["hedged"] == 0
+
+        slow.latency_ms = 2000
+        started = time.perf_counter()
+        assert router.complete("How do I relax?", 0.7, 100) == SUPPORT_REPLY
+        assert time.perf_counter() - started < 1
+        counters = router.router_stats()
+        assert (counters["hedged"], counters["hedge_wins"]) == (1, 1)
+    finally:
+        router.close()
+
+
+def test_stream_and_complete_share_cache_entries_after_a_failover(fake_llm, tmp_path):
+    down, up = fake_llm(error_rate=1.0), fake_llm()
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60, max_memory_entries=10, max_disk_entries=10)
+    router = router_for(down, up, cache=cache, failure_threshold=1, cooldown=60)
+
+    assert router.complete("How do I relax?", 0.7, 100) == SUPPORT_REPLY
+    # provider0 is now cooling down, so the route starts with provider1
+    assert router.route("default")[0] == "provider1"
+    requests = down.request_count + up.request_count
+    assert "".join(router.stream("How do I relax?", 0.7, 100)) == SUPPORT_REPLY
+    assert down.request_count + up.request_count == requests
+
+    assert "".join(router.stream("How do I breathe?", 0.7, 100)) == SUPPORT_REPLY
+    assert router.complete("How do I breathe?", 0.7, 100) == SUPPORT_REPLY
+    assert down.request_count + up.request_count == requests + 1
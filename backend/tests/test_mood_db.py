@@ -0,0 +1,257 @@
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+import config
+from analysis_queue import AnalysisQueue, journal_analysis
+from mood_db import ShardedMoodStore, SQLiteMoodStore, sqlite_path
+from mood_store import MoodStore
+from scheduler import MaterializedSummaries, SummaryScheduler
+from trigger_index import TriggerIndex
+
+NOW = datetime(2025, 1, 20, 15, 30)
+
+
+@pytest.fixture
+def processes(tmp_path):
+    """Two stores on one file, each with its own id allocator, as two server processes would have"""
+    path = str(tmp_path / "mood.db")
+    stores = [SQLiteMoodStore(path, flush_interval_ms=0, id_block=1000) for _ in range(2)]
+    yield stores
+    for store in stores:
+        store.close()
+
+
+def test_entries_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "mood.db")
+    store = SQLiteMoodStore(path)
+    logged = store.add("u1", "sad", 3, "Rough day", "2025-01-20T09:15:30.123456")
+    store.add("u2", "calm", 5)
+    store.annotate("u1", logged.entry_id, "analysis", {"triggers": ["work stress"]})
+    store.close()
+
+    reopened = SQLiteMoodStore(path, flush_interval_ms=0)
+    try:
+        assert reopened.total_entries == 2
+        entry = reopened.entry("u1", logged.entry_id)
+        assert (entry.mood_name, entry.journal_text, entry.timestamp) == ("sad", "Rough day", "2025-01-20T09:15:30.123456")
+        assert entry.extras == {"analysis": {"triggers": ["work stress"]}}
+        # Ids keep counting up from the reopened file
+        assert reopened.add("u1", "happy", 7).entry_id > logged.entry_id
+    finally:
+        reopened.close()
+
+
+def test_relative_database_paths_are_taken_from_the_backend_directory():
+    assert sqlite_path("sqlite:///mindmate.db") == os.path.join(config.BACKEND_DIR, "mindmate.db")
+    assert sqlite_path("sqlite:////var/lib/mindmate.db") == "/var/lib/mindmate.db"
+    assert sqlite_path("sqlite://") == ":memory:"
+    assert sqlite_path("postgresql://localhost/mindmate") is None
+
+
+def test_failed_group_commits_are_kept_and_retried(tmp_path):
+    path = str(tmp_path / "mood.db")
+    store = SQLiteMoodStore(path, flush_interval_ms=10)
+    first = store.add("u1", "calm", 5)  # reserves this process's block of ids
+    store.flush()
+    store._db.execute("PRAGMA busy_timeout=50")
+    other = sqlite3.connect(path)
+    try:
+        other.execute("BEGIN IMMEDIATE")  # another process holding the write lock
+        logged = [store.add("u1", "calm", n) for n in range(3)]
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush()
+        stats = store.write_stats()
+        assert stats["pending"] == 3
+        assert stats["flush_failures"] >= 1 and "locked" in stats["last_flush_error"]
+
+        other.rollback()
+        # The background flusher retries on its own
+        waited = time.perf_counter()
+        while store.write_stats()["pending"] and time.perf_counter() - waited < 5:
+            time.sleep(0.02)
+        assert store.write_stats()["pending"] == 0
+        stored = other.execute("SELECT entry_id, intensity FROM mood_entries ORDER BY entry_id").fetchall()
+        assert stored == [(entry.entry_id, entry.intensity) for entry in [first] + logged]
+    finally:
+        other.close()
+        store.close()
+
+
+def test_stats_match_the_in_memory_store_bit_for_bit(tmp_path):
+    rng = random.Random(10)
+    store = SQLiteMoodStore(str(tmp_path / "mood.db"), flush_interval_ms=0)
+    try:
+        for n in range(50):
+            user_id = f"user-{n}"
+            memory = MoodStore()
+            for _ in range(rng.randint(1, 30)):
+                entry = (user_id, rng.choice(["happy", "Sad", "calm", "anxious", "tired"]), rng.uniform(1, 10), "",
+                         f"2025-01-{rng.randint(1, 20):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00")
+                store.add(*entry)
+                memory.add(*entry)
+            days = rng.choice([0, 1, 7, 14])
+            expected, actual = memory.stats(user_id, days, NOW), store.stats(user_id, days, NOW)
+            assert (actual.count, actual.positive, actual.negative) == (expected.count, expected.positive, expected.negative)
+            assert (actual.mean, actual.variance) == (expected.mean, expected.variance)
+            assert actual.emotion_counts == expected.emotion_counts
+            assert actual.first_seen == expected.first_seen
+    finally:
+        store.close()
+
+
+def test_ids_from_another_process_are_not_in_commit_order(processes):
+    first, second = processes
+    first.add("u1", "calm", 5)
+    first.flush()
+    later = second.add("u1", "sad", 3)
+    second.flush()
+    logged = first.add("u1", "happy", 7)
+
+    # The second process reserved the next block, so the earlier entry has the higher id
+    assert logged.entry_id < later.entry_id
+    assert first.window_version("u1", 0) == (3, 3)
+
+
+def test_delta_sync_sees_entries_with_lower_ids(processes):
+    first, second = processes
+    first.add("u1", "calm", 5)
+    first.flush()
+    second.add("u1", "sad", 3)
+    second.flush()
+    _, token = first.window_version("u1", 0)
+
+    logged = first.add("u1", "happy", 7, "Lunch with an old friend")
+    first.flush()
+    assert logged.entry_id < max(entry.entry_id for entry in second.entries("u1"))
+    assert [entry.entry_id for entry in second.page("u1", 0, since=token)] == [logged.entry_id]
+    assert second.window_version("u1", 0)[1] > token
+
+
+def test_annotations_advance_the_change_sequence(processes):
+    first, second = processes
+    entry = first.add("u1", "sad", 3, "Rough day")
+    first.flush()
+
+    seq, previous_seq, changed_seq, previous = second.annotate("u1", entry.entry_id, "analysis", {"triggers": []})
+    assert (seq, previous_seq, previous) == (1, 1, None)
+    assert [(s, c, record.entry_id) for s, c, record in first.changes("u1", 1)] == [(1, changed_seq, entry.entry_id)]
+    assert second.annotate("u1", 999, "analysis", {}) is None
+
+
+def test_old_databases_are_numbered_by_entry_id(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE mood_entries (entry_id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, emotion TEXT NOT NULL, "
+        "intensity REAL NOT NULL, journal_text TEXT NOT NULL DEFAULT '', ts INTEGER NOT NULL, "
+        "timestamp TEXT NOT NULL, extras TEXT)"
+    )
+    db.execute("INSERT INTO mood_entries VALUES (7, 'u1', 'calm', 5, '', 1737360000000000, '2025-01-20T09:00:00', NULL)")
+    db.commit()
+    db.close()
+
+    store = SQLiteMoodStore(path, flush_interval_ms=0)
+    try:
+        assert store.window_version("u1", 0) == (1, 7)
+        store.add("u1", "happy", 6)
+        assert [entry.mood_name for entry in store.page("u1", 0, since=7)] == ["happy"]
+        assert store.last_seq() == 8
+    finally:
+        store.close()
+
+
+def test_rebalanced_entries_are_new_to_old_tokens(tmp_path):
+    store = ShardedMoodStore(str(tmp_path / "shards"), shards=2, flush_interval_ms=0)
+    try:
+        for i in range(40):
+            store.add(f"user-{i}", "calm", 5)
+        users = [f"user-{i}" for i in range(40)]
+        before = {user_id: (store.shard(user_id), store.window_version(user_id, 0)[1]) for user_id in users}
+        assert store.rebalance(3) > 0
+        moved = 0
+        for user_id, (shard, token) in before.items():
+            # Moved entries are renumbered above every token their old shard handed out
+            new = len(store.page(user_id, 0, since=token))
+            assert new == (0 if store.shard(user_id) is shard else 1)
+            assert store.window_version(user_id, 0)[1] >= token
+            moved += new
+        assert moved > 0
+    finally:
+        store.close()
+
+
+def test_trigger_index_sees_other_processes_writes(processes):
+    first, second = processes
+    index_first, index_second = TriggerIndex(), TriggerIndex()
+    first.add("u1", "anxious", 6, "Another deadline at work")
+    assert index_first.window(first, "u1", 0)[2].keys() == {"work stress"}
+
+    logged = second.add("u1", "sad", 3, "Tired all day")
+    index_second.record_entry(second, logged)
+    second.flush()
+    entries, emotions, triggers, _ = index_first.window(first, "u1", 0)
+    assert entries == 2
+    assert emotions == {"anxious": 1, "sad": 1}
+    assert {trigger: n for trigger, (n, _) in triggers.items()} == {"work stress": 1, "lack of sleep": 1}
+
+    index_second.annotate(second, "u1", logged.entry_id, {"triggers": ["money"]})
+    triggers = index_first.window(first, "u1", 0)[2]
+    assert {trigger: n for trigger, (n, _) in triggers.items()} == {"work stress": 1, "lack of sleep": 1, "money": 1}
+
+
+def test_own_annotations_are_applied_without_a_reload(processes, monkeypatch):
+    store = processes[0]
+    index = TriggerIndex()
+    entry = store.add("u1", "sad", 3, "Could not sleep")
+    index.window(store, "u1", 0)
+    monkeypatch.setattr(index, "_load", lambda user_id: pytest.fail("reloaded the user"))
+
+    index.annotate(store, "u1", entry.entry_id, {"triggers": ["health concerns"]})
+    index.annotate(store, "u1", entry.entry_id, {"triggers": []})
+    triggers = index.window(store, "u1", 0)[2]
+    assert {trigger: n for trigger, (n, _) in triggers.items()} == {"lack of sleep": 1}
+
+
+def test_summary_runs_pick_up_every_processes_entries(processes, tmp_path, monkeypatch):
+    first, second = processes
+    scheduler = SummaryScheduler(MaterializedSummaries(str(tmp_path / "app.db")), enabled=False)
+    scheduler.attach(first)
+    outcomes = {"u1": "generated", "u2": "failed"}
+    monkeypatch.setattr(scheduler, "materialize", lambda user_id, now=None: outcomes[user_id])
+
+    second.add("u1", "calm", 5)
+    second.add("u2", "sad", 3)
+    second.flush()
+    assert scheduler.pending()[0] == {"u1", "u2"}
+    assert scheduler.run()["users"] == 2
+
+    # Only the failed user is owed, until another process logs for u1
+    assert scheduler.pending()[0] == {"u2"}
+    second.add("u1", "happy", 8)
+    second.flush()
+    outcomes["u2"] = "generated"
+    assert scheduler.pending()[0] == {"u1", "u2"}
+    scheduler.run()
+    assert scheduler.pending()[0] == set()
+
+
+def test_job_states_are_visible_to_other_processes(processes):
+    first, second = processes
+
+    def analyze(texts, user_ids):
+        return [{"error": "provider down"} for _ in texts]
+
+    jobs = AnalysisQueue(analyze, workers=1, max_attempts=1)
+    entry = first.add("u1", "sad", 3, "Rough day")
+    jobs.submit(first, entry)
+    assert jobs.wait_idle(5)
+
+    report = journal_analysis(second, "u1", entry.entry_id)
+    assert report["analysis_status"] == "done"
+    assert report["attempts"] == 1
+    assert report["error"] == "provider down"
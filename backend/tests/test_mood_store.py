@@ -0,0 +1,194 @@
+import pickle
+import random
+from datetime import datetime, timedelta
+
+from dashboard import build_dashboard, emotional_trends
+from mood_store import MoodStore, window_start, window_start_day
+
+NOW = datetime(2025, 1, 20, 15, 30)
+# Includes moods only analyze_trends counts as positive/negative (joyful, worried, ...)
+MOODS = ["happy", "Sad", "calm", "anxious", "tired", "joyful", "relaxed", "energized", "worried", "depressed", "fearful"]
+
+
+def at(day, hour=12):
+    return datetime(2025, 1, day, hour).isoformat()
+
+
+def baseline_intensity_stats(intensities):
+    """(mean, variance, stability_score) exactly as calculate_emotional_trends computed them"""
+    avg_intensity = sum(intensities) / len(intensities)
+    variance = sum([(x - avg_intensity) ** 2 for x in intensities]) / len(intensities)
+    std_dev = variance ** 0.5
+    return avg_intensity, variance, max(0.0, min(1.0, 1.0 - (std_dev / 4.0)))
+
+
+def baseline_trends(entries):
+    """calculate_emotional_trends' report before the store existed, over (mood, intensity) pairs"""
+    if len(entries) < 3:
+        return {"trend": "stable", "stability_score": 0.8, "volatility": "low",
+                "explanation": "Need more data to determine trends"}
+    positive_emotions = {"happy", "calm", "content", "peaceful", "excited", "grateful", "confident"}
+    negative_emotions = {"sad", "anxious", "stressed", "overwhelmed", "angry", "frustrated", "lonely"}
+    positive_count = sum(1 for mood, _ in entries if mood.lower() in positive_emotions)
+    negative_count = sum(1 for mood, _ in entries if mood.lower() in negative_emotions)
+    total = positive_count + negative_count
+    trend = "stable"
+    if total > 0:
+        positive_ratio = positive_count / total
+        if positive_ratio >= 0.6:
+            trend = "improving"
+        elif positive_ratio <= 0.4:
+            trend = "declining"
+    _, variance, stability_score = baseline_intensity_stats([intensity for _, intensity in entries])
+    std_dev = variance ** 0.5
+    volatility = "low" if std_dev < 1.5 else "medium" if std_dev < 2.5 else "high"
+    return {
+        "trend": trend,
+        "stability_score": stability_score,
+        "volatility": volatility,
+        "positive_count": positive_count,
+        "negative_count": negative_count,
+        "explanation": f"Based on {len(entries)} entries: {positive_count} positive, {negative_count} negative"
+    }
+
+
+def random_history(rng, start=datetime(2025, 1, 1)):
+    """Entries in time order over a few weeks, with arbitrary float intensities"""
+    moment = start
+    entries = []
+    for _ in range(rng.randint(3, 40)):
+        moment += timedelta(minutes=rng.randint(1, 60 * 30))
+        entries.append((rng.choice(MOODS), rng.uniform(1, 10), moment))
+    return entries
+
+
+def make_store(days=(10, 14, 17, 19, 20)):
+    store = MoodStore()
+    for day in days:
+        store.add("u1", "calm", day % 10, f"day {day}", at(day))
+    return store
+
+
+def test_lookback_windows_count_today_as_the_first_day():
+    assert datetime.fromtimestamp(window_start(1, NOW)) == datetime(2025, 1, 20)
+    assert datetime.fromtimestamp(window_start(7, NOW)) == datetime(2025, 1, 14)
+    assert window_start_day(7, NOW) == "2025-01-14"
+    assert window_start(0, NOW) is None and window_start_day(-1, NOW) is None
+
+
+def test_window_returns_only_entries_inside_the_lookback():
+    store = make_store()
+    assert [entry.journal_text for entry in store.window("u1", 7, NOW)] == ["day 14", "day 17", "day 19", "day 20"]
+    assert [entry.journal_text for entry in store.window("u1", 1, NOW)] == ["day 20"]
+    assert len(store.window("u1", 0, NOW)) == 5
+    assert store.window("nobody", 7, NOW) == []
+
+
+def test_range_bounds_are_inclusive():
+    store = make_store()
+    start = datetime.fromisoformat(at(14)).timestamp()
+    end = datetime.fromisoformat(at(19)).timestamp()
+    assert [entry.journal_text for entry in store.entries("u1", start, end)] == ["day 14", "day 17", "day 19"]
+    assert [entry.journal_text for entry in store.entries("u1", end=start)] == ["day 10", "day 14"]
+
+
+def test_back_dated_entries_are_kept_in_time_order():
+    store = make_store((14, 20))
+    backdated = store.add("u1", "sad", 2, "remembered later", at(17))
+    same_time = store.add("u1", "happy", 8, "same moment", at(17))
+
+    assert [entry.journal_text for entry in store.window("u1", 0)] == [
+        "day 14", "remembered later", "same moment", "day 20"
+    ]
+    assert [entry.journal_text for entry in store.latest("u1", 2)] == ["same moment", "day 20"]
+    assert store.entry("u1", backdated.entry_id).timestamp == at(17)
+    assert store.entry("u1", same_time.entry_id).mood_name == "happy"
+    assert store.entry("u1", 999) is None
+
+
+def test_timestamps_round_trip_exactly():
+    store = MoodStore()
+    for timestamp in ("2025-01-20T09:15:30.123456", "2025-01-20T09:15:30", "2025-01-20T09:15:30+02:00"):
+        entry = store.add("u1", "calm", 5, "", timestamp)
+        assert store.entry("u1", entry.entry_id).timestamp == timestamp
+
+
+def test_window_aggregates_match_the_baseline_bit_for_bit():
+    rng = random.Random(8)
+    for _ in range(500):
+        store = MoodStore()
+        entries = random_history(rng)
+        for mood, intensity, moment in entries:
+            store.add("u1", mood, intensity, "", moment.isoformat())
+        now = entries[-1][2]
+        days = rng.choice([0, 3, 7, 14])
+        start = window_start(days, now)
+        window = [intensity for _, intensity, moment in entries if start is None or moment.timestamp() >= start]
+        if len(window) < 3:
+            continue
+
+        mean, variance, stability = baseline_intensity_stats(window)
+        stats = store.stats("u1", days, now)
+        assert (stats.mean, stats.variance) == (mean, variance)
+        assert emotional_trends(stats)["stability_score"] == stability
+        dashboard = build_dashboard(store, "u1", ["trends"], trend_days=days, now=now)
+        assert dashboard["trends"]["stability_score"] == stability
+
+
+def test_timelines_pickled_with_running_moments_are_recounted():
+    store = make_store()
+    timeline = store.users["u1"]
+    for bucket in timeline.daily.values():
+        # The shape older versions persisted
+        del bucket.__dict__["intensities"]
+        bucket.__dict__.update(mean=0.0, m2=0.0)
+
+    restored = pickle.loads(pickle.dumps(store))
+    stats = restored.stats("u1", 0)
+    assert stats.count == 5
+    assert (stats.mean, stats.variance) == baseline_intensity_stats([0, 4, 7, 9, 0])[:2]
+
+
+def test_trend_counts_keep_the_walkers_polarity():
+    store = MoodStore()
+    for mood in ("joyful", "relaxed", "energized", "worried", "depressed", "fearful", "happy", "sad", "Calm"):
+        store.add("u1", mood, 5)
+
+    report = emotional_trends(store.stats("u1", 0))
+    assert (report["positive_count"], report["negative_count"]) == (2, 1)
+    assert report["explanation"] == "Based on 9 entries: 2 positive, 1 negative"
+
+
+def test_trend_reports_match_the_baseline_walker():
+    rng = random.Random(9)
+    for _ in range(300):
+        store = MoodStore()
+        entries = random_history(rng)
+        for mood, intensity, moment in entries:
+            store.add("u1", mood, intensity, "", moment.isoformat())
+        assert emotional_trends(store.stats("u1", 0)) == baseline_trends([(mood, i) for mood, i, _ in entries])
+
+
+def test_delta_pages_and_versions_match_a_scan():
+    rng = random.Random(12)
+    for _ in range(200):
+        store = MoodStore()
+        moments = []
+        for _ in range(rng.randint(1, 30)):
+            # Mostly in order, sometimes back-dated by up to two weeks
+            moment = NOW - timedelta(hours=rng.randint(0, 24 * 14) if rng.random() < 0.2 else len(moments) * -1)
+            moments.append((store.add("u1", "calm", 5, "", moment.isoformat()), moment))
+        days = rng.choice([0, 1, 3, 7])
+        since = rng.randint(0, len(moments))
+        limit = rng.choice([0, 1, 3])
+        start = window_start(days, NOW + timedelta(days=2))
+        in_window = sorted(
+            ((moment, entry.entry_id) for entry, moment in moments if start is None or moment.timestamp() >= start)
+        )
+
+        expected = [entry_id for _, entry_id in in_window if entry_id > since]
+        page = store.page("u1", days, since=since, limit=limit, now=NOW + timedelta(days=2))
+        assert [entry.entry_id for entry in page] == (expected[:limit + 1] if limit else expected)
+        assert store.window_version("u1", days, NOW + timedelta(days=2)) == (
+            len(in_window), max((entry_id for _, entry_id in in_window), default=0)
+        )
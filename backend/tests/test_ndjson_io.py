@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+import ndjson_io
+from mood_db import SQLiteMoodStore
+from ndjson_io import bulk_io_path, export_entries, import_entries, progress_path
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    """open_store(name) -> a SQLite store in tmp_path, closed after the test"""
+    stores = []
+
+    def open_store(name):
+        store = SQLiteMoodStore(str(tmp_path / name), flush_interval_ms=0)
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+def history(store):
+    """Every entry without its id (the importing store assigns new ones), per user in time order"""
+    return {
+        user_id: [{k: v for k, v in entry.to_dict().items() if k != "entry_id"} for entry in store.entries(user_id)]
+        for user_id in sorted(store.user_ids())
+    }
+
+
+def fill(store, users=3, per_user=40):
+    for u in range(users):
+        for i in range(per_user):
+            entry = store.add(
+                f"user-{u}", ["calm", "sad", "happy"][i % 3], 1 + i % 10, f"Day {i} ☕ \"quoted\"\nline",
+                f"2025-01-{1 + i % 28:02d}T{i % 24:02d}:15:30.{i:06d}"
+            )
+            if i % 5 == 0:
+                store.annotate(entry.user_id, entry.entry_id, "analysis", {"triggers": ["work stress"]})
+
+
+@pytest.mark.parametrize("name", ["history.ndjson", "history.ndjson.gz"])
+def test_exports_import_back_unchanged(open_store, tmp_path, name):
+    source = open_store("source.db")
+    fill(source)
+    path = str(tmp_path / name)
+
+    exported = export_entries(source, path)
+    assert (exported["entries"], exported["users"]) == (120, 3)
+    target = open_store("target.db")
+    report = import_entries(target, path, batch_size=7)
+    assert (report["imported"], report["skipped"]) == (120, 0)
+    assert history(target) == history(source)
+
+    assert import_entries(target, path)["status"] == "already_imported"
+    assert target.total_entries == 120
+
+
+def test_invalid_lines_are_skipped_and_reported(open_store, tmp_path):
+    path = str(tmp_path / "mixed.ndjson")
+    good = {"user_id": "u1", "mood_name": "calm", "intensity": 5, "timestamp": "2025-01-20T09:00:00"}
+    lines = [good, "not json", {**good, "intensity": 42}, {**good, "timestamp": "yesterday"},
+             {**good, "mood_name": ""}, [1, 2], {**good, "intensity": True}, {**good, "entry_id": 99}]
+    with open(path, "w") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+        f.write("\n")
+
+    store = open_store("mood.db")
+    report = import_entries(store, path)
+    assert (report["imported"], report["skipped"]) == (2, 6)
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4, 5, 6, 7]
+    assert all(entry.entry_id != 99 for entry in store.entries("u1"))
+
+
+def test_interrupted_imports_resume_after_the_last_batch(open_store, tmp_path):
+    source = open_store("source.db")
+    fill(source)
+    path = str(tmp_path / "history.ndjson")
+    export_entries(source, path)
+    target = open_store("target.db")
+
+    committed = []
+
+    def crash_after_two(entries):
+        committed.append(len(entries))
+        if len(committed) == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_entries(target, path, batch_size=25, on_batch=crash_after_two)
+    with open(progress_path(path)) as f:
+        assert json.load(f)["lines"] == 50
+
+    report = import_entries(target, path, batch_size=25)
+    assert (report["resumed_from_line"], report["imported"], report["total_imported"]) == (50, 70, 120)
+    assert history(target) == history(source)
+
+
+def test_a_batch_committed_before_its_progress_was_saved_is_not_imported_twice(
+        open_store, tmp_path, monkeypatch):
+    source = open_store("source.db")
+    fill(source)
+    path = str(tmp_path / "history.ndjson")
+    export_entries(source, path)
+    target = open_store("target.db")
+
+    save_progress = ndjson_io.save_progress
+    saves = []
+
+    def crash_on_second_save(path, progress):
+        saves.append(progress["lines"])
+        if len(saves) == 2:
+            raise KeyboardInterrupt  # the second batch is committed, its progress is not
+        save_progress(path, progress)
+
+    monkeypatch.setattr(ndjson_io, "save_progress", crash_on_second_save)
+    with pytest.raises(KeyboardInterrupt):
+        import_entries(target, path, batch_size=25)
+    monkeypatch.setattr(ndjson_io, "save_progress", save_progress)
+
+    report = import_entries(target, path, batch_size=25)
+    assert (report["resumed_from_line"], report["total_imported"]) == (25, 120)
+    assert history(target) == history(source)
+
+
+@pytest.mark.parametrize("name", ["../escape.ndjson", "/etc/passwd", "", "."])
+def test_bulk_files_stay_under_the_bulk_directory(name):
+    with pytest.raises(ValueError):
+        bulk_io_path(name)
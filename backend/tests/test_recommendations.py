@@ -0,0 +1,65 @@
+import random
+
+from recommendations import RecommendationIndex, activity_score, rank_activities
+from seed_data import DEFAULT_HELPS_WITH, SEED_HELPS_WITH
+
+INTENSITIES = [1, 3.9, 4, 5.5, 6.9, 7, 9, 10]
+
+
+def reference(index, emotion, intensity):
+    """rank_activities over the candidates' current activity-node fields"""
+    candidates = index.candidates.get(emotion.lower()) or index.candidates[""]
+    return [activity["name"] for activity in rank_activities([c.to_dict() for c in candidates], intensity)]
+
+
+def test_precomputed_rankings_match_ranking_per_request():
+    index = RecommendationIndex(SEED_HELPS_WITH, DEFAULT_HELPS_WITH)
+    rng = random.Random(14)
+    emotions = list(SEED_HELPS_WITH) + ["Sad", "bored"]
+    for _ in range(300):
+        emotion = rng.choice(emotions)
+        activity = rng.choice(index.candidates.get(emotion.lower()) or index.candidates[""]).name
+        index.record_feedback(emotion, activity, helped=rng.random() < 0.5)
+        for intensity in INTENSITIES:
+            # Within a band the ranking is that of its representative intensity
+            representative = 2.0 if intensity < 4 else 5.5 if intensity < 7 else 9.0
+            assert index.recommend(emotion, intensity) == reference(index, emotion, representative)
+
+
+def test_strong_feelings_favour_quick_activities():
+    assert activity_score(0.7, 0, 0, 60, 10) < activity_score(0.7, 0, 0, 5, 10)
+    assert activity_score(0.7, 0, 0, 60, 0) == activity_score(0.7, 0, 0, 5, 0)
+
+
+def test_helpful_feedback_moves_an_activity_up():
+    index = RecommendationIndex(SEED_HELPS_WITH, DEFAULT_HELPS_WITH)
+    last = index.recommend("sad", 5)[-1]
+    for _ in range(10):
+        index.record_feedback("sad", last.upper(), helped=True)
+    assert index.recommend("sad", 5)[0] == last
+
+    for _ in range(30):
+        index.record_feedback("sad", last, helped=False)
+    assert index.recommend("sad", 5)[-1] == last
+    assert index.record_feedback("sad", "Juggling", helped=True) is None
+
+
+def test_unknown_emotions_get_the_default_activities():
+    index = RecommendationIndex(SEED_HELPS_WITH, DEFAULT_HELPS_WITH)
+    assert sorted(index.recommend("bored", 5)) == sorted(name for name, _, _ in DEFAULT_HELPS_WITH)
+    assert index.record_feedback("bored", "Rest and self-care").usage_count == 1
+    assert index.recommend("curious", 5) == index.recommend("bored", 5)
+
+
+def test_feedback_is_reloaded_from_the_database(tmp_path):
+    path = str(tmp_path / "app.db")
+    index = RecommendationIndex(SEED_HELPS_WITH, DEFAULT_HELPS_WITH, path)
+    last = index.recommend("sad", 5)[-1]
+    for _ in range(10):
+        index.record_feedback("sad", last, helped=True)
+    index.record_feedback("sad", last, helped=False)
+
+    reloaded = RecommendationIndex(SEED_HELPS_WITH, DEFAULT_HELPS_WITH, path)
+    candidate = reloaded._find("sad", last)
+    assert (candidate.usage_count, candidate.helped_count) == (11, 10)
+    assert reloaded.recommend("sad", 5) == index.recommend("sad", 5)
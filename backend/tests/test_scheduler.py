@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import scheduler as summaries
+from fake_llm_server import SUPPORT_REPLY
+from mood_store import MoodStore
+from scheduler import MaterializedSummaries, SummaryScheduler, habit_suggestions, weekly_reflection
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A scheduler over an in-memory store, shared by the summary views"""
+    instance = SummaryScheduler(MaterializedSummaries(), enabled=False)
+    instance.attach(MoodStore())
+    monkeypatch.setattr(summaries, "_scheduler", instance)
+    return instance
+
+
+def log(scheduler, user_id, mood="anxious", journal="Another deadline at work"):
+    scheduler.store.add(user_id, mood, 6, journal)
+    scheduler.mark_dirty(user_id)
+
+
+def test_runs_materialize_users_with_new_entries(scheduler, fake_llm, use_providers):
+    use_providers(fake_llm())
+    log(scheduler, "u1")
+    log(scheduler, "u2", "calm", "")
+
+    assert scheduler.run()["generated"] == 2
+    reflection = weekly_reflection(scheduler.store, "u1")
+    assert (reflection["reflection"], reflection["materialized"], reflection["stale"]) == (SUPPORT_REPLY, True, False)
+    assert len(habit_suggestions(scheduler.store, "u1")["habit_suggestions"]) == 4
+
+    # Nothing new: nobody is regenerated
+    assert scheduler.run()["users"] == 0
+    log(scheduler, "u1", "sad")
+    assert weekly_reflection(scheduler.store, "u1")["stale"] is True
+    outcome = scheduler.run()
+    assert (outcome["users"], outcome["generated"]) == (1, 1)
+    assert weekly_reflection(scheduler.store, "u1")["stale"] is False
+
+
+def test_views_never_generate(scheduler, fake_llm, use_providers):
+    provider = fake_llm()
+    use_providers(provider)
+    log(scheduler, "u1")
+
+    reflection = weekly_reflection(scheduler.store, "u1")
+    habits = habit_suggestions(scheduler.store, "u1")
+    assert (reflection["reflection"], reflection["materialized"]) == (summaries.DEFAULT_REFLECTION, False)
+    assert habits["habit_suggestions"] == summaries.DEFAULT_HABIT_SUGGESTIONS
+    # Nor in the background: generation waits for the scheduled run
+    time.sleep(0.2)
+    assert provider.request_count == 0
+    assert scheduler.pending()[0] == {"u1"}
+
+
+def test_failed_users_are_retried_on_the_next_run(scheduler, fake_llm, use_providers):
+    use_providers(fake_llm(error_rate=1.0))
+    log(scheduler, "u1")
+    assert scheduler.run()["failed"] == 1
+    assert scheduler.pending()[0] == {"u1"}
+
+    use_providers(fake_llm())
+    assert scheduler.run()["generated"] == 1
+    assert weekly_reflection(scheduler.store, "u1")["materialized"] is True
+
+
+def test_a_run_that_raises_keeps_its_users_owed(scheduler, monkeypatch):
+    log(scheduler, "u1")
+    log(scheduler, "u2")
+    monkeypatch.setattr(scheduler, "materialize", lambda user_id, now=None: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        scheduler.run()
+    assert scheduler.pending()[0] == {"u1", "u2"}
+
+
+def test_generation_is_charged_to_the_user(scheduler, fake_llm, use_providers, monkeypatch):
+    router = use_providers(fake_llm())
+    charged = []
+    complete = router.complete
+    monkeypatch.setattr(router, "complete", lambda *args, **kwargs: charged.append(kwargs) or complete(*args, **kwargs))
+    log(scheduler, "u1")
+
+    scheduler.run()
+    assert sorted((kwargs["task"], kwargs["user_id"]) for kwargs in charged) == [
+        ("habit_suggestions", "u1"), ("weekly_reflection", "u1")
+    ]
@@ -0,0 +1,33 @@
+import time
+
+import mind_functions
+from fake_llm_server import SUPPORT_REPLY
+
+
+def finished_calls(router):
+    return [call for client in router.clients.values() for call in client.recent_calls()]
+
+
+def test_bundle_generates_every_part(fake_llm, use_providers):
+    use_providers(fake_llm())
+    bundle = mind_functions.generate_support_bundle_by_llm("anxious", 7, ["work stress"], "", 300, "Alex", timeout=5)
+
+    assert bundle["errors"] == {}
+    assert bundle["results"]["support_message"] == SUPPORT_REPLY
+    assert set(bundle["results"]) == set(mind_functions.SUPPORT_BUNDLE_PARTS)
+
+
+def test_timed_out_parts_stop_at_the_deadline(fake_llm, use_providers):
+    router = use_providers(fake_llm(latency_ms=3000))
+    bundle = mind_functions.generate_support_bundle_by_llm("anxious", 7, ["work stress"], "", 300, "Alex", timeout=0.3)
+
+    assert bundle["fallback"] == sorted(mind_functions.SUPPORT_BUNDLE_PARTS)
+    # The provider would take 3s; the calls give their workers back at the deadline
+    waited = time.perf_counter()
+    while len(finished_calls(router)) < 3 and time.perf_counter() - waited < 2:
+        time.sleep(0.02)
+    calls = finished_calls(router)
+    assert len(calls) == 3
+    assert all(not call["ok"] and call["latency_ms"] < 1000 for call in calls)
+    # Running out of the caller's time is not held against the provider
+    assert router.provider_stats()["provider0"]["failures"] == 0
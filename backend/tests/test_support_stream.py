@@ -0,0 +1,130 @@
+import json
+import time
+
+import pytest
+import requests
+
+import support_stream
+from fake_llm_server import SUPPORT_REPLY
+from llm_client import LLMClient, LLMError
+from llm_providers import AnthropicClient, OllamaClient
+from seed_data import canned_support_message
+
+REQUEST = {"emotion_name": "sad", "intensity_score": 4, "detected_triggers": ["work"], "user_id": "u1"}
+
+
+def read_events(response):
+    """[(event name, data dict, seconds since the request), ...] from a server-sent event stream"""
+    started = time.perf_counter()
+    events = []
+    name = data = None
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if line.startswith("event: "):
+            name = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+        elif not line and data is not None:
+            events.append((name, data, time.perf_counter() - started))
+            name = data = None
+    return events
+
+
+def post(url, body):
+    return requests.post(url, json=body, stream=True, timeout=10)
+
+
+def test_deltas_join_into_the_done_message(fake_llm, use_providers, stream_url):
+    use_providers(fake_llm())
+    response = post(stream_url, REQUEST)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/event-stream"
+    events = read_events(response)
+    deltas = [data["delta"] for name, data, _ in events[:-1]]
+    assert all(name is None for name, _, _ in events[:-1])
+    assert len(deltas) > 1
+    name, done, _ = events[-1]
+    assert name == "done"
+    assert done == {"message": SUPPORT_REPLY}
+    assert "".join(deltas) == SUPPORT_REPLY
+
+
+def test_first_delta_arrives_before_generation_finishes(fake_llm, use_providers, stream_url):
+    # About 40 words at 20ms each: the whole reply takes ~0.8s to generate
+    use_providers(fake_llm(token_delay_ms=20))
+    events = read_events(post(stream_url, REQUEST))
+
+    first_delta_at = events[0][2]
+    done_at = events[-1][2]
+    assert events[0][1].get("delta")
+    assert done_at > 0.5
+    assert first_delta_at < done_at / 2
+
+
+def test_fails_over_before_the_first_token(fake_llm, use_providers, stream_url):
+    failing = fake_llm(error_rate=1.0, error_status=503)
+    router = use_providers(failing, fake_llm())
+    events = read_events(post(stream_url, REQUEST))
+
+    assert events[-1][:2] == ("done", {"message": SUPPORT_REPLY})
+    assert failing.request_count == 1
+    assert router.router_stats()["failovers"] == 1
+    assert router.provider_stats()["provider0"]["failures"] == 1
+
+
+def test_canned_message_when_every_provider_fails(fake_llm, use_providers, stream_url):
+    use_providers(fake_llm(error_rate=1.0), fake_llm(error_rate=1.0))
+    events = read_events(post(stream_url, REQUEST))
+
+    canned = canned_support_message("sad")
+    assert [data for name, data, _ in events[:-1]] == [{"delta": canned}]
+    name, done, _ = events[-1]
+    assert name == "done"
+    assert done["message"] == canned
+    assert done["fallback"] is True
+    assert "500" in done["error"]
+
+
+def test_error_event_after_partial_output(monkeypatch, stream_url):
+    def broken_stream(*args):
+        yield "I hear "
+        raise LLMError("Stream interrupted: connection reset")
+
+    monkeypatch.setattr(support_stream, "stream_message_by_llm", broken_stream)
+    events = read_events(post(stream_url, REQUEST))
+
+    assert [(name, data) for name, data, _ in events] == [
+        (None, {"delta": "I hear "}),
+        ("error", {"error": "Stream interrupted: connection reset"})
+    ]
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[]", b'"sad"', b"42", b'{"emotion_name": "sad"}'])
+def test_invalid_requests_are_rejected(stream_url, body):
+    response = requests.post(stream_url, data=body, headers={"Content-Type": "application/json"}, timeout=10)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("client_for", [
+    lambda server: LLMClient(server.url, "test", "fake", max_retries=0),
+    lambda server: OllamaClient(server.ollama_url, "fake", max_retries=0),
+    lambda server: AnthropicClient(server.anthropic_url, "test", "fake", max_retries=0)
+], ids=["openai", "ollama", "anthropic"])
+def test_clients_read_each_provider_stream(fake_llm, client_for):
+    client = client_for(fake_llm())
+    deltas = list(client.stream("How do I calm down?", 0.8, 200, task="support_message", use_cache=False))
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == SUPPORT_REPLY
+    stats = client.stats()["support_message"]
+    assert stats["calls"] == 1 and stats["errors"] == 0
+    assert stats["completion_tokens"] > 0
+
+
+def test_client_raises_on_provider_error(fake_llm):
+    client = LLMClient(fake_llm(error_rate=1.0, error_status=500).url, "test", "fake", max_retries=0)
+
+    with pytest.raises(LLMError) as error:
+        list(client.stream("Hello", 0.8, 50, use_cache=False))
+    assert error.value.status_code == 500
+    assert client.stats()["default"]["errors"] == 1
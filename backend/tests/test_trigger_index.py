@@ -0,0 +1,95 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import trigger_index as triggers_module
+from mood_store import MoodStore
+from trigger_index import TriggerIndex, entry_triggers, phi_coefficient, start_day, trigger_graph
+
+NOW = datetime(2025, 1, 20, 15, 30)
+JOURNALS = ["", "Another deadline at work", "Barely slept", "Argued with my partner", "Money is tight", "Nice walk"]
+ANALYZED = [[], ["work stress"], ["health concerns"], ["money", "family"]]
+
+
+def scan(store, user_id, lookback_days):
+    """What the index should report, from a pass over the window's entries"""
+    first_day = start_day(lookback_days, NOW)
+    entries, emotions, triggers, pairs = 0, {}, {}, {}
+    for entry in store.entries(user_id):
+        moment = datetime.fromisoformat(entry.timestamp)
+        if first_day is not None and moment.date().toordinal() < first_day:
+            continue
+        entries += 1
+        emotion = entry.mood_name.lower()
+        emotions[emotion] = emotions.get(emotion, 0) + 1
+        for trigger in entry_triggers(entry.journal_text, entry.get("analysis")):
+            for table, key in ((triggers, trigger), (pairs, (emotion, trigger))):
+                n, last_seen = table.get(key, (0, 0.0))
+                table[key] = (n + 1, max(last_seen, moment.timestamp()))
+    return entries, emotions, triggers, pairs
+
+
+def test_window_counts_and_last_seen_match_a_scan():
+    rng = random.Random(20)
+    store = MoodStore()
+    index = TriggerIndex()
+    logged = []
+    for _ in range(200):
+        if logged and rng.random() < 0.3:
+            # Analyses arrive late and are sometimes replaced, dropping triggers
+            index.annotate(store, "u1", rng.choice(logged).entry_id, {"triggers": rng.choice(ANALYZED)})
+        else:
+            moment = NOW - timedelta(hours=rng.randint(0, 24 * 40))
+            entry = store.add("u1", rng.choice(["sad", "Anxious", "calm"]), 5, rng.choice(JOURNALS), moment.isoformat())
+            index.record_entry(store, entry)
+            logged.append(entry)
+        if rng.random() < 0.1:
+            index.window(store, "u1", 0, NOW)  # indexed from here on, updated incrementally
+
+    for lookback_days in (0, 1, 3, 7, 30):
+        assert index.window(store, "u1", lookback_days, NOW) == scan(store, "u1", lookback_days)
+
+
+def test_dropped_triggers_no_longer_count_as_seen():
+    store = MoodStore()
+    index = TriggerIndex()
+    early = store.add("u1", "anxious", 6, "Deadline at work", "2025-01-10T09:00:00")
+    late = store.add("u1", "anxious", 6, "", "2025-01-19T21:00:00")
+    index.annotate(store, "u1", late.entry_id, {"triggers": ["work stress"]})
+    assert index.window(store, "u1", 0, NOW)[2]["work stress"] == (2, datetime(2025, 1, 19, 21).timestamp())
+
+    # Re-analyzed without the trigger: last seen goes back to the earlier entry
+    index.annotate(store, "u1", late.entry_id, {"triggers": []})
+    assert index.window(store, "u1", 0, NOW)[2]["work stress"] == (1, datetime(2025, 1, 10, 9).timestamp())
+    # Windows only report what happened inside them
+    index.annotate(store, "u1", late.entry_id, {"triggers": ["work stress"]})
+    index.record_entry(store, store.add("u1", "sad", 3, "Deadline at work", "2025-01-20T08:00:00"))
+    assert index.window(store, "u1", 3, NOW)[2]["work stress"] == (2, datetime(2025, 1, 20, 8).timestamp())
+    assert early.entry_id not in [entry.entry_id for entry in store.window("u1", 3, NOW)]
+
+
+def test_phi_matches_the_correlation_of_the_indicators(monkeypatch):
+    rng = random.Random(21)
+    store = MoodStore()
+    monkeypatch.setattr(triggers_module, "trigger_index", TriggerIndex())
+    for _ in range(80):
+        moment = NOW - timedelta(hours=rng.randint(0, 24 * 6))
+        store.add("u1", rng.choice(["sad", "anxious", "calm"]), 5, rng.choice(JOURNALS), moment.isoformat())
+
+    graph = trigger_graph(store, "u1", 7, NOW)
+    entries = store.window("u1", 7, NOW)
+    assert graph["total_entries"] == len(entries)
+    for edge in graph["correlates_with"]:
+        is_emotion = [entry.mood_name == edge["emotion"] for entry in entries]
+        has_trigger = [edge["trigger"] in entry_triggers(entry.journal_text) for entry in entries]
+        expected = np.corrcoef(is_emotion, has_trigger)[0, 1]
+        assert edge["correlation_strength"] == pytest.approx(round(expected, 4), abs=1e-4)
+
+
+def test_phi_is_zero_when_either_side_never_varies():
+    assert phi_coefficient(10, 10, 4, 4) == 0.0
+    assert phi_coefficient(10, 3, 0, 0) == 0.0
+    assert phi_coefficient(4, 2, 2, 2) == 1.0
+    assert phi_coefficient(4, 2, 2, 0) == -1.0
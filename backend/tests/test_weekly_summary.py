@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from mood_db import open_mood_db
+
+
+def log(spawn, user_id, count):
+    return [
+        spawn("log_mood", user_id=user_id, mood_name=mood, intensity=5.0)[0]["data"]["entry_id"]
+        for mood in ["calm", "sad", "happy", "anxious"][:count]
+    ]
+
+
+def summary(spawn, user_id, **fields):
+    report, = spawn("get_weekly_summary", user_id=user_id, **fields)
+    return report
+
+
+def test_unpaged_summary_lists_the_whole_window(spawn):
+    ids = log(spawn, "weekly-full", 3)
+    report = summary(spawn, "weekly-full")
+
+    assert report["status"] == "success"
+    assert report["total_entries"] == 3
+    assert [entry["entry_id"] for entry in report["weekly_moods"]] == ids
+    assert report["emotion_distribution"] == {"calm": 1, "sad": 1, "happy": 1}
+    assert report["next_cursor"] is None
+    assert summary(spawn, "weekly-nobody")["status"] == "no_data"
+
+
+def test_pages_follow_the_cursor_without_gaps(spawn):
+    ids = log(spawn, "weekly-pages", 4)
+    seen = []
+    cursor = ""
+    while True:
+        report = summary(spawn, "weekly-pages", limit=3, cursor=cursor, fields=["entry_id", "mood_name"])
+        assert all(entry.keys() == {"entry_id", "mood_name"} for entry in report["weekly_moods"])
+        seen += [entry["entry_id"] for entry in report["weekly_moods"]]
+        cursor = report["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids
+    assert summary(spawn, "weekly-pages", cursor="not-a-cursor")["status"] == "error"
+
+
+def test_unchanged_windows_are_not_modified(spawn):
+    log(spawn, "weekly-etag", 2)
+    etag = summary(spawn, "weekly-etag")["etag"]
+    assert summary(spawn, "weekly-etag", if_none_match=etag) == {"status": "not_modified", "etag": etag}
+
+    log(spawn, "weekly-etag", 1)
+    report = summary(spawn, "weekly-etag", if_none_match=etag)
+    assert report["status"] == "success"
+    assert report["etag"] != etag
+
+
+def test_delta_sync_lists_only_entries_logged_after_the_token(spawn):
+    log(spawn, "weekly-delta", 2)
+    token = summary(spawn, "weekly-delta")["sync_token"]
+
+    new_id, = log(spawn, "weekly-delta", 1)
+    # Logged later but dated earlier in the window
+    backdated = open_mood_db().add("weekly-delta", "tired", 3, "", (datetime.now() - timedelta(days=2)).isoformat())
+    report = summary(spawn, "weekly-delta", since=token)
+    assert [entry["entry_id"] for entry in report["weekly_moods"]] == [backdated.entry_id, new_id]
+    assert report["total_entries"] == 4
+    assert summary(spawn, "weekly-delta", since=report["sync_token"])["weekly_moods"] == []
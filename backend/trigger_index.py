@@ -0,0 +1,405 @@
+"""
+MindMate Trigger Index
+Per-user trigger counts over sliding time windows and an emotion x trigger
+co-occurrence matrix, updated on every logged mood and every stored journal
+analysis. Each count is kept as a cumulative series over days, so any
+lookback_days window is answered with one bisect per distinct key instead of
+a rescan of the user's journals.
+
+With a store other processes also write to (the SQLite stores), each query
+first applies the user's entries inserted or annotated since the last one,
+read from the store's commit sequence, so every process sees every write.
+
+The caused_by and correlates_with edges of mindmate.jac (and the trigger
+nodes' occurrence_count) are materialized from these counts.
+"""
+
+import bisect
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime
+
+import config
+from lexicon import detect_triggers
+from mood_store import window_start_day
+
+
+def day_number(timestamp):
+    """Proleptic ordinal of an ISO timestamp's (local) date"""
+    return datetime.fromisoformat(timestamp).date().toordinal()
+
+
+def start_day(lookback_days, now=None):
+    """First day ordinal of an N-day lookback window, or None for all days"""
+    first_day = window_start_day(lookback_days, now)
+    return date.fromisoformat(first_day).toordinal() if first_day else None
+
+
+def entry_triggers(journal_text, analysis=None):
+    """Triggers counted for one entry: lexicon matches plus any from its analysis"""
+    triggers = detect_triggers(journal_text) if journal_text else []
+    for trigger in (analysis or {}).get("triggers") or []:
+        trigger = str(trigger).strip().lower()
+        if trigger and trigger not in triggers:
+            triggers.append(trigger)
+    return triggers
+
+
+class CountSeries:
+    """Cumulative per-day counts: days ascending, totals[i] = count up to days[i].
+
+    With stamps=True the series also keeps the time of every occurrence by
+    day, so last_seen() is the latest one inside the window asked about and
+    drops back when an occurrence is removed.
+    """
+
+    __slots__ = ("days", "totals", "stamps")
+
+    def __init__(self, stamps=False):
+        self.days = array("l")
+        self.totals = array("q")
+        self.stamps = {} if stamps else None  # day -> epoch seconds of that day's occurrences
+
+    @property
+    def total(self):
+        return self.totals[-1] if self.totals else 0
+
+    def add(self, day, n=1, ts=0.0):
+        if self.stamps is not None:
+            self._stamp(day, n, ts)
+        if not self.days or day > self.days[-1]:
+            self.days.append(day)
+            self.totals.append(self.total + n)
+            return
+        # Same day as the latest, or back-dated: shift every later total
+        i = bisect.bisect_left(self.days, day)
+        if self.days[i] != day:
+            self.days.insert(i, day)
+            self.totals.insert(i, self.totals[i - 1] if i else 0)
+        for j in range(i, len(self.totals)):
+            self.totals[j] += n
+
+    def since(self, first_day=None):
+        """Count on or after first_day (everything when None)"""
+        if first_day is None:
+            return self.total
+        i = bisect.bisect_left(self.days, first_day)
+        return self.total - (self.totals[i - 1] if i else 0)
+
+    def last_seen(self, first_day=None):
+        """Epoch seconds of the latest occurrence on or after first_day (0.0 if none)"""
+        i = len(self.days)
+        while i and (first_day is None or self.days[i - 1] >= first_day):
+            i -= 1
+            stamps = self.stamps.get(self.days[i])
+            if stamps:
+                return max(stamps)
+        return 0.0
+
+    def _stamp(self, day, n, ts):
+        stamps = self.stamps.get(day)
+        if stamps is None:
+            stamps = self.stamps[day] = array("d")
+        if n > 0:
+            stamps.extend([ts] * n)
+        for _ in range(-n):
+            if ts in stamps:
+                stamps.remove(ts)
+        if not stamps:
+            del self.stamps[day]
+
+
+class UserTriggers:
+    """One user's entry, emotion, trigger and emotion x trigger series"""
+
+    __slots__ = ("entries", "emotions", "triggers", "pairs", "loaded_through", "synced_through", "applied")
+
+    def __init__(self):
+        self.loaded_through = 0  # highest entry id (commit sequence number for shared stores) counted so far
+        self.synced_through = 0  # shared stores: highest change sequence number applied
+        self.applied = set()  # shared stores: this process's own annotations, already counted
+        self.entries = CountSeries()
+        self.emotions = {}
+        self.triggers = {}
+        self.pairs = {}  # (emotion, trigger) -> CountSeries
+
+    def add_entry(self, day, ts, emotion, triggers):
+        self.entries.add(day, 1, ts)
+        self._series(self.emotions, emotion).add(day, 1, ts)
+        self.add_triggers(day, ts, emotion, triggers)
+
+    def add_triggers(self, day, ts, emotion, triggers, n=1):
+        # Trigger reports carry when each was last seen
+        for trigger in triggers:
+            self._series(self.triggers, trigger, True).add(day, n, ts)
+            self._series(self.pairs, (emotion, trigger), True).add(day, n, ts)
+
+    def _series(self, table, key, stamps=False):
+        series = table.get(key)
+        if series is None:
+            series = table[key] = CountSeries(stamps)
+        return series
+
+
+class TriggerIndex:
+    """Lazily loaded per-user trigger series, most recently used users kept in memory.
+
+    A user's series are built from the store the first time they are needed
+    (one scan of that user's entries) and kept up to date incrementally after
+    that; users evicted past max_users are rebuilt on their next query.
+    """
+
+    def __init__(self, max_users=10000):
+        self.max_users = max_users
+        self.store = None
+        self.shared = False
+        self.users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def attach(self, store):
+        """Use this mood store; a different store drops everything indexed so far"""
+        with self._lock:
+            if store is not self.store:
+                self.store = store
+                self.shared = getattr(store, "shared", False)
+                self.users.clear()
+
+    def record_entry(self, store, entry):
+        """Count a freshly stored entry (call after store.add)"""
+        self.attach(store)
+        if self.shared:
+            # Read back from the store's changes on the next query, like other processes' entries
+            return
+        with self._lock:
+            user = self.users.get(entry.user_id)
+            # Unindexed users, and entries their load already counted, are skipped
+            if user is None or entry.entry_id <= user.loaded_through:
+                return
+            self.users.move_to_end(entry.user_id)
+            user.loaded_through = entry.entry_id
+            self._count(user, entry)
+
+    def annotate(self, store, user_id, entry_id, analysis):
+        """Store an entry's analysis and recount the triggers it adds or drops"""
+        self.attach(store)
+        if self.shared:
+            self._annotate_shared(store, user_id, entry_id, analysis)
+            return
+        with self._lock:
+            entry = store.entry(user_id, entry_id)
+            if entry is None:
+                return
+            before = entry_triggers(entry.journal_text, entry.get("analysis"))
+            store.annotate(user_id, entry_id, "analysis", analysis)
+            user = self.users.get(user_id)
+            if user is None or entry_id > user.loaded_through:
+                # Counted with the new analysis when loaded / logged
+                return
+            after = entry_triggers(entry.journal_text, analysis)
+            day = day_number(entry.timestamp)
+            ts = datetime.fromisoformat(entry.timestamp).timestamp()
+            emotion = entry.mood_name.lower()
+            user.add_triggers(day, ts, emotion, [t for t in after if t not in before], 1)
+            user.add_triggers(day, ts, emotion, [t for t in before if t not in after], -1)
+
+    def _annotate_shared(self, store, user_id, entry_id, analysis):
+        with self._lock:
+            user = self.users.get(user_id)
+            if user is not None:
+                user = self._sync(user_id, user)
+            entry = store.entry(user_id, entry_id)
+            if entry is None:
+                return
+            result = store.annotate(user_id, entry_id, "analysis", analysis)
+            if user is None or result is None:
+                return
+            seq, previous_seq, changed_seq, previous = result
+            if seq > user.loaded_through:
+                # Not counted yet: the next sync counts it with this analysis
+                return
+            if previous_seq > user.synced_through and previous_seq not in user.applied:
+                # Changed by another process since the last sync: the counted triggers are unknown
+                self.users.pop(user_id, None)
+                return
+            user.applied.discard(previous_seq)
+            user.applied.add(changed_seq)
+            before = entry_triggers(entry.journal_text, previous)
+            after = entry_triggers(entry.journal_text, analysis)
+            day = day_number(entry.timestamp)
+            ts = datetime.fromisoformat(entry.timestamp).timestamp()
+            emotion = entry.mood_name.lower()
+            user.add_triggers(day, ts, emotion, [t for t in after if t not in before], 1)
+            user.add_triggers(day, ts, emotion, [t for t in before if t not in after], -1)
+
+    def forget(self, user_id):
+        """Drop a user's series (rebuilt from the store on the next query), e.g. after a bulk import"""
+        with self._lock:
+            self.users.pop(user_id, None)
+
+    def window(self, store, user_id, lookback_days, now=None):
+        """Counts on or after the window start: (entries, {emotion: n}, {trigger: (n, last_seen)},
+        {(emotion, trigger): (n, last_seen)}) - last_seen being the latest occurrence
+        inside the window, zero counts left out"""
+        self.attach(store)
+        first_day = start_day(lookback_days, now)
+        with self._lock:
+            user = self._user(user_id)
+            entries = user.entries.since(first_day)
+            emotions = {e: s.since(first_day) for e, s in user.emotions.items()}
+            triggers = {t: (s.since(first_day), s.last_seen(first_day)) for t, s in user.triggers.items()}
+            pairs = {p: (s.since(first_day), s.last_seen(first_day)) for p, s in user.pairs.items()}
+        return (
+            entries,
+            {e: n for e, n in emotions.items() if n > 0},
+            {t: v for t, v in triggers.items() if v[0] > 0},
+            {p: v for p, v in pairs.items() if v[0] > 0}
+        )
+
+    def _user(self, user_id):
+        user = self.users.get(user_id)
+        if user is None:
+            return self._load(user_id)
+        self.users.move_to_end(user_id)
+        return self._sync(user_id, user) if self.shared else user
+
+    def _sync(self, user_id, user):
+        """Apply a shared store's changes to the user since the last sync"""
+        changes = self.store.changes(user_id, user.synced_through)
+        counted_through = user.loaded_through
+        for seq, changed_seq, entry in changes:
+            if changed_seq in user.applied:
+                continue
+            if seq <= counted_through:
+                # An entry counted earlier was re-analyzed elsewhere: recount the user
+                return self._load(user_id)
+            user.loaded_through = max(user.loaded_through, seq)
+            self._count(user, entry)
+        if changes:
+            user.synced_through = changes[-1][1]
+        user.applied = {seq for seq in user.applied if seq > user.synced_through}
+        return user
+
+    def _load(self, user_id):
+        user = UserTriggers()
+        if self.shared:
+            changes = self.store.changes(user_id)
+            for seq, changed_seq, entry in changes:
+                user.loaded_through = max(user.loaded_through, seq)
+                user.synced_through = max(user.synced_through, changed_seq)
+            # Counted in day order: series only shift totals for back-dated days
+            entries = sorted((entry for _, _, entry in changes), key=lambda entry: day_number(entry.timestamp))
+        else:
+            entries = self.store.entries(user_id)
+            for entry in entries:
+                user.loaded_through = max(user.loaded_through, entry.entry_id)
+        for entry in entries:
+            self._count(user, entry)
+        self.users[user_id] = user
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+        return user
+
+    @staticmethod
+    def _count(user, entry):
+        user.add_entry(
+            day_number(entry.timestamp),
+            datetime.fromisoformat(entry.timestamp).timestamp(),
+            entry.mood_name.lower(),
+            entry_triggers(entry.journal_text, entry.get("analysis"))
+        )
+
+
+def phi_coefficient(entries, emotion_count, trigger_count, together):
+    """Correlation in [-1, 1] between "entry is this emotion" and "entry mentions this trigger" """
+    denominator = emotion_count * (entries - emotion_count) * trigger_count * (entries - trigger_count)
+    if denominator <= 0:
+        return 0.0
+    return (entries * together - emotion_count * trigger_count) / math.sqrt(denominator)
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+
+# Shared by every walker and mind_functions
+trigger_index = TriggerIndex(config.TRIGGER_INDEX_MAX_USERS)
+
+
+def record_triggers(store, entry):
+    """Called by log_mood for every stored entry"""
+    trigger_index.record_entry(store, entry)
+
+
+def annotate_analysis(store, user_id, entry_id, analysis):
+    """Store a journal analysis on its entry and recount the entry's triggers"""
+    trigger_index.annotate(store, user_id, entry_id, analysis)
+
+
+def trigger_graph(store, user_id, lookback_days=30, now=None):
+    """Emotion and trigger nodes with caused_by / correlates_with edges for one user's window.
+
+    caused_by.strength is the share of the emotion's entries that mention the
+    trigger; correlates_with.correlation_strength is the phi coefficient of
+    the two over all entries in the window.
+    """
+    entries, emotions, triggers, pairs = trigger_index.window(store, user_id, lookback_days, now)
+    caused_by = []
+    correlates_with = []
+    for (emotion, trigger), (together, last_seen) in pairs.items():
+        caused_by.append({
+            "emotion": emotion,
+            "trigger": trigger,
+            "strength": round(together / emotions[emotion], 4) if emotions.get(emotion) else 0.0,
+            "timestamp": _iso(last_seen)
+        })
+        correlates_with.append({
+            "emotion": emotion,
+            "trigger": trigger,
+            "correlation_strength": round(
+                phi_coefficient(entries, emotions.get(emotion, 0), triggers[trigger][0], together), 4
+            ),
+            "co_occurrence_count": together
+        })
+    caused_by.sort(key=lambda edge: (-edge["strength"], edge["emotion"], edge["trigger"]))
+    correlates_with.sort(key=lambda edge: (-edge["co_occurrence_count"], edge["emotion"], edge["trigger"]))
+    return {
+        "user_id": user_id,
+        "lookback_days": lookback_days,
+        "total_entries": entries,
+        "emotions": [
+            {"name": emotion, "frequency": count}
+            for emotion, count in sorted(emotions.items(), key=lambda item: -item[1])
+        ],
+        "triggers": [
+            {"name": trigger, "occurrence_count": count, "last_seen": _iso(last_seen)}
+            for trigger, (count, last_seen) in sorted(triggers.items(), key=lambda item: -item[1][0])
+        ],
+        "caused_by": caused_by,
+        "correlates_with": correlates_with
+    }
+
+
+def repeating_triggers(store, user_id, lookback_days=30, now=None):
+    """find_repeating_triggers report: triggers seen at least TRIGGER_MIN_OCCURRENCES times"""
+    entries, _, triggers, pairs = trigger_index.window(store, user_id, lookback_days, now)
+    repeating = sorted(
+        (item for item in triggers.items() if item[1][0] >= config.TRIGGER_MIN_OCCURRENCES),
+        key=lambda item: (-item[1][0], item[0])
+    )
+    emotions = {}
+    for (emotion, trigger), (together, _) in pairs.items():
+        emotions.setdefault(trigger, {})[emotion] = together
+    return {
+        "user_id": user_id,
+        "lookback_days": lookback_days,
+        "total_entries": entries,
+        "triggers": [trigger for trigger, _ in repeating],
+        "frequency": {trigger: count for trigger, (count, _) in repeating},
+        "last_seen": {trigger: _iso(last_seen) for trigger, (_, last_seen) in repeating},
+        "emotions": {
+            trigger: dict(sorted(emotions.get(trigger, {}).items(), key=lambda item: -item[1]))
+            for trigger, _ in repeating
+        }
+    }
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getDailySummary, getRecommendations, generateBreathingExercise } from '../services/api';
+import { getDashboard, generateBreathingExercise, reportActivityFeedback } from '../services/api';
 import '../styles/DailySummary.css';
 
 export default function DailySummary({ userId }) {
@@ -9,17 +9,19 @@ export default function DailySummary({ userId }) {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [activeTab, setActiveTab] = useState('summary');
+  const [helpedActivities, setHelpedActivities] = useState([]);
 
   useEffect(() => {
     const fetchSummary = async () => {
       try {
         setError(null);
-        const result = await getDailySummary(userId);
+        const dashboard = await getDashboard(userId);
+        const result = dashboard.daily;
         setSummary(result);
 
         if (result && result.current_mood) {
-          const recs = await getRecommendations(result.current_mood, result.intensity);
-          setRecommendations(recs.recommended_activities || []);
+          const recs = dashboard.recommendations;
+          setRecommendations((recs && recs.recommended_activities) || []);
 
           const exercise = await generateBreathingExercise(result.current_mood, result.intensity);
           setBreathingExercise(exercise);
@@ -35,6 +37,15 @@ export default function DailySummary({ userId }) {
     fetchSummary();
   }, [userId]);
 
+  const handleHelped = async (activity) => {
+    setHelpedActivities((prev) => [...prev, activity]);
+    try {
+      await reportActivityFeedback(summary.current_mood, activity, true, summary.intensity);
+    } catch (error) {
+      console.error('Error recording activity feedback:', error);
+    }
+  };
+
   if (loading) {
     return <div className="daily-summary loading">Loading your daily summary...</div>;
   }
@@ -127,6 +138,15 @@ export default function DailySummary({ userId }) {
                           ? `${activity.duration} minutes`
                           : '')}
                     </p>
+                    {typeof activity === 'string' && (
+                      <button
+                        className="helped-btn"
+                        onClick={() => handleHelped(activity)}
+                        disabled={helpedActivities.includes(activity)}
+                      >
+                        {helpedActivities.includes(activity) ? 'Thanks!' : 'This helped'}
+                      </button>
+                    )}
                   </div>
                 ))}
               </div>
@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { logMood, generateSupportMessage } from '../services/api';
+import { logMood, generateSupportBundle, streamSupportMessage } from '../services/api';
 import '../styles/MoodLogger.css';
 
 const MOOD_OPTIONS = [
@@ -38,13 +38,13 @@ export default function MoodLogger({ userId, onMoodLogged }) {
       const moodResult = await logMood(userId, selectedMood.name, intensity, journalText);
       console.log('Mood logged:', moodResult);
 
-      // Generate comprehensive support
-      const support = await generateSupportMessage(selectedMood.name, intensity, [], journalText);
-      
+      // Show the support screen right away; the message fills in as it streams
       setSupportData({
         mood: selectedMood,
         intensity: intensity,
-        message: support.message || support.data?.message || 'Your feelings have been noted. Take a moment to breathe and be kind to yourself.',
+        message: '',
+        affirmation: null,
+        breathingExercise: null,
         suggestions: [
           '💬 Talk to someone you trust about how you\'re feeling',
           '🌬️ Try a quick breathing exercise to calm your mind',
@@ -69,6 +69,25 @@ export default function MoodLogger({ userId, onMoodLogged }) {
       });
 
       setSubmitted(true);
+
+      // Breathing exercise and affirmation are generated while the message streams
+      const [message, support] = await Promise.all([
+        streamSupportMessage(selectedMood.name, intensity, [], journalText, (text) =>
+          setSupportData((prev) => ({ ...prev, message: text })), userId
+        ).catch((streamError) => {
+          console.error('Error streaming support message:', streamError);
+          return '';
+        }),
+        generateSupportBundle(selectedMood.name, intensity, [], journalText, 300, 'Friend', ['breathing_exercise', 'affirmation'], userId)
+          .catch(() => ({})),
+      ]);
+
+      setSupportData((prev) => ({
+        ...prev,
+        message: message || 'Your feelings have been noted. Take a moment to breathe and be kind to yourself.',
+        affirmation: support.affirmation,
+        breathingExercise: support.breathing_exercise,
+      }));
       if (onMoodLogged) {
         onMoodLogged(moodResult);
       }
@@ -109,9 +128,19 @@ export default function MoodLogger({ userId, onMoodLogged }) {
             
             <div className="support-text">
               <p className="main-message">{supportData.message}</p>
+              {supportData.affirmation && (
+                <p className="main-message">{supportData.affirmation}</p>
+              )}
             </div>
           </div>
 
+          {supportData.breathingExercise && (
+            <div className="suggestions-section">
+              <h4>🌬️ A Breathing Exercise For You:</h4>
+              <p>{supportData.breathingExercise}</p>
+            </div>
+          )}
+
           <div className="suggestions-section">
             <h4>💡 Things You Can Try Right Now:</h4>
             <ul className="suggestions-list">
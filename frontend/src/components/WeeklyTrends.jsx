@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getWeeklySummary, findCommonEmotions, calculateEmotionalTrends } from '../services/api';
+import { getDashboard } from '../services/api';
 import { ResponsiveContainer, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip } from 'recharts';
 import '../styles/WeeklyTrends.css';
 
@@ -14,11 +14,10 @@ export default function WeeklyTrends({ userId }) {
     const fetchTrends = async () => {
       try {
         setError(null);
-        const [weekly, emotions, trends] = await Promise.all([
-          getWeeklySummary(userId),
-          findCommonEmotions(userId),
-          calculateEmotionalTrends(userId)
-        ]);
+        const dashboard = await getDashboard(userId);
+        const weekly = dashboard.weekly;
+        const emotions = dashboard.common_emotions;
+        const trends = dashboard.trends;
 
         setWeeklyData(weekly);
         
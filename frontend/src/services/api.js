@@ -1,6 +1,7 @@
 import axios from 'axios';
 
 const API_BASE_URL = process.env.REACT_APP_JASECI_API_URL || 'http://localhost:8000';
+const STREAM_API_URL = process.env.REACT_APP_STREAM_API_URL || 'http://localhost:8001';
 
 // API client for walker endpoints
 // Note: jac-client is installed and available for future Spawn() implementation
@@ -34,6 +35,7 @@ const callWalker = async (walkerName, fields = {}) => {
 // ============================================================================
 
 export const logMood = async (userId, moodName, intensity, journalText = '') => {
+  invalidateDashboard(userId);
   return callWalker('log_mood', {
     user_id: userId,
     mood_name: moodName,
@@ -42,6 +44,13 @@ export const logMood = async (userId, moodName, intensity, journalText = '') =>
   });
 };
 
+export const getJournalAnalysis = async (userId, entryId) => {
+  return callWalker('get_journal_analysis', {
+    user_id: userId,
+    entry_id: entryId,
+  });
+};
+
 export const analyzeJournal = async (userId, journalText) => {
   return callWalker('emotion_from_text', {
     journal_text: journalText,
@@ -59,10 +68,69 @@ export const getDailySummary = async (userId) => {
   });
 };
 
+// Entry fields the trends view needs; journal text is never downloaded here
+const WEEKLY_MOOD_FIELDS = ['entry_id', 'mood_name', 'intensity', 'timestamp'];
+const WEEKLY_PAGE_SIZE = 200;
+
+// Last weekly summary per user, kept in sync with etag + sync_token deltas
+const weeklyCache = {};
+
 export const getWeeklySummary = async (userId) => {
-  return callWalker('get_weekly_summary', {
+  const cached = weeklyCache[userId];
+  const fields = {
     user_id: userId,
-  });
+    fields: WEEKLY_MOOD_FIELDS,
+    limit: WEEKLY_PAGE_SIZE,
+  };
+  if (cached) {
+    fields.if_none_match = cached.etag;
+    fields.since = cached.sync_token;
+  }
+
+  let page = await callWalker('get_weekly_summary', fields);
+  if (page.status === 'not_modified') {
+    return cached;
+  }
+  if (page.status !== 'success') {
+    delete weeklyCache[userId];
+    return page;
+  }
+
+  const moods = [...page.weekly_moods];
+  while (page.next_cursor) {
+    page = await callWalker('get_weekly_summary', {
+      ...fields,
+      if_none_match: '',
+      cursor: page.next_cursor,
+    });
+    moods.push(...page.weekly_moods);
+  }
+
+  // Keep previously synced entries that are still inside the window
+  const kept = cached
+    ? cached.weekly_moods.filter((mood) => mood.timestamp.slice(0, 10) >= page.window_start)
+    : [];
+  const summary = { ...page, weekly_moods: [...kept, ...moods] };
+  delete summary.next_cursor;
+  weeklyCache[userId] = summary;
+  return summary;
+};
+
+// One get_dashboard request serves every tab until the user logs a new mood
+const dashboardRequests = {};
+
+export const getDashboard = async (userId) => {
+  if (!dashboardRequests[userId]) {
+    dashboardRequests[userId] = callWalker('get_dashboard', { user_id: userId }).catch((error) => {
+      delete dashboardRequests[userId];
+      throw error;
+    });
+  }
+  return dashboardRequests[userId];
+};
+
+export const invalidateDashboard = (userId) => {
+  delete dashboardRequests[userId];
 };
 
 export const getRecommendations = async (emotion, intensity) => {
@@ -72,6 +140,15 @@ export const getRecommendations = async (emotion, intensity) => {
   });
 };
 
+export const reportActivityFeedback = async (emotion, activity, helped = true, intensity = 5.0) => {
+  return callWalker('record_activity_feedback', {
+    emotion_name: emotion,
+    activity: activity,
+    helped: helped,
+    intensity: intensity,
+  });
+};
+
 // ============================================================================
 // SUPPORT MESSAGE & BREATHING EXERCISE ENDPOINTS
 // ============================================================================
@@ -102,6 +179,69 @@ export const generateAffirmation = async (emotion, intensity, userName = 'Friend
   });
 };
 
+// Streams the support message from backend/support_stream.py (server-sent events).
+// onText is called with the message so far each time new text arrives; the
+// promise resolves with the full message. userId is charged against that
+// user's LLM token quota; when it is used up the canned message comes back.
+export const streamSupportMessage = async (emotion, intensity, triggers = [], context = '', onText = () => {}, userId = '') => {
+  const response = await fetch(`${STREAM_API_URL}/stream/support_message`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      emotion_name: emotion,
+      intensity_score: intensity,
+      detected_triggers: triggers,
+      user_context: context,
+      user_id: userId,
+    }),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Stream request failed: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let message = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+    for (const event of events) {
+      const type = (event.match(/^event: (.*)$/m) || [])[1] || 'message';
+      const data = (event.match(/^data: (.*)$/m) || [])[1];
+      if (!data) continue;
+      const payload = JSON.parse(data);
+      if (type === 'error') throw new Error(payload.error);
+      if (type === 'done') return payload.message;
+      message += payload.delta;
+      onText(message);
+    }
+  }
+  return message;
+};
+
+// Message, breathing exercise and affirmation generated concurrently in one call.
+// Parts that failed, timed out or were over the user's LLM quota come back as
+// the canned response; they are listed in `errors` and `fallback`.
+// Pass `parts` to generate only some of them (all three by default).
+export const generateSupportBundle = async (emotion, intensity, triggers = [], context = '', duration = 300, userName = 'Friend', parts = [], userId = '') => {
+  return callWalker('generate_support_bundle', {
+    emotion_name: emotion,
+    intensity_score: intensity,
+    detected_triggers: triggers,
+    user_context: context,
+    duration_preference: duration,
+    user_name: userName,
+    parts: parts,
+    user_id: userId,
+  });
+};
+
 // ============================================================================
 // TREND ANALYSIS ENDPOINTS
 // ============================================================================
@@ -116,7 +256,7 @@ export const findRepeatingTriggers = async (userId, lookbackDays = 30) => {
 export const findCommonEmotions = async (userId, periodDays = 30) => {
   return callWalker('find_common_emotions', {
     user_id: userId,
-    period_days: periodDays,
+    lookback_days: periodDays,
   });
 };
 